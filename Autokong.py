@@ -11,20 +11,36 @@ automatic Reports/images creation, plus Plex rescans on both dump & matched fold
 4) Plex scans on both dump and matched folders with polling
 5) Empty Plex trash
 6) Pushover / Discord / email notifications
-7) SQLite db (autokong.db) tracks processed folders to avoid re-scans
+7) SQLite db (autokong.db, see state_store.py) tracks processed folders to avoid re-scans
 """
 
+import atexit
+import json
 import os
-import re
+import queue
 import shutil
-import sqlite3
 import subprocess
+import threading
 import time
-import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from email.message import EmailMessage
-from typing import Callable, List, Optional
-from urllib.parse import quote
+from typing import Callable, List, Optional, Tuple
+
+from change_journal import ChangeJournal, sync_active_watcher
+from dir_index import DirIndex
+from library_catalog import LibraryCatalog
+from log_sink import LogSink
+from perf_model import PerfModel, RunEstimate, folder_totals
+from plex_activity import PlexActivityWatcher
+from plex_client import PlexClient
+from refresh_plan import plan_refresh_roots
+from run_metrics import NodeMeter, sample_container
+from songkong_executor import SongKongExecutor
+from songkong_output import DELETE_SUMMARY_KEYS, RENAME_SUMMARY_KEYS, SongKongStats
+from state_store import ProcessedStore
+from step_graph import StepGraph, format_critical_path
+from tag_scan import read_file_tags
 
 # Optional log callback for streaming logs (e.g. to WebUI). Set by run_pipeline().
 _log_callback: Optional[Callable[[str], None]] = None
@@ -32,6 +48,8 @@ _log_callback: Optional[Callable[[str], None]] = None
 _progress_callback: Optional[Callable[..., None]] = None
 # Optional container log callback for streaming Docker container stdout (e.g. SongKong output).
 _container_log_callback: Optional[Callable[[str], None]] = None
+# Remaining-time estimate of the running pipeline (perf_model.py). Set by run_pipeline().
+_run_estimate: Optional[RunEstimate] = None
 
 STEP_LABELS = {
     "musicbrainz": "MusicBrainz / Fix songs",
@@ -54,6 +72,29 @@ DUMP_HOST_DIR        = f"/mnt/downloads_cache/MURRAY/Music/Music_dump/{MONTH_YEA
 MATCHED_HOST_DIR     = "/mnt/downloads_cache/MURRAY/Music/Music_matched"
 
 SONGKONG_IMAGE       = "songkong/songkong"
+# Host directory mounted as /songkong (Prefs, Logs, Reports). With several workers each
+# worker gets its own copy under SONGKONG_WORKERS_DIR so passes never share a Database.
+SONGKONG_CONFIG_DIR  = "/mnt/cache/appdata/songkong"
+SONGKONG_WORKERS_DIR = "/mnt/cache/appdata/songkong_workers"
+# Resources one SongKong container is expected to use; caps the number of parallel workers
+SONGKONG_WORKER_CPUS      = 2
+SONGKONG_WORKER_MEMORY_MB = 4096
+# Readiness gate before delete-duplicates/rename (replaces the former fixed 60 s sleep):
+# wait at most SONGKONG_READY_TIMEOUT s for the previous container to be gone, Database locks
+# released and the folder to stay unchanged for SONGKONG_QUIET_SECONDS.
+SONGKONG_READY_TIMEOUT    = 60
+SONGKONG_QUIET_SECONDS    = 3
+SONGKONG_READY_POLL       = 1
+# How passes are started: "run" (docker run --rm per pass) or "exec" (one long-lived
+# container per worker, passes sent with docker exec). Set per run from config_overrides.
+SONGKONG_EXECUTOR    = "run"
+# Processes reading tags for audit snapshots (0 = one per CPU); config_overrides["audit_jobs"]
+AUDIT_JOBS           = 0
+# Pair renamed/moved files in the audit by audio fingerprint; config_overrides["audit_fingerprint"]
+AUDIT_FINGERPRINT    = False
+_executor_mode = SONGKONG_EXECUTOR
+_executors: dict = {}
+_executors_lock = threading.Lock()
 
 # Host/Container roots for consistent path mapping
 HOST_ROOT            = "/mnt/downloads_cache/MURRAY/Music"
@@ -69,6 +110,15 @@ PLEX_LIBRARY_SECTION = 1
 PLEX_DUMP_PATH       = "/music/unmatched"
 PLEX_MATCHED_PATH    = "/music/matched"
 PLEX_RETRY_INTERVAL  = 5
+# Parallel Plex refresh requests; config_overrides["plex_concurrency"]
+PLEX_CONCURRENCY     = 4
+# Refresh planner (refresh_plan.py): a parent directory is scanned instead of its changed albums
+# when that saves at least FAN_OUT requests and it has at most MAX_COST x as many entries as changed ones
+PLEX_REFRESH_FAN_OUT  = 8
+PLEX_REFRESH_MAX_COST = 4.0
+# Max seconds plex_trash waits for the refreshes of plex_scans to finish (0 = do not wait);
+# config_overrides["plex_scan_timeout"]
+PLEX_SCAN_TIMEOUT     = 600
 DAYS_THRESHOLD       = 5
 # Runtime overrides from run_pipeline(config_overrides) for Plex; set at start of run, cleared in finally
 _plex_overrides: dict = {}
@@ -77,6 +127,8 @@ AUTOCLEAN_ROOT_DIR   = "/mnt/downloads_cache/MURRAY/Music/Music_dump"
 AUTOCHECK_ROOT_DIR   = "/mnt/downloads_cache/MURRAY/Music/Music_matched"
 DB_PATH              = "autokong.db"
 LOG_FILE             = "action_log.txt"
+LOG_JSON_FILE        = "action_log.jsonl"
+AUTOCLEAN_WORKERS    = 4
 
 SEND_EMAIL_REPORT    = False
 EMAIL_SENDER         = "vous@exemple.com"
@@ -89,76 +141,55 @@ EMAIL_PASSWORD       = "motdepasse"
 # -----------------------------------------------------------------------------
 # 2) UTILITIES & SQLITE STATE
 # -----------------------------------------------------------------------------
-past_processing_times: List[float] = []
-
-# Persistent state file for already-processed folders
+# Legacy state file for already-processed folders: imported once into autokong.db
+# by ProcessedStore, then no longer written.
 STATE_FILE = "/mnt/cache/appdata/scripts/processed_folders.log"
-os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
-if not os.path.exists(STATE_FILE):
-    with open(STATE_FILE, "w", encoding="utf-8"):
-        pass
+_state: Optional[ProcessedStore] = None
+_state_lock = threading.Lock()
+
+# Per-thread log prefix (e.g. "[w2] ") so parallel workers' lines stay readable
+_worker_ctx = threading.local()
+
+# stdout, action log (text + JSON lines) and UI callbacks are written by the sink's thread
+_log_sink = LogSink(LOG_FILE, LOG_JSON_FILE)
+atexit.register(_log_sink.flush)
 
 def log_action(msg: str) -> None:
-    ts = f"{datetime.now()} - {msg}"
-    print(ts, flush=True)
-    with open(LOG_FILE, "a", encoding="utf-8") as fp:
-        fp.write(ts + "\n")
-    if _log_callback:
-        try:
-            _log_callback(ts)
-        except Exception:
-            pass
+    now = datetime.now()
+    prefix = getattr(_worker_ctx, "prefix", "")
+    ts = f"{now} - {prefix}{msg}"
+    record = {"ts": now.isoformat(), "kind": "log", "worker": prefix.strip(" []") or None, "msg": msg}
+    _log_sink.emit(ts, record, _log_callback)
+
+def _emit_container_line(line: str) -> None:
+    """Queue one container stdout line for the container log callback (worker-prefixed)."""
+    if _container_log_callback:
+        _log_sink.emit(f"{getattr(_worker_ctx, 'prefix', '')}{line}", callback=_container_log_callback,
+                       persist=False)
+
+def _state_store() -> ProcessedStore:
+    global _state
+    with _state_lock:
+        if _state is None:
+            _state = ProcessedStore(DB_PATH, legacy_log=STATE_FILE)
+            atexit.register(_state.flush)
+        return _state
 
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS processed (
-            folder TEXT UNIQUE,
-            last_scanned TIMESTAMP,
-            status TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
+    _state_store()
 
 def was_processed(folder: str) -> bool:
-    # Check persistent log file for folder
-    try:
-        with open(STATE_FILE, "r", encoding="utf-8") as f:
-            for line in f:
-                if line.rstrip("\n") == folder:
-                    return True
-    except Exception:
-        pass
-    # Also check sqlite for backward compatibility
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT status FROM processed WHERE folder = ?", (folder,))
-    row = c.fetchone()
-    conn.close()
-    return bool(row and row[0] == "ok")
+    return _state_store().contains(folder)
 
 def mark_processed(folder: str, status: str = "ok"):
-    # Write to persistent log file
-    try:
-        with open(STATE_FILE, "a", encoding="utf-8") as f:
-            f.write(folder + "\n")
-    except Exception as e:
-        log_action(f"Error writing to STATE_FILE: {e}")
-    # Also update sqlite for backward compatibility
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    now = datetime.now().isoformat()
-    c.execute("""
-        INSERT INTO processed(folder, last_scanned, status)
-        VALUES(?, ?, ?)
-        ON CONFLICT(folder) DO UPDATE SET
-            last_scanned=excluded.last_scanned,
-            status=excluded.status
-    """, (folder, now, status))
-    conn.commit()
-    conn.close()
+    _state_store().mark(folder, status)
+
+def outstanding_steps() -> dict:
+    """Steps interrupted or failed runs left per folder ("" = global steps); what a resume run does."""
+    return _state_store().outstanding_steps()
+
+def discard_steps(folder: Optional[str] = None) -> int:
+    return _state_store().discard_steps(folder)
 
 
 init_db()
@@ -216,27 +247,21 @@ def send_email_report(path: str, subject: str) -> None:
         srv.send_message(msg)
     log_action("Email report sent")
 
-def calculate_eta(start: datetime) -> str:
-    if not past_processing_times:
-        return "Unknown"
-    avg = sum(past_processing_times) / len(past_processing_times)
-    rem = max(0, avg - (datetime.now() - start).total_seconds())
-    return str(timedelta(seconds=int(rem)))
+def current_eta() -> Optional[dict]:
+    """Remaining time of the running pipeline (RunEstimate.snapshot()), None when idle."""
+    estimate = _run_estimate
+    return estimate.snapshot() if estimate is not None else None
 
 def get_progress_summary(done: int, total: int) -> str:
     pct = (done / total * 100) if total else 0
     return f"📊 Processed {done}/{total} ({pct:.2f}%)"
 
-def has_music(path: str) -> bool:
-    exts = (".mp3", ".flac", ".wav", ".aac", ".m4a", ".ogg", ".wma", ".alac", ".aiff")
-    for _, _, files in os.walk(path):
-        if any(f.lower().endswith(exts) for f in files):
-            return True
-    return False
+def has_music(path: str, index: Optional[DirIndex] = None) -> bool:
+    return (index or DirIndex()).has_audio(path)
 
-def move_logs_to_backup(folder: str, ts: datetime) -> None:
-    src = "/mnt/cache/appdata/songkong/Logs/"
-    dst = "/mnt/cache/appdata/songkong/Logs_backup/"
+def move_logs_to_backup(folder: str, ts: datetime, songkong_dir: str = SONGKONG_CONFIG_DIR) -> None:
+    src = os.path.join(songkong_dir, "Logs", "")
+    dst = os.path.join(SONGKONG_CONFIG_DIR, "Logs_backup", "")
     if not os.path.isdir(src):
         log_action(f"ℹ️ No logs to backup (src missing: {src})")
         return
@@ -251,19 +276,135 @@ def move_logs_to_backup(folder: str, ts: datetime) -> None:
 # -----------------------------------------------------------------------------
 # 3) SONGKONG PHASE (4 passes) per daily folder
 # -----------------------------------------------------------------------------
-def clean_songkong_dirs() -> None:
+def clean_songkong_dirs(songkong_dir: str = SONGKONG_CONFIG_DIR) -> None:
     for p in (
-        "/mnt/cache/appdata/songkong/Prefs/Database",
-        "/mnt/cache/appdata/songkong/Logs",
-        "/mnt/cache/appdata/songkong/Reports",
+        os.path.join(songkong_dir, "Prefs", "Database"),
+        os.path.join(songkong_dir, "Logs"),
+        os.path.join(songkong_dir, "Reports"),
     ):
         shutil.rmtree(p, ignore_errors=True)
         log_action(f"Removed {p}")
-    os.makedirs("/mnt/cache/appdata/songkong/Prefs/Database", exist_ok=True)
-    os.makedirs("/mnt/cache/appdata/songkong/Logs", exist_ok=True)
-    os.makedirs("/mnt/cache/appdata/songkong/Reports/images", exist_ok=True)
+    os.makedirs(os.path.join(songkong_dir, "Prefs", "Database"), exist_ok=True)
+    os.makedirs(os.path.join(songkong_dir, "Logs"), exist_ok=True)
+    os.makedirs(os.path.join(songkong_dir, "Reports", "images"), exist_ok=True)
     log_action("Recreated Prefs/Database, Logs and Reports/images")
 
+def prepare_worker_songkong_dir(worker: int) -> str:
+    """Create an isolated /songkong copy for a parallel worker (Prefs without Database)."""
+    wdir = os.path.join(SONGKONG_WORKERS_DIR, f"w{worker}")
+    shutil.copytree(
+        os.path.join(SONGKONG_CONFIG_DIR, "Prefs"),
+        os.path.join(wdir, "Prefs"),
+        ignore=shutil.ignore_patterns("Database"),
+        dirs_exist_ok=True,
+    )
+    clean_songkong_dirs(wdir)
+    return wdir
+
+def _available_memory_mb() -> Optional[int]:
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+def max_songkong_workers(requested: int, cpus_per_worker: int = SONGKONG_WORKER_CPUS,
+                         memory_mb_per_worker: int = SONGKONG_WORKER_MEMORY_MB) -> int:
+    """Cap the requested worker count by host CPUs and available RAM (never below 1)."""
+    limit = max(1, requested)
+    limit = min(limit, max(1, (os.cpu_count() or 1) // max(1, cpus_per_worker)))
+    mem = _available_memory_mb()
+    if mem is not None:
+        limit = min(limit, max(1, mem // max(1, memory_mb_per_worker)))
+    return limit
+
+def _executor_for(songkong_dir: str) -> SongKongExecutor:
+    """Executor of the worker owning songkong_dir (one long-lived container per worker in exec mode)."""
+    with _executors_lock:
+        ex = _executors.get(songkong_dir)
+        if ex is None:
+            worker = os.path.basename(songkong_dir.rstrip("/")) if songkong_dir != SONGKONG_CONFIG_DIR else "main"
+            ex = SongKongExecutor(
+                SONGKONG_IMAGE,
+                [(HOST_ROOT, CONTAINER_ROOT), (songkong_dir, "/songkong")],
+                mode=_executor_mode,
+                container_name=f"songkong_worker_{worker}",
+                log=log_action,
+            )
+            _executors[songkong_dir] = ex
+        return ex
+
+def stop_executors() -> None:
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for ex in executors:
+        try:
+            ex.stop()
+        except Exception as e:
+            log_action(f"SongKong executor stop failed: {e}")
+
+# Minimum seconds between two live-stats progress updates of the same pass
+LIVE_STATS_INTERVAL = 1.0
+
+def _report_live_stats(stats: SongKongStats, force: bool = False) -> None:
+    """Re-send the current step's progress with live SongKong counters (throttled)."""
+    ctx = getattr(_worker_ctx, "progress", None)
+    if not _progress_callback or ctx is None:
+        return
+    now = time.monotonic()
+    if not force and now - getattr(_worker_ctx, "stats_sent", 0.0) < LIVE_STATS_INTERVAL:
+        return
+    _worker_ctx.stats_sent = now
+    args, extra = ctx
+    eta = current_eta()
+    if eta is not None:
+        extra = {**extra, "eta": eta}
+    try:
+        _progress_callback(*args, stats=stats.live(), **extra)
+    except Exception:
+        pass
+
+def _stream_pass(
+    executor: SongKongExecutor,
+    pass_name: str,
+    args: List[str],
+    label: str,
+    stats: SongKongStats,
+    abort_on: Optional[str] = None,
+) -> Tuple[int, bool]:
+    """
+    Run one pass, streaming stdout+stderr line by line into the container log and stats.
+    Stops the pass when a line contains abort_on. Retries with docker run if docker exec could
+    not start. Returns (returncode, aborted).
+    """
+    while True:
+        cmd = executor.command(pass_name, args)
+        log_action(f"{label}: " + " ".join(cmd))
+        # exec mode reuses the worker container: its resource counters are sampled as differences
+        exec_mode = cmd[1] == "exec"
+        with sample_container(executor.container_name if exec_mode else pass_name, fresh=not exec_mode):
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+            aborted = False
+            for line in proc.stdout:
+                stripped = line.strip()
+                _emit_container_line(stripped)
+                if stats.feed(stripped):
+                    _report_live_stats(stats)
+                if abort_on and abort_on in line:
+                    aborted = True
+                    proc.terminate()
+                    executor.abort()
+                    break
+            rc = proc.wait()
+        if not aborted and executor.is_exec_start_failure(cmd, rc):
+            continue
+        _report_live_stats(stats, force=True)
+        return rc, aborted
+
 # SongKong CLI flags used by this pipeline (see SongKong docs: -m, -d, -f, -p, -o):
 #   -m  fix songs in specified files (MusicBrainz / Fix Songs)
 #   -e  (Bandcamp / edit – profile-specific)
@@ -272,137 +413,167 @@ def clean_songkong_dirs() -> None:
 #   -p  profile (name of .properties file in Prefs, e.g. songkong_fixsongs4.properties)
 #   -o  override options (e.g. musicbrainzOrDiscogsId=url for -c match one album)
 #   -c  match one album (requires -o musicbrainzOrDiscogsId=...)
-def run_songkong_task(folder: str, props: str, name: str, flag: str) -> None:
+def run_songkong_task(folder: str, props: str, name: str, flag: str,
+                      songkong_dir: str = SONGKONG_CONFIG_DIR) -> None:
     start = datetime.now()
     cname = f"songkong_{name}_{os.path.basename(folder)}"
     container_folder = to_container_path(folder)
-
-    cmd = [
-        "docker", "run", "--rm", "--name", cname,
-        "-v", f"{HOST_ROOT}:{CONTAINER_ROOT}",
-        "-v", "/mnt/cache/appdata/songkong:/songkong",
-        SONGKONG_IMAGE,
-        flag, container_folder,
-        "-p", props,
-    ]
+    executor = _executor_for(songkong_dir)
+    args = [flag, container_folder, "-p", props]
 
     retry = 0
     db_err = "Database /songkong/Prefs/Database appears corrupt"
-    output: List[str] = []
+    # Counters accumulate over DB-corrupt retries, as the former full-output scan did
+    stats = SongKongStats()
     while retry < 3:
-        log_action(f"SongKong {name}: {' '.join(cmd)}")
-        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-        corrupt = False
-        for line in proc.stdout:
-            stripped = line.strip()
-            output.append(stripped)
-            if _container_log_callback:
-                try:
-                    _container_log_callback(stripped)
-                except Exception:
-                    pass
-            if db_err in line:
-                corrupt = True
-                proc.terminate()
-                log_action("DB corrupt → retry")
-                shutil.rmtree("/mnt/cache/appdata/songkong/Prefs/Database", ignore_errors=True)
-                retry += 1
-                break
+        _, corrupt = _stream_pass(executor, cname, args, f"SongKong {name}", stats, abort_on=db_err)
         if not corrupt:
             break
+        log_action("DB corrupt → retry")
+        shutil.rmtree(os.path.join(songkong_dir, "Prefs", "Database"), ignore_errors=True)
+        retry += 1
 
     duration = (datetime.now() - start).total_seconds()
-    past_processing_times.append(duration)
-
-    # Use "Songs loaded" or "Completed" as denominator; SongKong may output cumulative totals
-    # for some keys (e.g. Fingerprinted) so n can exceed total_loaded -> show % only when n <= total
-    total_loaded = next((int(m.group(1)) for l in output if (m := re.search(r"Songs loaded:(\d+)", l))), 0)
-    completed = next((int(m.group(1)) for l in output if (m := re.search(r"Completed[: ](\d+)", l))), total_loaded)
-    denominator = completed or total_loaded or 1
-    summary_lines = []
-    for key in ["Fingerprinted", "MusicBrainz", "Discogs", "Saved", "Completed", "Errors and Warnings"]:
-        n = sum(int(m.group(1)) for l in output if (m := re.search(fr"{key}[: ](\d+)", l)))
-        if n <= denominator and denominator > 0:
-            pct = (n / denominator) * 100
-            summary_lines.append(f"{key}: {n} ({pct:.2f}%)")
-        else:
-            summary_lines.append(f"{key}: {n}")
 
     notif = (
         f"SongKong {name.capitalize()} for `{folder}`: "
-        + "; ".join(summary_lines)
+        + "; ".join(stats.task_summary())
         + f"; Duration: {timedelta(seconds=int(duration))}"
     )
     log_action(notif)
 
-    rpt = find_report_path(name)
+    rpt = find_report_path(name, songkong_dir)
     if rpt:
         send_email_report(rpt, f"SongKong {name} report")
-    move_logs_to_backup(folder, datetime.now())
+    move_logs_to_backup(folder, datetime.now(), songkong_dir)
+
+def _running_songkong_containers(folder: str) -> List[str]:
+    """Names of running SongKong pass containers for this folder (songkong_<pass>_<basename>)."""
+    suffix = f"_{os.path.basename(folder)}"
+    try:
+        out = subprocess.run(
+            ["docker", "ps", "--filter", "name=songkong_", "--format", "{{.Names}}"],
+            capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return []
+    if out.returncode != 0:
+        return []
+    return [n for n in out.stdout.split() if n.endswith(suffix)]
+
+def _database_locks(songkong_dir: str) -> List[str]:
+    db_dir = os.path.join(songkong_dir, "Prefs", "Database")
+    try:
+        return [n for n in os.listdir(db_dir) if ".lock" in n or n.endswith(".lck")]
+    except OSError:
+        return []
+
+def _tree_signature(path: str) -> Tuple[int, int, int]:
+    """
+    (directory count, file count, newest directory mtime_ns) of a tree. Files being created,
+    renamed or removed change their directory's mtime, so only directories are stat-ed: a
+    per-file stat walk of a month folder on the NFS dump can outlast SONGKONG_QUIET_SECONDS.
+    """
+    dirs = files = newest = 0
+    stack = [path]
+    while stack:
+        top = stack.pop()
+        try:
+            newest = max(newest, os.stat(top).st_mtime_ns)
+            it = os.scandir(top)
+        except OSError:
+            continue
+        dirs += 1
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                except OSError:
+                    pass
+                files += 1
+    return dirs, files, newest
+
+def wait_for_songkong_ready(step: str, folder: str, songkong_dir: str = SONGKONG_CONFIG_DIR,
+                            timeout: float = SONGKONG_READY_TIMEOUT) -> float:
+    """
+    Block until the previous pass on folder has fully settled: no SongKong container for the
+    folder still running, no Database lock file, and the folder tree unchanged for
+    SONGKONG_QUIET_SECONDS. Gives up after timeout seconds. Returns (and logs) the time waited.
+    The tree is only walked once the container is gone and the locks released; from then on
+    the poll interval doubles while it stays unchanged.
+    """
+    start = time.monotonic()
+    last_sig = None
+    quiet_since = start
+    interval = SONGKONG_READY_POLL
+    reason = "timeout"
+    while True:
+        busy = _running_songkong_containers(folder)
+        locks = _database_locks(songkong_dir)
+        if busy or locks:
+            last_sig, interval = None, SONGKONG_READY_POLL
+        else:
+            sig = _tree_signature(folder)
+            now = time.monotonic()
+            if sig != last_sig:
+                last_sig, quiet_since, interval = sig, now, SONGKONG_READY_POLL
+            elif now - quiet_since >= SONGKONG_QUIET_SECONDS:
+                reason = "container exited, no Database locks, folder quiet"
+                break
+            else:
+                # next check no later than when the quiet time is over
+                interval = min(interval * 2, quiet_since + SONGKONG_QUIET_SECONDS - now)
+        elapsed = time.monotonic() - start
+        if elapsed >= timeout:
+            reason = f"timeout (containers={busy or '-'}, locks={locks or '-'})"
+            break
+        time.sleep(min(interval, timeout - elapsed))
+    waited = time.monotonic() - start
+    log_action(f"Ready for {step} on `{folder}` after {waited:.1f}s ({reason})")
+    return waited
 
 def extract_delete_duplicates_summary(out: str) -> str:
-    return "\n".join(re.findall(
-        r"(Processing:\d+|Songs loaded:\d+|Duplicate groups found[: ]\d+|Duplicate songs deleted:\d+|Errors and Warnings:\d+)",
-        out
-    ))
+    return SongKongStats().feed_all(out.splitlines()).key_summary(DELETE_SUMMARY_KEYS)
 
-def run_delete_duplicates(folder: str, props: str) -> str:
+def run_delete_duplicates(folder: str, props: str, songkong_dir: str = SONGKONG_CONFIG_DIR) -> str:
     # Ensure we work with a host path under HOST_ROOT
     if not folder.startswith(HOST_ROOT):
         raise ValueError(f"run_delete_duplicates() expects a host path under HOST_ROOT, got: {folder}")
     container_folder = to_container_path(folder)
 
-    cmd = [
-        "docker", "run", "--rm", "--name", f"songkong_delete_{os.path.basename(folder)}",
-        "-v", f"{HOST_ROOT}:{CONTAINER_ROOT}",
-        "-v", "/mnt/cache/appdata/songkong:/songkong",
-        SONGKONG_IMAGE, "-d", container_folder, "-p", props,
-    ]
-    time.sleep(60)
-    log_action("Delete dups: " + " ".join(cmd))
-    out, _ = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True).communicate()
-    if _container_log_callback and out:
-        for ln in out.splitlines():
-            try:
-                _container_log_callback(ln)
-            except Exception:
-                pass
-    return extract_delete_duplicates_summary(out)
+    wait_for_songkong_ready("delete_duplicates", folder, songkong_dir)
+    stats = SongKongStats()
+    _stream_pass(
+        _executor_for(songkong_dir), f"songkong_delete_{os.path.basename(folder)}",
+        ["-d", container_folder, "-p", props], "Delete dups", stats,
+    )
+    return stats.key_summary(DELETE_SUMMARY_KEYS)
 
 def extract_rename_summary(out: str) -> str:
-    return "\n".join(re.findall(
-        r"(Report Created:.*|Songs loaded:\d+|Songs renamed:\d+|Completed:\d+|Errors and Warnings:\d+)",
-        out
-    ))
+    return SongKongStats().feed_all(out.splitlines()).key_summary(RENAME_SUMMARY_KEYS, with_report=True)
 
 def run_rename_phase(
     folder: str,
     rename_props: str = "songkong_renamefiles.properties",
+    songkong_dir: str = SONGKONG_CONFIG_DIR,
 ) -> None:
     # Ensure we work with a host path under HOST_ROOT
     if not folder.startswith(HOST_ROOT):
         raise ValueError(f"run_rename_phase() expects a path under HOST_ROOT, got: {folder}")
     container_folder = to_container_path(folder)
 
-    cmd = [
-        "docker", "run", "--rm", "--name", f"songkong_rename_{os.path.basename(folder)}",
-        "-v", f"{HOST_ROOT}:{CONTAINER_ROOT}",
-        "-v", "/mnt/cache/appdata/songkong:/songkong",
-        SONGKONG_IMAGE, "-f", container_folder, "-p", rename_props,
-    ]
-    time.sleep(60)
-    log_action("Rename: " + " ".join(cmd))
-    out, _ = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True).communicate()
-    if _container_log_callback and out:
-        for ln in out.splitlines():
-            try:
-                _container_log_callback(ln)
-            except Exception:
-                pass
-    log_action(f"Rename for `{folder}`: {extract_rename_summary(out)}")
+    wait_for_songkong_ready("rename", folder, songkong_dir)
+    stats = SongKongStats()
+    _stream_pass(
+        _executor_for(songkong_dir), f"songkong_rename_{os.path.basename(folder)}",
+        ["-f", container_folder, "-p", rename_props], "Rename", stats,
+    )
+    log_action(f"Rename for `{folder}`: {stats.key_summary(RENAME_SUMMARY_KEYS, with_report=True)}")
 
-def find_report_path(task: str) -> str | None:
-    base = "/mnt/cache/appdata/songkong/Reports/"
+def find_report_path(task: str, songkong_dir: str = SONGKONG_CONFIG_DIR) -> str | None:
+    base = os.path.join(songkong_dir, "Reports", "")
     if not os.path.isdir(base):
         return None
     dirs = [os.path.join(base, d) for d in os.listdir(base) if task.lower() in d.lower()]
@@ -417,19 +588,68 @@ def find_report_path(task: str) -> str | None:
 # -----------------------------------------------------------------------------
 # 7) AUTOCLEAN EMPTY ALBUM DIRS
 # -----------------------------------------------------------------------------
-def autoclean_empty_dirs(root: str) -> int:
-    count = 0
-    exts = (".mp3", ".flac", ".wav", ".aac", ".m4a", ".ogg", ".wma", ".alac", ".aiff")
-    for dp, dirs, files in os.walk(root, topdown=False):
-        rel = os.path.relpath(dp, root)
-        parts = rel.split(os.sep) if rel != "." else []
-        if len(parts) < 3:
-            continue
-        if not any(f.lower().endswith(exts) for f in files):
-            shutil.rmtree(dp)
-            log_action(f"Removed empty: {dp}")
-            count += 1
-    return count
+def plan_autoclean(root: str, folders: Optional[List[str]] = None,
+                   index: Optional[DirIndex] = None) -> List[str]:
+    """
+    Album-level dirs (3+ levels below root) with no audio file anywhere under them (topmost ones
+    only, their subdirs go with them). With folders (those a run touched), only their subtrees
+    under root are examined.
+    """
+    index = index or DirIndex()
+    root = os.path.normpath(root)
+    plan: List[str] = []
+
+    def visit(dp: str, depth: int) -> None:
+        if depth >= 3 and not index.has_audio(dp):
+            plan.append(dp)
+            return
+        lst = index.listing(dp)
+        for e in lst.dirs if lst else []:
+            if not e.is_symlink():
+                visit(os.path.join(dp, e.name), depth + 1)
+
+    starts: List[str] = []
+    for f in sorted({os.path.normpath(f) for f in folders} if folders is not None else {root}):
+        if (f == root or f.startswith(root + os.sep)) and not any(f.startswith(s + os.sep) for s in starts):
+            starts.append(f)
+    for start in starts:
+        if index.is_dir(start):
+            visit(start, 0 if start == root else len(os.path.relpath(start, root).split(os.sep)))
+    return plan
+
+def remove_dirs(paths: List[str], index: Optional[DirIndex] = None,
+                workers: int = AUTOCLEAN_WORKERS) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """rmtree each path on a small thread pool; returns (removed, [(path, error)])."""
+    def _remove(path: str) -> Optional[str]:
+        try:
+            shutil.rmtree(path)
+            return None
+        except OSError as e:
+            return str(e)
+
+    if not paths:
+        return [], []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths))), thread_name_prefix="autoclean") as pool:
+        errors = list(pool.map(_remove, paths))
+    if index is not None:
+        for path in paths:
+            index.invalidate(path)
+    removed = [p for p, err in zip(paths, errors) if err is None]
+    return removed, [(p, err) for p, err in zip(paths, errors) if err is not None]
+
+def autoclean_empty_dirs(root: str, index: Optional[DirIndex] = None, folders: Optional[List[str]] = None,
+                         dry_run: bool = False) -> List[str]:
+    """Remove (or with dry_run only list) the plan_autoclean() dirs; logs one summary line."""
+    plan = plan_autoclean(root, folders, index)
+    if dry_run:
+        log_action(f"Clean empty dirs (dry run): {len(plan)} would be removed under {root}")
+        return plan
+    removed, failed = remove_dirs(plan, index)
+    msg = f"Clean empty dirs: {len(removed)} removed under {root}"
+    if failed:
+        msg += f", {len(failed)} failed ({'; '.join(f'{p}: {e}' for p, e in failed[:5])})"
+    log_action(msg)
+    return removed
 
 # -----------------------------------------------------------------------------
 # 8) PLEX REFRESH & EMPTY TRASH (use _plex_overrides from run_pipeline when set)
@@ -446,35 +666,59 @@ def _plex_library_section() -> str:
 def _plex_retry_interval() -> int:
     return int(_plex_overrides.get("plex_retry_interval") or PLEX_RETRY_INTERVAL)
 
+def _plex_concurrency() -> int:
+    return int(_plex_overrides.get("plex_concurrency") or PLEX_CONCURRENCY)
+
+# One pooled client per run (built from the run's Plex overrides), closed in run_pipeline's finally
+_plex: Optional[PlexClient] = None
+_plex_lock = threading.Lock()
+
+def plex_client() -> PlexClient:
+    global _plex
+    with _plex_lock:
+        if _plex is None:
+            _plex = PlexClient(
+                _plex_host(), _plex_token(), _plex_library_section(),
+                concurrency=_plex_concurrency(), retry_interval=_plex_retry_interval(), log=log_action,
+            )
+        return _plex
+
+def close_plex_client() -> Optional[dict]:
+    """Close the run's Plex client; returns its latency report (None if no request was made)."""
+    global _plex
+    with _plex_lock:
+        client, _plex = _plex, None
+    if client is None:
+        return None
+    client.close()
+    return client.report()
+
 def plex_refresh_folder(path: str) -> bool:
-    enc = quote(path, safe="/")
-    url = f"{_plex_host()}/library/sections/{_plex_library_section()}/refresh?path={enc}"
-    headers = {"X-Plex-Token": _plex_token()}
-    for attempt in range(1, 4):
-        try:
-            r = requests.get(url, headers=headers, timeout=30)
-            if r.status_code == 200:
-                log_action(f"✔ Plex accepted refresh for {path}")
-                return True
-            log_action(f"✘ Plex returned {r.status_code} on attempt {attempt} for {path}")
-        except Exception as e:
-            log_action(f"✘ Plex exception on attempt {attempt} for {path}: {e}")
-        time.sleep(_plex_retry_interval())
-    log_action(f"⚠️ Giving up Plex refresh for {path}")
-    return False
+    return plex_client().refresh(path)
+
+def plex_refresh_plan(plan: dict) -> List[str]:
+    """Send the roots of a plan_plex_scans() plan; returns the accepted roots."""
+    results = plex_client().refresh_plan(plan)
+    return [root for root, covered in plan.items() if covered and results.get(covered[0])]
 
 def is_scanning() -> bool:
-    r = requests.get(f"{_plex_host()}/library/sections/{_plex_library_section()}",
-                     headers={"X-Plex-Token": _plex_token()}, timeout=10)
-    tree = ET.fromstring(r.content)
-    return tree.attrib.get("refreshing") == "1"
+    return plex_client().is_refreshing()
+
+def _plex_scan_timeout() -> int:
+    value = _plex_overrides.get("plex_scan_timeout")
+    return int(PLEX_SCAN_TIMEOUT if value is None else value)
+
+def plex_activity_watcher() -> PlexActivityWatcher:
+    """Watcher of the run's library section (notifications, or polling through the pooled client)."""
+    return PlexActivityWatcher(_plex_host(), _plex_token(), _plex_library_section(),
+                               poll=is_scanning, log=log_action)
 
-def wait_for_scan_to_finish(poll_interval: int = 5) -> None:
+def wait_for_scan_to_finish(timeout: Optional[float] = None) -> bool:
+    """Wait until the library section is idle (adaptive polling); False on timeout."""
     log_action("→ Waiting for Plex to finish scanning")
-    while is_scanning():
-        log_action(f"… still scanning, sleeping {poll_interval}s")
-        time.sleep(poll_interval)
-    log_action("✔ Plex scanning complete")
+    done = plex_activity_watcher().wait(timeout=_plex_scan_timeout() if timeout is None else timeout)
+    log_action("✔ Plex scanning complete" if done else "⚠️ Plex still scanning, not waiting any longer")
+    return done
 
 def _plex_dump_path() -> str:
     return _plex_overrides.get("plex_dump_path") or PLEX_DUMP_PATH
@@ -482,26 +726,50 @@ def _plex_dump_path() -> str:
 def _plex_matched_path() -> str:
     return _plex_overrides.get("plex_matched_path") or PLEX_MATCHED_PATH
 
-def build_dump_path(folder_path: str) -> str:
+def build_dump_path(folder_path: str, plex_root: Optional[str] = None) -> str:
     rel = os.path.relpath(folder_path, DUMP_HOST_DIR).replace(os.sep, "/")
-    return f"{_plex_dump_path()}/{MONTH_YEAR}/{rel}"
+    return f"{plex_root or _plex_dump_path()}/{MONTH_YEAR}/{rel}"
 
-def build_matched_path(folder_path: str) -> str:
+def build_matched_path(folder_path: str, plex_root: Optional[str] = None) -> str:
     rel = os.path.relpath(folder_path, MATCHED_HOST_DIR).replace(os.sep, "/")
-    return f"{_plex_matched_path()}/{rel}"
+    return f"{plex_root or _plex_matched_path()}/{rel}"
+
+def plan_plex_scans(dump_bases: List[str], overrides: Optional[dict] = None,
+                    index: Optional[DirIndex] = None,
+                    journal: Optional[ChangeJournal] = None,
+                    matched: Optional[List[str]] = None,
+                    read_only: bool = False) -> Tuple[dict, List[str]]:
+    """
+    Refresh plan of the plex_scans step: ({Plex root path: [covered Plex album paths]}, host album
+    folders covered). Recent albums not yet processed are planned per library tree (each dump base
+    and MATCHED_HOST_DIR) with refresh_plan.plan_refresh_roots. overrides defaults to the current
+    run's Plex overrides (the preview API passes the saved settings). Recent albums come from the
+    change journal for trees it covers. matched, when given, are the matched albums to plan instead
+    of the library's recent ones (what one folder's rename moved in). read_only leaves the library
+    catalog untouched (previews), see recent_matched_albums.
+    """
+    o = _plex_overrides if overrides is None else overrides
+    index = index or DirIndex()
+    fan_out = int(o.get("plex_refresh_fan_out") or PLEX_REFRESH_FAN_OUT)
+    max_cost = float(o.get("plex_refresh_max_cost") or PLEX_REFRESH_MAX_COST)
+    dump_root = o.get("plex_dump_path") or PLEX_DUMP_PATH
+    matched_root = o.get("plex_matched_path") or PLEX_MATCHED_PATH
+    trees = [(b, recent_dump_albums(b, index, journal), lambda p: build_dump_path(p, dump_root))
+             for b in dump_bases]
+    if matched is None:
+        matched = recent_matched_albums(MATCHED_HOST_DIR, index, journal, read_only)
+    trees.append((MATCHED_HOST_DIR, matched, lambda p: build_matched_path(p, matched_root)))
+    plan: dict = {}
+    folders: List[str] = []
+    for base, albums, to_plex in trees:
+        changed = [f for f in albums if not was_processed(f)]
+        folders += changed
+        for root, covered in plan_refresh_roots(changed, base, fan_out, max_cost, index.width).items():
+            plan.setdefault(to_plex(root), []).extend(to_plex(c) for c in covered)
+    return plan, folders
 
 def plex_empty_trash() -> bool:
-    url = f"{_plex_host()}/library/sections/{_plex_library_section()}/emptyTrash"
-    headers = {"X-Plex-Token": _plex_token()}
-    try:
-        r = requests.put(url, headers=headers, timeout=30)
-        if r.status_code in (200, 204):
-            log_action("✔ Plex trash emptied")
-            return True
-        log_action(f"✘ Plex emptyTrash returned {r.status_code}: {r.text}")
-    except Exception as e:
-        log_action(f"✘ Exception during Plex emptyTrash: {e}")
-    return False
+    return plex_client().empty_trash()
 
 # -----------------------------------------------------------------------------
 # 10) FOLDERS TO PROCESS (scope) & PIPELINE ENTRY POINT
@@ -509,19 +777,27 @@ def plex_empty_trash() -> bool:
 def get_folders_to_process(
     scope: str,
     dump_host_dir: Optional[str] = None,
+    index: Optional[DirIndex] = None,
+    journal: Optional[ChangeJournal] = None,
 ) -> List[str]:
-    """Return list of folder paths to process according to scope (daily | monthly | all_days)."""
+    """
+    Return list of folder paths to process according to scope (daily | monthly | all_days).
+    When the change journal covers the dump base, daily folders are those it journaled changes in.
+    """
     base = dump_host_dir or DUMP_HOST_DIR
-    if not os.path.isdir(base):
+    index = index or DirIndex()
+    if not index.is_dir(base):
         return []
     today = datetime.now().day
     if scope == "monthly":
         return [base.rstrip(os.sep)]
-    # List subdirs that look like daily folders (DD-something)
-    subdirs = [
-        d for d in os.listdir(base)
-        if os.path.isdir(os.path.join(base, d)) and d.split("-", 1)[0].isdigit()
-    ]
+    if journal is not None and journal.covers(base):
+        names = {os.path.relpath(p, base).split(os.sep)[0] for p in journal.changed(base)} - {"."}
+        candidates = [n for n in names if index.is_dir(os.path.join(base, n))]
+    else:
+        candidates = [os.path.basename(p) for p in index.subdirs(base)]
+    # Subdirs that look like daily folders (DD-something)
+    subdirs = [d for d in candidates if d.split("-", 1)[0].isdigit()]
     if scope == "daily":
         subdirs = [d for d in subdirs if int(d.split("-", 1)[0]) < today]
     # all_days: keep all
@@ -559,6 +835,72 @@ def _normalize_dump_bases(config: dict) -> List[str]:
 # Step names that run per folder vs once at end
 STEPS_PER_FOLDER = ("musicbrainz", "bandcamp", "delete_duplicates", "rename")
 STEPS_GLOBAL = ("autoclean_empty", "plex_scans", "plex_trash")
+# Container name prefix per step (see run_songkong_task / run_delete_duplicates / run_rename_phase)
+_STEP_CONTAINER_PREFIX = {
+    "musicbrainz": "songkong_musicbrainz",
+    "bandcamp": "songkong_bandcamp",
+    "delete_duplicates": "songkong_delete",
+    "rename": "songkong_rename",
+}
+
+
+def process_folder(
+    folder: str,
+    steps: List[str],
+    profiles: dict,
+    report: Optional[Callable[[str, str], None]] = None,
+    songkong_dir: str = SONGKONG_CONFIG_DIR,
+) -> List[str]:
+    """
+    Run the selected SongKong passes on one folder, always in STEPS_PER_FOLDER order.
+    profiles maps step -> .properties file; report(step_id, container_name) is called at each pass start.
+    Each pass outcome is checkpointed at once (step_checkpoints, when the run planned it).
+    Returns the "step:folder" entries that completed; raises on the first failing pass.
+    """
+    done: List[str] = []
+    for step in STEPS_PER_FOLDER:
+        if step not in steps:
+            continue
+        if report:
+            report(step, f"{_STEP_CONTAINER_PREFIX[step]}_{os.path.basename(folder)}")
+        try:
+            clean_songkong_dirs(songkong_dir)
+            if step == "musicbrainz":
+                run_songkong_task(folder, profiles["musicbrainz"], "musicbrainz", "-m", songkong_dir)
+            elif step == "bandcamp":
+                run_songkong_task(folder, profiles["bandcamp"], "bandcamp", "-e", songkong_dir)
+            elif step == "delete_duplicates":
+                summ = run_delete_duplicates(folder, profiles["delete_duplicates"], songkong_dir)
+                log_action(f"Delete Duplicates for `{folder}`: {summ}")
+            elif step == "rename":
+                run_rename_phase(folder, rename_props=profiles["rename"], songkong_dir=songkong_dir)
+        except Exception:
+            _state_store().mark_step(folder, step, "error")
+            raise
+        _state_store().mark_step(folder, step, "done")
+        done.append(f"{step}:{folder}")
+    return done
+
+
+def _log_step_metrics(records: List[dict]) -> None:
+    """One log line with the wall time, CPU time, peak memory and I/O of each step of the run."""
+    per_step: dict = {}
+    for r in records:
+        agg = per_step.setdefault(r["step"], {"wall": 0.0, "cpu": 0.0, "mem": 0, "read": 0, "write": 0})
+        agg["wall"] += r["wall_seconds"] or 0.0
+        agg["cpu"] += r["cpu_seconds"] or 0.0
+        agg["mem"] = max(agg["mem"], r["mem_peak_bytes"] or 0)
+        agg["read"] += r["read_bytes"] or 0
+        agg["write"] += r["write_bytes"] or 0
+    if not per_step:
+        return
+    mb = 1024 * 1024
+    parts = []
+    for step, a in per_step.items():
+        mem = f", peak {a['mem'] / mb:.0f} MiB" if a["mem"] else ""
+        parts.append(f"{step} {a['wall']:.0f}s wall / {a['cpu']:.0f}s CPU{mem}, "
+                     f"{a['read'] / mb:.0f} MiB read / {a['write'] / mb:.0f} MiB written")
+    log_action("Step metrics: " + "; ".join(parts))
 
 
 def run_pipeline(
@@ -573,19 +915,32 @@ def run_pipeline(
     """
     Run the Autokong pipeline with selected steps and scope.
     config_overrides can provide dump_host_dir, host_root, etc. for paths.
-    progress_callback(current_index, total, step_id, step_label, container_name, folder) is called at each step start.
+    progress_callback(current_index, total, step_id, step_label, container_name, folder) is called at each step start;
+    with parallel workers (config_overrides["songkong_workers"] > 1) it also gets worker=<1..n>, and during
+    SongKong passes it is called again for the same step with stats={songs_loaded, fingerprinted, saved, ...}.
     container_log_callback(line) receives Docker container stdout lines.
-    Returns a summary dict with status, steps_run, duration, and optionally audit_report if enable_audit.
+    Progress calls also get eta=current_eta() (remaining time from the persisted step timings);
+    config_overrides["deadline"] (ISO local time) adds a warning when the run is predicted to end later.
+    config_overrides["resume"] runs only the (folder, step) pairs earlier runs left pending or failed
+    (step_checkpoints) instead of discovering folders; config_overrides["run_id"] tags the checkpoints.
+    Returns a summary dict with status, steps_run, duration, folders (processed this run), error_count,
+    and optionally audit_report if enable_audit.
     """
-    global _log_callback, _progress_callback, _container_log_callback
+    global _log_callback, _progress_callback, _container_log_callback, _run_estimate
     _log_callback = log_callback
     _progress_callback = progress_callback
     _container_log_callback = container_log_callback
     start_time = datetime.now()
-    summary = {"status": "ok", "steps_run": [], "duration_seconds": 0, "error": None, "audit_report": None}
+    summary = {"status": "ok", "steps_run": [], "duration_seconds": 0, "error": None, "audit_report": None,
+               "folders": [], "error_count": 0}
     config = config_overrides or {}
-    global _plex_overrides
+    resume = bool(config.get("resume"))
+    summary["resumed"] = resume
+    global _plex_overrides, _executor_mode
     _plex_overrides = {k: v for k, v in config.items() if k.startswith("plex_")}
+    _executor_mode = config.get("songkong_executor") or SONGKONG_EXECUTOR
+    audit_jobs = int(config.get("audit_jobs", AUDIT_JOBS))
+    audit_fingerprint = bool(config.get("audit_fingerprint", AUDIT_FINGERPRINT))
     dump_bases = _normalize_dump_bases(config)
     host_root = config.get("host_root") or HOST_ROOT
     autoclean_root = config.get("autoclean_root_dir") or AUTOCLEAN_ROOT_DIR
@@ -596,125 +951,379 @@ def run_pipeline(
     props_delete_duplicates = songkong_files.get("delete_duplicates") or "songkong_deleteduplicates.properties"
     props_rename = songkong_files.get("rename") or "songkong_renamefiles.properties"
 
+    # One scandir listing per directory for the whole run (folder discovery, audit, autoclean, Plex plan)
+    dir_index = DirIndex()
+    perf: Optional[PerfModel] = None
+    # Change journal kept by the web app's watcher: folder discovery and Plex plan read it instead of crawling
+    journal: Optional[ChangeJournal] = None
+    if (config.get("change_watcher") or "off") != "off":
+        sync_active_watcher()
+        journal = ChangeJournal()
+        for base in dump_bases + [MATCHED_HOST_DIR]:
+            covered = journal.covers(base)
+            log_action(f"Change journal: {base} {'covered' if covered else 'not covered by a live watcher, crawling'}")
     try:
         folders = None
-        if isinstance(config.get("folders"), list) and config["folders"]:
+        remaining: dict = {}
+        if resume:
+            # Steps not done yet, per folder ("" = global steps), from the checkpoint journal
+            remaining = {f: [r["step"] for r in rows if r["status"] != "done"]
+                         for f, rows in _state_store().outstanding_steps().items()}
+            folders = [f for f, todo in remaining.items() if f and todo]
+            steps = [s for s in STEPS_PER_FOLDER + STEPS_GLOBAL if any(s in todo for todo in remaining.values())]
+            if not steps:
+                log_action("Nothing to resume: no pending steps in the checkpoint journal")
+                summary["status"] = "no_folders"
+                return summary
+        elif isinstance(config.get("folders"), list) and config["folders"]:
             folders = config["folders"]
         else:
             # Agrège les dossiers à traiter depuis chacun des dossiers de départ
             folders = []
             for base in dump_bases:
-                folders.extend(get_folders_to_process(scope, base))
-        if not folders:
-            log_action(f"No folders to process for scope={scope} on {dump_host_dir}")
+                folders.extend(get_folders_to_process(scope, base, dir_index, journal))
+        if not folders and not resume:
+            log_action(f"No folders to process for scope={scope} on {', '.join(dump_bases)}")
             summary["status"] = "no_folders"
             return summary
 
-        log_action(f"=== Pipeline started: scope={scope}, {len(folders)} folder(s) ===")
+        if resume:
+            log_action(f"=== Pipeline resumed: {len(folders)} folder(s) with pending steps ===")
+        else:
+            log_action(f"=== Pipeline started: scope={scope}, {len(folders)} folder(s) ===")
         per_folder_steps = [s for s in STEPS_PER_FOLDER if s in steps]
         global_steps = [s for s in STEPS_GLOBAL if s in steps]
-        total_work = len(folders) * len(per_folder_steps) + len(global_steps)
 
-        def _report(current: int, step_id: str, container_name: Optional[str], folder_path: Optional[str]) -> None:
+        def _steps_for(folder: str) -> List[str]:
+            return [s for s in per_folder_steps if s in remaining[folder]] if resume else per_folder_steps
+
+        total_work = sum(len(_steps_for(f)) for f in folders) + len(global_steps)
+
+        progress_lock = threading.Lock()
+        work_index = 0
+
+        def _report(step_id: str, container_name: Optional[str], folder_path: Optional[str],
+                    worker: Optional[int] = None) -> None:
+            nonlocal work_index
+            with progress_lock:
+                current = work_index
+                work_index += 1
+            args = (current, total_work, step_id, STEP_LABELS.get(step_id, step_id),
+                    container_name or "", folder_path or "")
+            extra = {"worker": worker} if worker is not None else {}
+            # Remembered per thread so live SongKong stats can refresh this step (_report_live_stats)
+            _worker_ctx.progress = (args, extra)
+            eta = current_eta()
             if _progress_callback:
                 try:
-                    _progress_callback(
-                        current, total_work, step_id, STEP_LABELS.get(step_id, step_id),
-                        container_name or "", folder_path or "",
-                    )
+                    _progress_callback(*args, **extra, **({"eta": eta} if eta is not None else {}))
                 except Exception:
                     pass
 
-        work_index = 0
+        tag_cache = None
+        scan_watcher: Optional[PlexActivityWatcher] = None
         if enable_audit:
             try:
                 from pipeline_audit import snapshot_zone
-                snapshot_before = snapshot_zone(folders)
+                from tag_cache import TagCache
+                tag_cache = TagCache()
+                snapshot_before = snapshot_zone(
+                    folders, cache=tag_cache, jobs=audit_jobs, fingerprint=audit_fingerprint,
+                    index=dir_index,
+                )
                 summary["_snapshot_before"] = snapshot_before
             except Exception as e:
                 log_action(f"Audit snapshot before failed: {e}")
                 summary["_snapshot_before"] = None
 
-        for idx, folder in enumerate(folders, 1):
-            if was_processed(folder) and scope == "daily":
+        pending = []
+        for folder in folders:
+            if was_processed(folder) and scope == "daily" and not resume:
                 log_action(f"→ Skipping already processed: {folder}")
                 continue
+            pending.append(folder)
+        summary["folders"] = list(pending)
+        if resume:
+            for folder in pending:
+                log_action(f"→ Resuming {folder}: {', '.join(_steps_for(folder))}")
+        else:
+            # Step-level journal: a crash leaves the (folder, step) pairs still to run for a resume
+            step_plan = {f: per_folder_steps for f in pending} if per_folder_steps else {}
+            if global_steps:
+                step_plan[""] = global_steps
+            _state_store().plan_steps(config.get("run_id"), step_plan)
+
+        profiles = {
+            "musicbrainz": props_musicbrainz,
+            "bandcamp": props_bandcamp,
+            "delete_duplicates": props_delete_duplicates,
+            "rename": props_rename,
+        }
+        summary_lock = threading.Lock()
+        # folder -> (start, end, artist dirs) of its rename pass: matched albums of those artists
+        # changed in between are its output
+        rename_windows: dict = {}
+
+        workers = 1
+        if per_folder_steps and len(pending) > 1:
+            requested = int(config.get("songkong_workers") or 1)
+            workers = min(len(pending), max_songkong_workers(
+                requested,
+                int(config.get("songkong_worker_cpus") or SONGKONG_WORKER_CPUS),
+                int(config.get("songkong_worker_memory_mb") or SONGKONG_WORKER_MEMORY_MB),
+            ))
+            if workers < requested:
+                log_action(f"SongKong workers capped to {workers} (requested {requested}) by CPU/RAM limits")
+        slots: "queue.Queue[Tuple[Optional[int], str]]" = queue.Queue()
+        if workers > 1:
+            log_action(f"Processing {len(pending)} folder(s) with {workers} parallel SongKong workers")
+            for w in range(1, workers + 1):
+                slots.put((w, prepare_worker_songkong_dir(w)))
+        else:
+            slots.put((None, SONGKONG_CONFIG_DIR))
+
+        def _run_pass(folder: str, step: str, last: bool) -> None:
+            """One SongKong pass of folder on a free worker slot; raises so the folder's next passes are skipped."""
+            w, wdir = slots.get()
+            _worker_ctx.prefix = f"[w{w}] " if w is not None else ""
+            started = time.time()
+            if step == "rename":
+                # artists the pass may move albums to, and the artist listings to tell new ones apart
+                artist_keys = album_artist_keys(folder, dir_index)
+                for initial in dir_index.subdirs(MATCHED_HOST_DIR):
+                    dir_index.listing(initial)
             try:
-                if "musicbrainz" in steps:
-                    _report(work_index, "musicbrainz", f"songkong_musicbrainz_{os.path.basename(folder)}", folder)
-                    work_index += 1
-                    clean_songkong_dirs()
-                    run_songkong_task(folder, props_musicbrainz, "musicbrainz", "-m")
-                    summary["steps_run"].append(f"musicbrainz:{folder}")
-                if "bandcamp" in steps:
-                    _report(work_index, "bandcamp", f"songkong_bandcamp_{os.path.basename(folder)}", folder)
-                    work_index += 1
-                    clean_songkong_dirs()
-                    run_songkong_task(folder, props_bandcamp, "bandcamp", "-e")
-                    summary["steps_run"].append(f"bandcamp:{folder}")
-                if "delete_duplicates" in steps:
-                    _report(work_index, "delete_duplicates", f"songkong_delete_{os.path.basename(folder)}", folder)
-                    work_index += 1
-                    clean_songkong_dirs()
-                    summ = run_delete_duplicates(folder, props_delete_duplicates)
-                    log_action(f"Delete Duplicates for `{folder}`: {summ}")
-                    summary["steps_run"].append(f"delete_duplicates:{folder}")
-                if "rename" in steps:
-                    _report(work_index, "rename", f"songkong_rename_{os.path.basename(folder)}", folder)
-                    work_index += 1
-                    clean_songkong_dirs()
-                    run_rename_phase(folder, rename_props=props_rename)
-                    summary["steps_run"].append(f"rename:{folder}")
-                mark_processed(folder, "ok")
+                done = process_folder(
+                    folder, [step], profiles,
+                    lambda step_id, cname: _report(step_id, cname, folder, w),
+                    wdir,
+                )
+                with summary_lock:
+                    summary["steps_run"].extend(done)
+                if last:
+                    mark_processed(folder, "ok")
             except Exception as e:
                 log_action(f"Error processing {folder}: {e}")
                 mark_processed(folder, "error")
-                summary["status"] = "error"
-                summary["error"] = str(e)
-
-        if "autoclean_empty" in steps:
-            _report(work_index, "autoclean_empty", None, None)
-            work_index += 1
-            cnt = autoclean_empty_dirs(autoclean_root)
-            log_action(f"Clean empty dirs: {cnt} removed")
-            summary["steps_run"].append("autoclean_empty")
-        if "plex_scans" in steps:
-            _report(work_index, "plex_scans", None, None)
-            work_index += 1
-            triggered = []
-            for dump_folder in recent_dump_albums(dump_host_dir):
-                if was_processed(dump_folder):
-                    continue
-                dp = build_dump_path(dump_folder)
-                if plex_refresh_folder(dp):
-                    triggered.append(dp)
-                mark_processed(dump_folder, "ok")
-            for mat_folder in recent_matched_albums(MATCHED_HOST_DIR):
-                if was_processed(mat_folder):
-                    continue
-                mp = build_matched_path(mat_folder)
-                if plex_refresh_folder(mp):
-                    triggered.append(mp)
-                mark_processed(mat_folder, "ok")
-            summary["steps_run"].append("plex_scans")
-        if "plex_trash" in steps:
-            _report(work_index, "plex_trash", None, None)
-            work_index += 1
+                with summary_lock:
+                    summary["status"] = "error"
+                    summary["error"] = str(e)
+                    summary["error_count"] = summary.get("error_count", 0) + 1
+                raise
+            finally:
+                # SongKong rewrote the folder and rename moved albums into the matched library
+                dir_index.invalidate(folder)
+                if step == "rename":
+                    artists = invalidate_renamed_artists(MATCHED_HOST_DIR, dir_index, artist_keys)
+                    rename_windows[folder] = (started, time.time(), artists)
+                # Folder passes take hours: persist their state right away, not with the next batch
+                _state_store().flush()
+                _worker_ctx.prefix = ""
+                slots.put((w, wdir))
+
+        def _send_plex_plan(plan: dict, scan_folders: List[str]) -> List[str]:
+            """Send a refresh plan (callers hold the "matched" lock); plex_trash waits for these refreshes."""
+            nonlocal scan_watcher
+            # subscribe before sending so no activity is missed
+            if plan and "plex_trash" in steps and _plex_scan_timeout() > 0:
+                if scan_watcher is None:
+                    scan_watcher = plex_activity_watcher()
+                    scan_watcher.start()
+                scan_watcher.track(plan)
+            triggered = plex_refresh_plan(plan)
+            for folder in scan_folders:
+                mark_processed(folder, "ok")
+            return triggered
+
+        def _global_done(step: str) -> None:
+            with summary_lock:
+                summary["steps_run"].append(step)
+            _state_store().mark_step("", step)
+
+        def _autoclean_folder(folder: str) -> None:
+            _report("autoclean_empty", None, folder)
+            removed = autoclean_empty_dirs(autoclean_root, dir_index, [folder])
+            with summary_lock:
+                summary.setdefault("autoclean_removed", []).extend(removed)
+
+        def _plex_scans_folder(folder: str) -> None:
+            _report("plex_scans", None, folder)
+            if journal is not None:
+                sync_active_watcher()
+            # the folder's own dump albums, plus what its rename added to the matched library; the
+            # rest of the library's recent albums is left to the global plex_scans node
+            window = rename_windows.get(folder)
+            matched = []
+            if window:
+                since, until, artists = window
+                matched = matched_albums_between(MATCHED_HOST_DIR, since, until, dir_index, journal, artists)
+            plan, scan_folders = plan_plex_scans([folder], index=dir_index, journal=journal, matched=matched)
+            if plan:
+                triggered = _send_plex_plan(plan, scan_folders)
+                log_action(f"Plex scans for {os.path.basename(folder)}: {len(triggered)}/{len(plan)} "
+                           f"requests accepted ({len(scan_folders)} album(s))")
+
+        def _autoclean_all() -> None:
+            _report("autoclean_empty", None, None)
+            if not incremental:
+                # only the folders this run touched can have been emptied by it
+                summary["autoclean_removed"] = autoclean_empty_dirs(autoclean_root, dir_index, pending)
+            _global_done("autoclean_empty")
+
+        def _plex_scans_all() -> None:
+            _report("plex_scans", None, None)
+            if journal is not None:
+                sync_active_watcher()
+            # whatever the per-folder refreshes did not cover (other recent albums, skipped folders);
+            # renames only invalidated the artists they were seen to touch, list the library afresh once
+            dir_index.invalidate(MATCHED_HOST_DIR)
+            plan, scan_folders = plan_plex_scans(dump_bases, index=dir_index, journal=journal)
+            log_action(f"Plex refresh plan: {len(scan_folders)} album(s) in {len(plan)} request(s)")
+            triggered = _send_plex_plan(plan, scan_folders)
+            log_action(f"Plex scans: {len(triggered)}/{len(plan)} requests accepted")
+            _global_done("plex_scans")
+
+        def _plex_trash() -> None:
+            nonlocal scan_watcher
+            _report("plex_trash", None, None)
+            if scan_watcher is not None:
+                t0 = time.monotonic()
+                done = scan_watcher.wait(timeout=_plex_scan_timeout())
+                scan_watcher.close()
+                scan_watcher = None
+                log_action(f"Plex scans {'finished' if done else 'still running'} after "
+                           f"{time.monotonic() - t0:.0f}s wait, emptying trash")
             plex_empty_trash()
-            summary["steps_run"].append("plex_trash")
+            _global_done("plex_trash")
+
+        # Remaining-time estimate: each node's duration predicted from past timings of its step and
+        # profile and the size of its folder; finished nodes become new samples of the model
+        perf = PerfModel()
+        deadline = datetime.fromisoformat(config["deadline"]) if config.get("deadline") else None
+        estimate = RunEstimate(perf, workers, deadline)
+        sizes = {f: folder_totals(dir_index, f) for f in pending} if per_folder_steps else {}
+        late_warned = False
+        # Resources of each node (run_metrics.py): node key -> (step, folder, tracks) for the records
+        meter = NodeMeter()
+        node_info: dict = {}
+
+        def _on_node(node) -> None:
+            nonlocal late_warned
+            estimate.on_node(node)
+            late = estimate.late_seconds()
+            if late and not late_warned:
+                late_warned = True
+                log_action(f"⚠️ Run predicted to end {timedelta(seconds=int(late))} after its deadline "
+                           f"{deadline:%Y-%m-%d %H:%M} ({estimate.remaining_seconds() / 60:.0f} min left)")
+                summary["deadline_warning"] = True
+
+        def _add(key: str, fn: Callable[[], None], step: str, folder: str = "", variant: str = "",
+                 **kwargs) -> str:
+            """graph.add() plus the node's prediction (variant: model profile of non-SongKong nodes) and metrics."""
+            def measured() -> None:
+                with meter.measure(key):
+                    fn()
+
+            graph.add(key, measured, **kwargs)
+            tracks, size = sizes.get(folder, (0, 0)) if step in STEPS_PER_FOLDER else (0, 0)
+            node_info[key] = (step, folder, tracks)
+            estimate.add(key, step, profiles.get(step, variant), folder, tracks, size, kwargs.get("pool", "light"))
+            return key
+
+        # Step graph: each folder's passes chained; as soon as a folder's passes are over, its
+        # empty dirs are cleaned and its albums refreshed in Plex while other folders still run.
+        # Rename passes and Plex planning share the "matched" lock, so a refresh never sees an
+        # album half moved into the matched library.
+        graph = StepGraph({"songkong": workers, "light": 2}, listener=_on_node)
+        incremental = bool(per_folder_steps)
+        for folder in pending:
+            name = os.path.basename(folder.rstrip(os.sep)) or folder
+            chain = _steps_for(folder)
+            prev: List[str] = []
+            for i, step in enumerate(chain):
+                prev = [_add(
+                    f"{step}:{folder}",
+                    lambda f=folder, st=step, last=(i == len(chain) - 1): _run_pass(f, st, last),
+                    step, folder, deps=prev, pool="songkong",
+                    locks=["matched"] if step == "rename" else [],
+                    label=f"{STEP_LABELS.get(step, step)} {name}",
+                )]
+            if incremental and "autoclean_empty" in global_steps:
+                prev = [_add(f"autoclean_empty:{folder}", lambda f=folder: _autoclean_folder(f),
+                             "autoclean_empty", variant="per_folder", after=prev, pool="light",
+                             label=f"{STEP_LABELS['autoclean_empty']} {name}")]
+            if incremental and "plex_scans" in global_steps:
+                _add(f"plex_scans:{folder}", lambda f=folder: _plex_scans_folder(f),
+                     "plex_scans", variant="per_folder", after=prev, pool="light", locks=["matched"],
+                     label=f"{STEP_LABELS['plex_scans']} {name}")
+        if "autoclean_empty" in global_steps:
+            _add("autoclean_empty", _autoclean_all, "autoclean_empty", after=list(graph.nodes), pool="light",
+                 label=STEP_LABELS["autoclean_empty"])
+        if "plex_scans" in global_steps:
+            _add("plex_scans", _plex_scans_all, "plex_scans", after=list(graph.nodes), pool="light",
+                 locks=["matched"], label=STEP_LABELS["plex_scans"])
+        if "plex_trash" in global_steps:
+            # trash is only emptied once the scans were sent (the old sequential order's guarantee)
+            _add("plex_trash", _plex_trash, "plex_trash", deps=["plex_scans"] if "plex_scans" in graph else [],
+                 after=list(graph.nodes), pool="light", label=STEP_LABELS["plex_trash"])
+        total_work = len(graph)
+
+        predicted = estimate.predicted_seconds()
+        summary["estimate"] = {"predicted_seconds": round(predicted),
+                               "tracks": sum(t for t, _ in sizes.values()),
+                               "deadline": deadline.isoformat(timespec="minutes") if deadline else None}
+        finish = datetime.now() + timedelta(seconds=predicted)
+        log_action(f"Estimated duration: {timedelta(seconds=int(predicted))} for "
+                   f"{summary['estimate']['tracks']} track(s), finish ~{finish:%H:%M}"
+                   + (f" (deadline {deadline:%H:%M})" if deadline else ""))
+        _run_estimate = estimate
+        graph_started = datetime.now()
+        failed = graph.run()
+        _run_estimate = None
+        summary["metrics"] = {"steps": meter.records(graph.timings(), graph_started, node_info)}
+        _log_step_metrics(summary["metrics"]["steps"])
+        for key, err in failed.items():
+            # SongKong pass errors were recorded by _run_pass
+            if key.split(":", 1)[0] not in STEPS_PER_FOLDER:
+                log_action(f"Pipeline error in {key}: {err}")
+                summary["status"] = "error"
+                summary["error"] = str(err)
+                summary["error_count"] = summary.get("error_count", 0) + 1
+        skipped = [n.key for n in graph.nodes.values() if n.status == "skipped"]
+        if skipped:
+            log_action(f"Skipped after a failure: {', '.join(skipped)}")
+        if len(graph):
+            summary["critical_path"] = graph.critical_path()
+            log_action(f"Critical path: {format_critical_path(summary['critical_path'])}")
+        if scan_watcher is not None:
+            scan_watcher.close()
+            scan_watcher = None
 
         if enable_audit and summary.get("_snapshot_before") is not None:
             try:
                 from pipeline_audit import snapshot_zone, compare_snapshots
-                snapshot_after = snapshot_zone(folders)
+                snapshot_after = snapshot_zone(
+                    folders, cache=tag_cache, previous=summary["_snapshot_before"],
+                    jobs=audit_jobs, fingerprint=audit_fingerprint, index=dir_index,
+                )
                 summary["_snapshot_after"] = snapshot_after
                 summary["audit_report"] = compare_snapshots(summary["_snapshot_before"], snapshot_after)
+                rs = summary["audit_report"]["summary"]
+                log_action(
+                    f"Audit tag cache: before {rs['tag_cache_before']}, after {rs['tag_cache_after']}"
+                )
                 del summary["_snapshot_before"]
                 del summary["_snapshot_after"]
             except Exception as e:
                 log_action(f"Audit compare failed: {e}")
                 summary["audit_report"] = {"error": str(e)}
+            finally:
+                if tag_cache is not None:
+                    tag_cache.prune()
+                    tag_cache.close()
 
+        ix = dir_index.stats()
+        log_action(f"Directory index: {ix['directories']} dir(s), {ix['scandir_calls']} scandir call(s)")
         log_action("=== Process completed ===")
     except Exception as e:
         log_action(f"Pipeline error: {e}")
@@ -724,42 +1333,150 @@ def run_pipeline(
         _log_callback = None
         _progress_callback = None
         _container_log_callback = None
+        _run_estimate = None
+        if perf is not None:
+            perf.close()
+        plex_report = close_plex_client()
+        if plex_report:
+            summary["plex_requests"] = plex_report
+            log_action(f"Plex requests: {json.dumps(plex_report)}")
         _plex_overrides = {}
+        stop_executors()
+        _executor_mode = SONGKONG_EXECUTOR
+        _state_store().flush()
+        if journal is not None:
+            journal.close()
         summary["duration_seconds"] = (datetime.now() - start_time).total_seconds()
+        # the caller archives the job stream next: deliver every queued line first
+        _log_sink.flush()
     return summary
 
 
 # -----------------------------------------------------------------------------
 # 11) MAIN WORKFLOW (legacy entry point)
 # -----------------------------------------------------------------------------
-def recent_dump_albums(base: str):
+def recent_dump_albums(base: str, index: Optional[DirIndex] = None, journal: Optional[ChangeJournal] = None):
+    index = index or DirIndex()
     cutoff = time.time() - DAYS_THRESHOLD * 86400
-    for root, _, files in os.walk(base):
-        if any(f.lower().endswith((".mp3", ".flac", ".wav")) for f in files):
-            if os.stat(root).st_mtime >= cutoff:
+    if journal is not None and journal.covers(base, cutoff):
+        for root in journal.changed(base, cutoff):
+            if index.audio_files(root):
+                yield root
+        return
+    for root, _ in index.walk(base):
+        if index.audio_files(root):
+            mtime = index.mtime(root)
+            if mtime is not None and mtime >= cutoff:
                 yield root
 
-def recent_matched_albums(base: str):
-    cutoff = time.time() - DAYS_THRESHOLD * 86400
-    for first in os.listdir(base):
-        p1 = os.path.join(base, first)
-        if not os.path.isdir(p1):
+def _artist_key(name: str) -> str:
+    """Artist name reduced to lowercase letters and digits, to compare tags with folder names."""
+    return "".join(c for c in name.casefold() if c.isalnum())
+
+def album_artist_keys(folder: str, index: Optional[DirIndex] = None) -> set:
+    """_artist_key of the artist and album artist of folder's albums (one file read per directory)."""
+    index = index or DirIndex()
+    keys = set()
+    for dirpath, _lst in index.walk(folder):
+        files = index.audio_files(dirpath)
+        if files:
+            tags = read_file_tags(os.path.join(dirpath, files[0].name))
+            keys.update(_artist_key(tags[k]) for k in ("albumartist", "artist") if tags.get(k))
+    keys.discard("")
+    return keys
+
+def invalidate_renamed_artists(base: str, index: DirIndex, artist_keys: set) -> List[str]:
+    """
+    After a rename pass into base (initial/artist/album): list base and its initials again (no
+    stat of their entries) and invalidate the artist directories the pass may have written to,
+    i.e. new ones and those named after artist_keys. Returns them. The initials must have been
+    listed before the pass, or all their artists count as new. An existing artist the tags do
+    not name stays stale until base is invalidated (the global plex_scans step does).
+    """
+    new_initials = set(index.relist(base))
+    touched = []
+    for initial in index.subdirs(base):
+        new = set(index.subdirs(initial)) if initial in new_initials else set(index.relist(initial))
+        for artist in index.subdirs(initial):
+            if artist in new or _artist_key(os.path.basename(artist)) in artist_keys:
+                touched.append(artist)
+    for artist in touched:
+        index.invalidate(artist)
+    return touched
+
+def matched_albums_between(base: str, since: float, until: float, index: Optional[DirIndex] = None,
+                           journal: Optional[ChangeJournal] = None,
+                           artists: Optional[List[str]] = None) -> List[str]:
+    """
+    Albums (initial/artist/album) changed between since and until, e.g. during one rename pass
+    (renames hold the "matched" lock, so nothing else moved albums in meanwhile). From the change
+    journal when it covers base, else from directory mtimes: of the given artist directories, or
+    of the artists whose directory changed, as in LibraryCatalog.refresh. Nothing is written to
+    the catalog.
+    """
+    index = index or DirIndex()
+    # file system timestamps lag time.time() by up to a clock tick (more on network mounts)
+    since, until = since - 2, until + 2
+    if journal is not None and journal.covers(base, since):
+        albums = {os.path.join(base, *parts[:3]) for parts in
+                  (os.path.relpath(p, base).split(os.sep) for p in journal.changed(base, since))
+                  if len(parts) >= 3}
+        return sorted(a for a in albums if index.is_dir(a))
+    if artists is None:
+        artists = [a for initial in index.subdirs(base) for a in index.subdirs(initial)]
+    albums = []
+    for artist in artists:
+        mtime = index.mtime(artist)
+        if mtime is None or mtime < since:
             continue
-        for artist in os.listdir(p1):
-            p2 = os.path.join(p1, artist)
-            if not os.path.isdir(p2):
-                continue
-            for album in os.listdir(p2):
-                alb = os.path.join(p2, album)
-                if os.path.isdir(alb) and os.stat(alb).st_mtime >= cutoff:
-                    yield alb
+        for album in index.subdirs(artist):
+            mtime = index.mtime(album)
+            if mtime is not None and since <= mtime <= until:
+                albums.append(album)
+    return albums
+
+def recent_matched_albums(base: str, index: Optional[DirIndex] = None,
+                          journal: Optional[ChangeJournal] = None, read_only: bool = False) -> List[str]:
+    """
+    Albums (initial/artist/album) modified in the last DAYS_THRESHOLD days: from the change journal
+    when it covers base (the catalog is updated for those albums only), else from the library catalog.
+    read_only finds them with matched_albums_between instead, so the catalog is neither refreshed
+    nor updated and the next run still sees the same changes.
+    """
+    index = index or DirIndex()
+    cutoff = time.time() - DAYS_THRESHOLD * 86400
+    if read_only:
+        return matched_albums_between(base, cutoff, time.time(), index, journal)
+    catalog = LibraryCatalog()
+    try:
+        if journal is not None and journal.covers(base, cutoff):
+            albums = set()
+            for path in journal.changed(base, cutoff):
+                parts = os.path.relpath(path, base).split(os.sep)
+                if len(parts) >= 3:
+                    albums.add(os.path.join(base, *parts[:3]))
+            counts = catalog.update(base, albums, index)
+            log_action(f"Library catalog (change journal): {len(albums)} album(s) changed, "
+                       f"+{counts['added']} ~{counts['changed']} -{counts['removed']}")
+            return sorted(a for a in albums if index.is_dir(a))
+        s = catalog.refresh(base, index)
+        log_action(
+            f"Library catalog: {s['albums']} album(s), +{s['added']} ~{s['changed']} -{s['removed']}, "
+            f"{s['artists_scanned']} artist(s) scanned, {s['artists_skipped']} unchanged "
+            f"({'full' if s['full'] else 'incremental'}, {s['seconds']}s)"
+        )
+        return catalog.recent(base, cutoff)
+    finally:
+        catalog.close()
 
 def main() -> None:
-    if not os.path.isdir(DUMP_HOST_DIR) or not os.listdir(DUMP_HOST_DIR):
+    index = DirIndex()
+    listing = index.listing(DUMP_HOST_DIR)
+    if listing is None or not (listing.dirs or listing.files):
         msg = f"{DUMP_HOST_DIR} not found or empty – abort"
         log_action(msg)
         return
-    if not has_music(DUMP_HOST_DIR):
+    if not has_music(DUMP_HOST_DIR, index):
         msg = f"No audio under {DUMP_HOST_DIR} – abort"
         log_action(msg)
         return
@@ -768,12 +1485,10 @@ def main() -> None:
 
     # 1) SongKong per daily folder (only days < today)
     today = datetime.now().day
-    daily_dirs = sorted(
-        d for d in os.listdir(DUMP_HOST_DIR)
-        if os.path.isdir(os.path.join(DUMP_HOST_DIR, d))
-        and d.split("-", 1)[0].isdigit()
-        and int(d.split("-", 1)[0]) < today
-    )
+    daily_dirs = [
+        e.name for e in listing.dirs
+        if e.name.split("-", 1)[0].isdigit() and int(e.name.split("-", 1)[0]) < today
+    ]
     total_days = len(daily_dirs)
     for idx, daily in enumerate(daily_dirs, 1):
         day_path = os.path.join(DUMP_HOST_DIR, daily)
@@ -796,37 +1511,32 @@ def main() -> None:
         except Exception as e:
             log_action(f"Error SongKong day {daily}: {e}")
             mark_processed(day_path, "error")
+        index.invalidate(day_path)
+        index.invalidate(MATCHED_HOST_DIR)
+        _state_store().flush()
 
     # 2) Clean empty album dirs
-    cnt = autoclean_empty_dirs(AUTOCLEAN_ROOT_DIR)
-    log_action(f"Clean empty dirs: {cnt} removed")
-
-    # 3) Plex scans: trigger scans for dump and matched folders without waiting
-    triggered = []
-
-    # dump side
-    for dump_folder in recent_dump_albums(DUMP_HOST_DIR):
-        if was_processed(dump_folder):
-            continue
-        dp = build_dump_path(dump_folder)
-        log_action(f"→ Trigger Plex scan for dump path: {dp}")
-        send_discord(f"🔄 Triggering Plex scan dump → `{dp}`")
-        if plex_refresh_folder(dp):  # sends the refresh request for this path
-            triggered.append(dp)
-        mark_processed(dump_folder, "ok")
-
-    # matched side
-    for mat_folder in recent_matched_albums(MATCHED_HOST_DIR):
-        if was_processed(mat_folder):
-            continue
-        mp = build_matched_path(mat_folder)
-        log_action(f"→ Trigger Plex scan for matched path: {mp}")
-        send_discord(f"🔄 Triggering Plex scan matched → `{mp}`")
-        if plex_refresh_folder(mp):
-            triggered.append(mp)
-        mark_processed(mat_folder, "ok")
-
-    # 4) Empty Plex trash
+    autoclean_empty_dirs(AUTOCLEAN_ROOT_DIR, index, [os.path.join(DUMP_HOST_DIR, d) for d in daily_dirs])
+
+    # 3) Plex scans: trigger scans for dump and matched folders without waiting,
+    #    recent albums planned into as few refresh roots as worthwhile
+    plan, scan_folders = plan_plex_scans([DUMP_HOST_DIR], index=index)
+    for root, covered in plan.items():
+        log_action(f"→ Trigger Plex scan for path: {root} ({len(covered)} album(s))")
+        send_discord(f"🔄 Triggering Plex scan → `{root}`")
+
+    # refresh requests go out together over the pooled client
+    watcher = plex_activity_watcher()
+    watcher.start()
+    watcher.track(plan)
+    triggered = plex_refresh_plan(plan)
+    for folder in scan_folders:
+        mark_processed(folder, "ok")
+
+    # 4) Empty Plex trash once the scans are done (or PLEX_SCAN_TIMEOUT passed)
+    if plan and _plex_scan_timeout() > 0:
+        watcher.wait(timeout=_plex_scan_timeout())
+    watcher.close()
     if plex_empty_trash():
         log_action("Plex trash emptied successfully")
     else:
@@ -847,6 +1557,10 @@ def main() -> None:
     else:
         send_discord(f"⚠️ No recent albums (<{DAYS_THRESHOLD}d) scanned")
 
+    plex_report = close_plex_client()
+    if plex_report:
+        log_action(f"Plex requests: {json.dumps(plex_report)}")
+    _state_store().flush()
     log_action("=== Process completed ===")
 
 if __name__ == "__main__":
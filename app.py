@@ -10,10 +10,10 @@ import os
 import sqlite3
 import threading
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory, stream_with_context
 from flask_cors import CORS
 
 # Ensure we can import the pipeline from the same directory
@@ -22,7 +22,18 @@ _APP_DIR = Path(__file__).resolve().parent
 if str(_APP_DIR) not in sys.path:
     sys.path.insert(0, str(_APP_DIR))
 
+import run_archive
+import run_metrics
 from config_manager import config_to_pipeline_overrides, DEFAULT_CONFIG
+from job_events import (
+    EVENT_KINDS,
+    JobStream,
+    clear_spill_dir,
+    iter_events,
+    offsets_from_request,
+    read_window,
+    stored_stream,
+)
 from settings_db import (
     get_all_settings,
     set_setting,
@@ -35,6 +46,8 @@ from settings_db import (
 DATA_DIR = os.environ.get("AUTOKONG_DATA_DIR", str(_APP_DIR / "data"))
 os.makedirs(DATA_DIR, exist_ok=True)
 DB_PATH = os.path.join(DATA_DIR, "runs.db")
+# Spill files of running jobs' log lines (bounded in-memory ring buffers, see job_events.py)
+JOB_LOGS_DIR = os.path.join(DATA_DIR, "job_logs")
 SONGKONG_PROP_FILES = [
     "songkong_fixsongs4.properties",
     "songkong_bandcamp.properties",
@@ -53,14 +66,21 @@ def _songkong_prefs_dir() -> str:
 app = Flask(__name__, static_folder="frontend/build", static_url_path="")
 CORS(app)
 
-# In-memory job log (job_id -> list of log lines); completed job logs are in SQLite
-_job_logs: dict = {}
-_job_logs_lock = threading.Lock()
+# Running jobs (job_id -> JobStream: log lines, container stdout lines, progress
+# { current, total, step_id, step_label, container_name, folder }); completed jobs are in SQLite
+_job_streams: dict = {}
+_job_streams_lock = threading.Lock()
 _current_job_id: str | None = None
-# Progress for running job: { current, total, step_id, step_label, container_name, folder }
-_job_progress: dict = {}
-# Container stdout lines for running/completed job (so UI can show "terminal" log)
-_job_container_logs: dict = {}
+
+
+def _job_stream(job_id: str) -> JobStream | None:
+    with _job_streams_lock:
+        return _job_streams.get(job_id)
+
+
+def _open_job_stream(job_id: str) -> None:
+    with _job_streams_lock:
+        _job_streams[job_id] = JobStream(job_id, JOB_LOGS_DIR)
 
 
 def init_db():
@@ -79,26 +99,179 @@ def init_db():
             )
         """)
         conn.commit()
-        try:
-            conn.execute("ALTER TABLE runs ADD COLUMN container_log_text TEXT")
+        # Logs and audits of finished runs live in run_archive files referenced by these columns
+        # History columns precomputed at write time (see _history_columns)
+        for column in ("container_log_text TEXT", "log_ref TEXT", "log_lines INTEGER", "container_log_ref TEXT",
+                       "container_log_lines INTEGER", "audit_ref TEXT", "duration_seconds REAL",
+                       "folder_count INTEGER", "error_count INTEGER", "steps_count INTEGER"):
+            try:
+                conn.execute(f"ALTER TABLE runs ADD COLUMN {column}")
+                conn.commit()
+            except sqlite3.OperationalError:
+                pass
+        # Folders of each run, for the history folder filter
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS run_folders (
+                run_id TEXT NOT NULL,
+                folder TEXT NOT NULL,
+                PRIMARY KEY (run_id, folder)
+            ) WITHOUT ROWID
+        """)
+        # Per-step resources and Plex latencies of each run (see run_metrics.py)
+        run_metrics.init_tables(conn)
+        # Covering indexes: the history list is answered from the index alone
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_runs_history ON runs (
+                started_at DESC, id DESC, finished_at, status, scope,
+                duration_seconds, folder_count, error_count, steps_count
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_runs_status_history ON runs (
+                status, started_at DESC, id DESC, finished_at, scope,
+                duration_seconds, folder_count, error_count, steps_count
+            )
+        """)
+        conn.commit()
+    _migrate_run_blobs()
+    _backfill_history_columns()
+
+
+def _migrate_run_blobs() -> None:
+    """
+    One-time move of log_text / container_log_text / audit_report blobs (and the audit copy inside
+    summary_json) of existing rows into run_archive files, then VACUUM to give the space back.
+    """
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.row_factory = sqlite3.Row
+        ids = [r["id"] for r in conn.execute(
+            "SELECT id FROM runs WHERE log_text IS NOT NULL OR container_log_text IS NOT NULL"
+            " OR audit_report IS NOT NULL"
+        )]
+        for job_id in ids:
+            row = conn.execute(
+                "SELECT summary_json, log_text, container_log_text, audit_report FROM runs WHERE id = ?", (job_id,)
+            ).fetchone()
+            log_ref, log_lines = run_archive.write_lines(job_id, "log", (row["log_text"] or "").split("\n"))
+            container_ref, container_lines = None, 0
+            if row["container_log_text"]:
+                container_ref, container_lines = run_archive.write_lines(
+                    job_id, "container", row["container_log_text"].strip().split("\n")
+                )
+            audit_ref = None
+            if row["audit_report"]:
+                try:
+                    audit_ref = run_archive.write_json(job_id, "audit", json.loads(row["audit_report"]))
+                except ValueError as e:
+                    print(f"{datetime.now()} - Run {job_id}: dropping unreadable audit report "
+                          f"({len(row['audit_report'])} chars): {e}", flush=True)
+            summary_json = row["summary_json"]
+            if summary_json:
+                try:
+                    summary = json.loads(summary_json)
+                except ValueError as e:
+                    print(f"{datetime.now()} - Run {job_id}: summary left as is, not valid JSON: {e}", flush=True)
+                else:
+                    if isinstance(summary, dict) and summary.pop("audit_report", None) is not None:
+                        summary_json = json.dumps(summary)
+            conn.execute(
+                """UPDATE runs SET log_ref = ?, log_lines = ?, container_log_ref = ?, container_log_lines = ?,
+                   audit_ref = ?, summary_json = ?, log_text = NULL, container_log_text = NULL, audit_report = NULL
+                   WHERE id = ?""",
+                (log_ref, log_lines, container_ref, container_lines, audit_ref, summary_json, job_id),
+            )
+            conn.commit()
+    if ids:
+        _vacuum_runs_db()
+
+
+def _history_columns(summary: dict, status: str) -> tuple:
+    """(duration_seconds, folder_count, error_count, steps_count) of a run summary."""
+    folders = summary.get("folders")
+    error_count = int(summary.get("error_count") or 0)
+    if status == "error":
+        error_count = max(error_count, 1)
+    return (
+        summary.get("duration_seconds"),
+        len(folders) if isinstance(folders, list) else None,
+        error_count,
+        len(summary.get("steps_run") or []),
+    )
+
+
+def _backfill_history_columns() -> None:
+    """Fill the history columns of rows written before they existed (folder count stays unknown)."""
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute("SELECT id, status, summary_json FROM runs WHERE steps_count IS NULL").fetchall()
+        for r in rows:
+            try:
+                summary = json.loads(r["summary_json"]) if r["summary_json"] else {}
+            except ValueError:
+                summary = {}
+            if not isinstance(summary, dict):
+                summary = {}
+            conn.execute(
+                "UPDATE runs SET duration_seconds = ?, folder_count = ?, error_count = ?, steps_count = ? WHERE id = ?",
+                (*_history_columns(summary, r["status"]), r["id"]),
+            )
+        conn.commit()
+
+
+def _vacuum_runs_db() -> None:
+    with sqlite3.connect(DB_PATH, isolation_level=None) as conn:
+        conn.execute("VACUUM")
+
+
+def apply_log_retention() -> dict:
+    """
+    Retention job (daily, see init_scheduler): delete archived logs and audits of runs finished more
+    than log_retention_days ago (0 = keep forever; the runs rows stay), remove archive files no row
+    references, then VACUUM runs.db if anything changed.
+    """
+    days = int(get_all_settings().get("log_retention_days") or 0)
+    expired = 0
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.row_factory = sqlite3.Row
+        if days > 0:
+            cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat() + "Z"
+            rows = conn.execute(
+                """SELECT id, log_ref, container_log_ref, audit_ref FROM runs WHERE finished_at < ?
+                   AND (log_ref IS NOT NULL OR container_log_ref IS NOT NULL OR audit_ref IS NOT NULL)""",
+                (cutoff,),
+            ).fetchall()
+            for r in rows:
+                run_archive.remove([r["log_ref"], r["container_log_ref"], r["audit_ref"]])
+                conn.execute(
+                    """UPDATE runs SET log_ref = NULL, log_lines = 0, container_log_ref = NULL,
+                       container_log_lines = 0, audit_ref = NULL WHERE id = ?""",
+                    (r["id"],),
+                )
             conn.commit()
-        except sqlite3.OperationalError:
-            pass
+            expired = len(rows)
+        referenced = [
+            ref for r in conn.execute("SELECT log_ref, container_log_ref, audit_ref FROM runs")
+            for ref in r if ref
+        ]
+    orphans = run_archive.remove(run_archive.orphan_files(referenced))
+    if expired:
+        _vacuum_runs_db()
+    return {"expired_runs": expired, "orphan_files": orphans, "archive": run_archive.archive_size()}
 
 
 def run_pipeline_job(job_id: str, steps: list, scope: str, enable_audit: bool, config_overrides: dict):
     """Background thread: run the pipeline and store result in DB."""
-    log_lines = []
-    _job_progress[job_id] = {}
-    _job_container_logs[job_id] = []
+    stream = _job_stream(job_id)
+    if stream is None:
+        _open_job_stream(job_id)
+        stream = _job_stream(job_id)
 
     def log_cb(line: str):
-        log_lines.append(line)
-        with _job_logs_lock:
-            _job_logs[job_id] = list(log_lines)
+        stream.append("log", line)
 
-    def progress_cb(current: int, total: int, step_id: str, step_label: str, container_name: str, folder: str):
-        _job_progress[job_id] = {
+    def progress_cb(current: int, total: int, step_id: str, step_label: str, container_name: str, folder: str,
+                    worker: int | None = None, stats: dict | None = None, eta: dict | None = None):
+        progress = {
             "current": current,
             "total": max(1, total),
             "step_id": step_id,
@@ -106,9 +279,23 @@ def run_pipeline_job(job_id: str, steps: list, scope: str, enable_audit: bool, c
             "container_name": (container_name or "").strip() or None,
             "folder": (folder or "").strip() or None,
         }
+        if stats:
+            progress["stats"] = stats
+        if eta:
+            progress["eta"] = eta
+        # Parallel runs: keep the latest step of every worker, top level shows the most recent one
+        workers = dict(stream.progress.get("workers") or {})
+        if worker is not None:
+            workers[str(worker)] = {k: progress[k] for k in ("step_id", "step_label", "container_name", "folder")
+                                    if k in progress}
+            if stats:
+                workers[str(worker)]["stats"] = stats
+        if workers:
+            progress["workers"] = workers
+        stream.set_progress(progress)
 
     def container_log_cb(line: str):
-        _job_container_logs[job_id].append(line)
+        stream.append("container", line)
 
     try:
         import Autokong as pipeline
@@ -117,7 +304,7 @@ def run_pipeline_job(job_id: str, steps: list, scope: str, enable_audit: bool, c
             scope=scope,
             log_callback=log_cb,
             enable_audit=enable_audit,
-            config_overrides=config_overrides,
+            config_overrides={**config_overrides, "run_id": job_id},
             progress_callback=progress_cb,
             container_log_callback=container_log_cb,
         )
@@ -127,14 +314,25 @@ def run_pipeline_job(job_id: str, steps: list, scope: str, enable_audit: bool, c
         summary = {"status": "error", "error": str(e)}
         status = "error"
         audit_report = None
-        log_lines.append(f"{datetime.now()} - Pipeline error: {e}")
+        stream.append("log", f"{datetime.now()} - Pipeline error: {e}")
     finished_at = datetime.utcnow().isoformat() + "Z"
-    container_log_lines = _job_container_logs.get(job_id, [])
-    container_log_text = "\n".join(container_log_lines) if container_log_lines else None
+    # Logs and audit go to compressed archive files; the row only references them
+    log_ref, log_lines = run_archive.write_lines(job_id, "log", stream.iter_lines("log"))
+    container_ref, container_lines = None, 0
+    if stream.count("container"):
+        container_ref, container_lines = run_archive.write_lines(job_id, "container", stream.iter_lines("container"))
+    audit_ref = run_archive.write_json(job_id, "audit", audit_report) if audit_report is not None else None
+    # Folder list goes to run_folders, the history columns are computed once here
+    folders = summary.get("folders") or []
+    metrics = summary.get("metrics") or {}
+    history_columns = _history_columns(summary, status)
+    summary = {k: v for k, v in summary.items() if k not in ("audit_report", "folders", "metrics")}
     with sqlite3.connect(DB_PATH) as conn:
         conn.execute(
-            """INSERT OR REPLACE INTO runs (id, started_at, finished_at, status, scope, steps_run, summary_json, log_text, audit_report, container_log_text)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            """INSERT OR REPLACE INTO runs (id, started_at, finished_at, status, scope, steps_run, summary_json,
+               log_ref, log_lines, container_log_ref, container_log_lines, audit_ref,
+               duration_seconds, folder_count, error_count, steps_count)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
             (
                 job_id,
                 _runs_get(job_id) or datetime.utcnow().isoformat() + "Z",
@@ -143,16 +341,23 @@ def run_pipeline_job(job_id: str, steps: list, scope: str, enable_audit: bool, c
                 scope,
                 json.dumps(summary.get("steps_run", [])),
                 json.dumps(summary),
-                "\n".join(log_lines),
-                json.dumps(audit_report) if audit_report is not None else None,
-                container_log_text,
+                log_ref,
+                log_lines,
+                container_ref,
+                container_lines,
+                audit_ref,
+                *history_columns,
             ),
         )
+        conn.executemany(
+            "INSERT OR IGNORE INTO run_folders (run_id, folder) VALUES (?, ?)", [(job_id, f) for f in folders]
+        )
+        run_metrics.store_run(conn, job_id, metrics.get("steps") or [], summary.get("plex_requests"))
         conn.commit()
-    with _job_logs_lock:
-        _job_logs.pop(job_id, None)
-    _job_progress.pop(job_id, None)
-    _job_container_logs.pop(job_id, None)
+    # Row is stored: SSE readers still attached drain the stream then get "done"
+    stream.close(status)
+    with _job_streams_lock:
+        _job_streams.pop(job_id, None)
     global _current_job_id
     if _current_job_id == job_id:
         _current_job_id = None
@@ -184,7 +389,11 @@ def api_config_post():
     updates = {}
     for key in ("steps_enabled", "scope", "schedule", "audit_enabled", "paths", "songkong_files",
                 "songkong_prefs_dir", "plex_host", "plex_token", "plex_library_section",
-                "plex_dump_path", "plex_matched_path", "plex_retry_interval"):
+                "plex_dump_path", "plex_matched_path", "plex_retry_interval", "plex_concurrency",
+                "plex_refresh_fan_out", "plex_refresh_max_cost", "plex_scan_timeout",
+                "songkong_workers", "songkong_worker_cpus", "songkong_worker_memory_mb",
+                "songkong_executor", "audit_jobs", "audit_fingerprint", "log_retention_days",
+                "change_watcher"):
         if key not in data:
             continue
         value = data[key]
@@ -198,6 +407,8 @@ def api_config_post():
             set_settings(updates)
         except ValueError as e:
             return jsonify({"error": str(e)}), 400
+        if "change_watcher" in updates or "paths" in updates:
+            start_change_watcher()
     return jsonify(get_all_settings())
 
 
@@ -214,13 +425,18 @@ def api_run():
     scope = data.get("scope") or config.get("scope") or "daily"
     enable_audit = data.get("enable_audit") if "enable_audit" in data else config.get("audit_enabled", False)
     config_overrides = config_to_pipeline_overrides(config)
-    if isinstance(data.get("folders"), list):
+    if data.get("mode") == "resume":
+        # Continue from the step checkpoints of interrupted/failed runs; folders and steps come from there
+        import Autokong as pipeline
+        if not pipeline.outstanding_steps():
+            return jsonify({"error": "Nothing to resume"}), 409
+        config_overrides["resume"] = True
+    elif isinstance(data.get("folders"), list):
         config_overrides["folders"] = [f for f in data["folders"] if isinstance(f, str) and f.strip()]
     job_id = str(uuid.uuid4())
     started_at = datetime.utcnow().isoformat() + "Z"
     _runs_set(job_id, started_at)
-    with _job_logs_lock:
-        _job_logs[job_id] = []
+    _open_job_stream(job_id)
     global _current_job_id
     _current_job_id = job_id
     t = threading.Thread(
@@ -234,17 +450,23 @@ def api_run():
 
 @app.route("/api/job/current")
 def api_job_current():
-    """Return the currently running job id and progress, or job_id: null if none."""
+    """
+    Return the currently running job id, progress and eta (remaining time predicted from past step
+    timings and the track counts still to process), or job_id: null if none.
+    """
     global _current_job_id
     if _current_job_id is None:
         return jsonify({"job_id": None})
     job_id = _current_job_id
     started_at = _runs_get(job_id)
-    progress = _job_progress.get(job_id)
+    stream = _job_stream(job_id)
+    progress = stream.progress if stream is not None else None
+    import Autokong as pipeline
     return jsonify({
         "job_id": job_id,
         "started_at": started_at,
         "progress": progress,
+        "eta": pipeline.current_eta(),
     })
 
 
@@ -254,17 +476,18 @@ def api_job(job_id):
         conn.row_factory = sqlite3.Row
         row = conn.execute("SELECT * FROM runs WHERE id = ?", (job_id,)).fetchone()
     if row is None:
-        with _job_logs_lock:
-            if job_id in _job_logs:
-                payload = {
-                    "job_id": job_id,
-                    "status": "running",
-                    "started_at": _runs_get(job_id),
-                    "log_tail": _job_logs[job_id][-100:],
-                }
-                if job_id in _job_progress:
-                    payload["progress"] = _job_progress[job_id]
-                return jsonify(payload)
+        stream = _job_stream(job_id)
+        if stream is not None:
+            count = stream.count("log")
+            payload = {
+                "job_id": job_id,
+                "status": "running",
+                "started_at": _runs_get(job_id),
+                "log_tail": stream.read("log", max(0, count - 100)),
+            }
+            if stream.progress:
+                payload["progress"] = stream.progress
+            return jsonify(payload)
         return jsonify({"error": "Job not found"}), 404
     return jsonify({
         "job_id": row["id"],
@@ -277,67 +500,161 @@ def api_job(job_id):
     })
 
 
-@app.route("/api/job/<job_id>/log")
-def api_job_log(job_id):
-    with _job_logs_lock:
-        if job_id in _job_logs:
-            return jsonify({"job_id": job_id, "status": "running", "lines": _job_logs[job_id]})
+def _window_args() -> dict | None:
+    """?offset=&limit=&tail= of the log endpoints; None when absent (whole log)."""
+    if not any(k in request.args for k in ("offset", "limit", "tail")):
+        return None
+    window = {}
+    for key in ("offset", "limit", "tail"):
+        value = request.args.get(key, type=int)
+        if value is not None:
+            window[key] = max(0, value)
+    return window
+
+
+def _lines_payload(stream: JobStream, kind: str, window: dict | None) -> dict:
+    if window is None:
+        return {"lines": stream.read(kind)}
+    return read_window(stream, kind, window.get("offset", 0), window.get("limit"), window.get("tail"))
+
+
+def _finished_run_stream(job_id: str) -> JobStream | None:
+    """Closed stream replaying a finished run from its archive files (or legacy TEXT columns)."""
     with sqlite3.connect(DB_PATH) as conn:
         conn.row_factory = sqlite3.Row
-        row = conn.execute("SELECT log_text FROM runs WHERE id = ?", (job_id,)).fetchone()
+        row = conn.execute(
+            """SELECT status, log_ref, log_lines, container_log_ref, container_log_lines, log_text, container_log_text
+               FROM runs WHERE id = ?""",
+            (job_id,),
+        ).fetchone()
     if row is None:
+        return None
+    if row["log_text"] is not None or row["container_log_text"] is not None:
+        return stored_stream(row["log_text"], row["container_log_text"], row["status"])
+    return JobStream.replay({
+        "log": run_archive.ArchivedLines(row["log_ref"], row["log_lines"] or 0),
+        "container": run_archive.ArchivedLines(row["container_log_ref"], row["container_log_lines"] or 0),
+    }, row["status"])
+
+
+@app.route("/api/job/<job_id>/log")
+def api_job_log(job_id):
+    """Pipeline log lines. ?offset=&limit= (or ?tail=N) returns one page with next_offset and total."""
+    window = _window_args()
+    stream = _job_stream(job_id)
+    if stream is not None:
+        return jsonify({"job_id": job_id, "status": "running", **_lines_payload(stream, "log", window)})
+    stream = _finished_run_stream(job_id)
+    if stream is None:
         return jsonify({"error": "Job not found"}), 404
-    lines = (row["log_text"] or "").split("\n")
-    return jsonify({"job_id": job_id, "status": "done", "lines": lines})
+    return jsonify({"job_id": job_id, "status": "done", **_lines_payload(stream, "log", window)})
 
 
 @app.route("/api/job/<job_id>/container-log")
 def api_job_container_log(job_id):
-    """Return Docker container stdout lines (SongKong). Live during run, or persisted after run."""
-    if job_id in _job_container_logs:
-        return jsonify({"job_id": job_id, "lines": _job_container_logs[job_id]})
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.row_factory = sqlite3.Row
-        try:
-            row = conn.execute(
-                "SELECT container_log_text FROM runs WHERE id = ?", (job_id,)
-            ).fetchone()
-        except sqlite3.OperationalError:
-            row = None
-    if row is not None and row["container_log_text"]:
-        lines = (row["container_log_text"] or "").strip().split("\n")
-        return jsonify({"job_id": job_id, "lines": lines})
-    return jsonify({"job_id": job_id, "lines": []})
+    """
+    Return Docker container stdout lines (SongKong). Live during run, or persisted after run.
+    Same ?offset=&limit= / ?tail=N paging as /log.
+    """
+    window = _window_args()
+    stream = _job_stream(job_id) or _finished_run_stream(job_id)
+    if stream is None:
+        return jsonify({"job_id": job_id, "lines": []})
+    return jsonify({"job_id": job_id, **_lines_payload(stream, "container", window)})
+
+
+@app.route("/api/job/<job_id>/events")
+def api_job_events(job_id):
+    """
+    Server-Sent Events of a job: "log" and "container" ({offset, lines}), "progress", then "done"
+    ({status}). Resumes from Last-Event-ID on reconnect, or ?log_offset=&container_offset=.
+    ?kinds=progress (comma-separated subset of log,container,progress) limits what is sent.
+    Finished jobs are replayed from their archived logs.
+    """
+    stream = _job_stream(job_id) or _finished_run_stream(job_id)
+    if stream is None:
+        return jsonify({"error": "Job not found"}), 404
+    offsets = offsets_from_request(request.headers.get("Last-Event-ID"), request.args)
+    kinds = [k for k in (request.args.get("kinds") or ",".join(EVENT_KINDS)).split(",") if k in EVENT_KINDS]
+    return Response(
+        stream_with_context(iter_events(stream, offsets, kinds)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.route("/api/job/<job_id>/audit")
 def api_job_audit(job_id):
+    """Audit report, streamed from its compressed archive file."""
     with sqlite3.connect(DB_PATH) as conn:
         conn.row_factory = sqlite3.Row
-        row = conn.execute("SELECT audit_report FROM runs WHERE id = ?", (job_id,)).fetchone()
+        row = conn.execute("SELECT audit_ref, audit_report FROM runs WHERE id = ?", (job_id,)).fetchone()
+    if row is not None and run_archive.exists(row["audit_ref"]):
+        return Response(run_archive.iter_json_chunks(row["audit_ref"]), mimetype="application/json")
     if row is None or row["audit_report"] is None:
         return jsonify({"error": "Audit not found or not run"}), 404
     return jsonify(json.loads(row["audit_report"]))
 
 
+# Light projection returned by /api/history (all columns of the covering indexes)
+HISTORY_COLUMNS = ("id", "started_at", "finished_at", "status", "scope",
+                   "duration_seconds", "folder_count", "error_count", "steps_count")
+HISTORY_DEFAULT_LIMIT = 50
+HISTORY_MAX_LIMIT = 500
+
+
+def _date_bound(value: str, end: bool) -> str:
+    """A YYYY-MM-DD bound covers the whole day; full ISO timestamps are used as is."""
+    if len(value) == 10 and end:
+        return value + "T23:59:59.999999Z"
+    return value
+
+
 @app.route("/api/history")
 def api_history():
+    """
+    Finished runs, newest first, light projection only. Query parameters:
+    limit, cursor (next_cursor of the previous page), status, scope, from / to (ISO date or
+    timestamp on started_at), folder (substring of a processed folder path).
+    Returns {runs, next_cursor} (next_cursor is null on the last page).
+    """
+    args = request.args
+    limit = min(max(args.get("limit", HISTORY_DEFAULT_LIMIT, type=int), 1), HISTORY_MAX_LIMIT)
+    where, params = [], []
+    if args.get("status"):
+        where.append("status = ?")
+        params.append(args["status"])
+    if args.get("scope"):
+        where.append("scope = ?")
+        params.append(args["scope"])
+    if args.get("from"):
+        where.append("started_at >= ?")
+        params.append(_date_bound(args["from"], end=False))
+    if args.get("to"):
+        where.append("started_at <= ?")
+        params.append(_date_bound(args["to"], end=True))
+    if args.get("folder"):
+        where.append("EXISTS (SELECT 1 FROM run_folders f WHERE f.run_id = runs.id AND f.folder LIKE ? ESCAPE '\\')")
+        pattern = args["folder"].replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params.append(f"%{pattern}%")
+    cursor = args.get("cursor")
+    if cursor and "|" in cursor:
+        started_at, run_id = cursor.rsplit("|", 1)
+        where.append("(started_at < ? OR (started_at = ? AND id < ?))")
+        params += [started_at, started_at, run_id]
+    sql = f"SELECT {', '.join(HISTORY_COLUMNS)} FROM runs"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY started_at DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
     with sqlite3.connect(DB_PATH) as conn:
         conn.row_factory = sqlite3.Row
-        rows = conn.execute(
-            "SELECT id, started_at, finished_at, status, scope, summary_json FROM runs ORDER BY started_at DESC LIMIT 100"
-        ).fetchall()
-    return jsonify([
-        {
-            "id": r["id"],
-            "started_at": r["started_at"],
-            "finished_at": r["finished_at"],
-            "status": r["status"],
-            "scope": r["scope"],
-            "summary": json.loads(r["summary_json"]) if r["summary_json"] else None,
-        }
-        for r in rows
-    ])
+        rows = conn.execute(sql, params).fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = f"{rows[-1]['started_at']}|{rows[-1]['id']}"
+    return jsonify({"runs": [dict(r) for r in rows], "next_cursor": next_cursor})
 
 
 @app.route("/api/schedule", methods=["GET"])
@@ -359,6 +676,7 @@ def api_schedule_get():
         "preset": schedule.get("preset", "nightly"),
         "steps": schedule.get("steps"),
         "scope": schedule.get("scope"),
+        "deadline": schedule.get("deadline"),
         "next_run": next_run,
     })
 
@@ -374,6 +692,8 @@ def api_schedule_post():
         "preset": data.get("preset", prev.get("preset", "nightly")),
         "steps": data.get("steps") if "steps" in data else prev.get("steps"),
         "scope": data.get("scope") if "scope" in data else prev.get("scope"),
+        # "HH:MM": scheduled runs predicted to end later log a warning
+        "deadline": (data.get("deadline") or None) if "deadline" in data else prev.get("deadline"),
     }
     try:
         set_setting("schedule", schedule)
@@ -418,10 +738,14 @@ def _trigger_run():
     scope = schedule.get("scope") or config.get("scope") or "daily"
     enable_audit = config.get("audit_enabled", False)
     config_overrides = config_to_pipeline_overrides(config)
+    if schedule.get("deadline"):
+        from perf_model import next_deadline
+        deadline = next_deadline(schedule["deadline"])
+        if deadline is not None:
+            config_overrides["deadline"] = deadline.isoformat()
     job_id = str(uuid.uuid4())
     _runs_set(job_id, datetime.utcnow().isoformat() + "Z")
-    with _job_logs_lock:
-        _job_logs[job_id] = []
+    _open_job_stream(job_id)
     global _current_job_id
     _current_job_id = job_id
     threading.Thread(
@@ -659,12 +983,79 @@ def api_preview():
         dump_dirs = [os.path.join(host_root, "Music_dump", yesterday.strftime("%m-%Y"), "")]
     try:
         import Autokong as pipeline
+        from dir_index import DirIndex
+        index = DirIndex()
         folders = []
         for d in dump_dirs:
-            folders.extend(pipeline.get_folders_to_process(scope, d))
+            folders.extend(pipeline.get_folders_to_process(scope, d, index))
     except Exception as e:
         return jsonify({"scope": scope, "count": 0, "folders": [], "error": str(e)}), 200
-    return jsonify({"scope": scope, "count": len(folders), "folders": folders})
+    result = {"scope": scope, "count": len(folders), "folders": folders}
+    # ?plex_plan=1: Plex refreshes the plex_scans step would send now (walks the recent albums,
+    # read-only: the library catalog the next run compares against is left as is)
+    if request.args.get("plex_plan", "").lower() in ("1", "true"):
+        try:
+            from refresh_plan import describe_plan
+            plan, _ = pipeline.plan_plex_scans(dump_dirs, config_to_pipeline_overrides(config), index,
+                                               read_only=True)
+            result["plex_plan"] = describe_plan(plan)
+        except Exception as e:
+            result["plex_plan"] = {"error": str(e)}
+    # ?autoclean_plan=1: dirs the autoclean_empty step would remove after processing these folders (dry run)
+    if request.args.get("autoclean_plan", "").lower() in ("1", "true"):
+        try:
+            root = config_to_pipeline_overrides(config).get("autoclean_root_dir") or pipeline.AUTOCLEAN_ROOT_DIR
+            dirs = pipeline.plan_autoclean(root, folders, index)
+            result["autoclean_plan"] = {"root": root, "count": len(dirs), "directories": dirs}
+        except Exception as e:
+            result["autoclean_plan"] = {"error": str(e)}
+    return jsonify(result)
+
+
+@app.route("/api/checkpoints", methods=["GET"])
+def api_checkpoints():
+    """Folders left partially processed (done / pending / error per step) and pending global steps."""
+    import Autokong as pipeline
+    outstanding = pipeline.outstanding_steps()
+    folders = [{"folder": f, "steps": rows} for f, rows in outstanding.items() if f]
+    return jsonify({
+        "folders": folders,
+        "global_steps": outstanding.get("", []),
+        "pending": sum(1 for rows in outstanding.values() for r in rows if r["status"] != "done"),
+    })
+
+
+@app.route("/api/checkpoints", methods=["DELETE"])
+def api_checkpoints_delete():
+    """Forget the pending steps of ?folder= (default: all), so they are not resumed."""
+    import Autokong as pipeline
+    folder = request.args.get("folder")
+    return jsonify({"discarded": pipeline.discard_steps(folder)})
+
+
+@app.route("/api/library/changes")
+def api_library_changes():
+    """
+    Matched library albums added, changed or removed since ?since= (ISO date/time or epoch
+    seconds; default: the last catalog refresh), answered from the catalog without touching disk.
+    """
+    import Autokong as pipeline
+    from library_catalog import LibraryCatalog, parse_since
+    try:
+        since_ts = parse_since(request.args.get("since"))
+    except ValueError:
+        return jsonify({"error": "invalid since"}), 400
+    root = pipeline.MATCHED_HOST_DIR
+    catalog = LibraryCatalog()
+    try:
+        return jsonify({
+            "root": root,
+            "last_refresh": catalog.last_refresh(root),
+            "totals": catalog.stats(root),
+            "changes": catalog.changes(root, since_ts),
+        })
+    finally:
+        catalog.close()
 
 
 @app.route("/api/health")
@@ -690,6 +1081,26 @@ def api_health():
     return jsonify({"ok": all_ok, "checks": checks})
 
 
+@app.route("/api/metrics")
+def api_metrics():
+    """
+    Prometheus text exposition of the stored per-step metrics. ?format=json: per-run series of the
+    last ?runs= runs (default 30) for the performance chart; ?run=<id>: that run's nodes.
+    """
+    with sqlite3.connect(DB_PATH) as conn:
+        run_id = request.args.get("run")
+        if run_id:
+            return jsonify({"run_id": run_id, "steps": run_metrics.run_steps(conn, run_id)})
+        if request.args.get("format") == "json":
+            try:
+                runs = min(max(int(request.args.get("runs", 30)), 1), 500)
+            except ValueError:
+                return jsonify({"error": "runs must be an integer"}), 400
+            return jsonify(run_metrics.series(conn, runs))
+        text = run_metrics.prometheus_text(conn, running=_current_job_id is not None)
+    return Response(text, content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.route("/", defaults={"path": ""})
 @app.route("/<path:path>")
 def serve_spa(path):
@@ -700,11 +1111,36 @@ def serve_spa(path):
     return jsonify({"message": "Autokong API", "docs": "Use the React app or /api/config, /api/run, /api/history, etc."})
 
 
+def _change_watch_roots(config: dict) -> list:
+    """Dump dirs (or the whole Music_dump, whose month folders come and go) and the matched library."""
+    import Autokong as pipeline
+    paths = config.get("paths") or {}
+    roots = [d for d in [paths.get("dump_host_dir")] + list(paths.get("dump_host_dirs") or [])
+             if isinstance(d, str) and d.strip()]
+    if not roots:
+        roots = [os.path.join(paths.get("host_root") or pipeline.HOST_ROOT, "Music_dump")]
+    return roots + [pipeline.MATCHED_HOST_DIR]
+
+
+def start_change_watcher():
+    """(Re)start the background change journal watcher per the change_watcher setting."""
+    from change_journal import start_watcher
+    config = get_all_settings()
+    mode = config.get("change_watcher") or "off"
+    try:
+        start_watcher(_change_watch_roots(config) if mode != "off" else [], mode,
+                      log=lambda m: print(f"{datetime.now()} - {m}", flush=True))
+    except Exception as e:
+        print(f"{datetime.now()} - Change watcher not started: {e}", flush=True)
+
+
 def init_scheduler():
     from apscheduler.schedulers.background import BackgroundScheduler
     sched = BackgroundScheduler()
     _schedule_reload._scheduler = sched
     _schedule_reload()
+    from apscheduler.triggers.cron import CronTrigger
+    sched.add_job(apply_log_retention, CronTrigger(hour=4, minute=30), id="autokong_log_retention")
     sched.start()
     return sched
 
@@ -714,5 +1150,8 @@ migrate_from_config_json()
 init_db()
 
 if __name__ == "__main__":
+    # Not at import time: the audit's tag reader processes re-import this module while a job runs
+    clear_spill_dir(JOB_LOGS_DIR)
     init_scheduler()
+    start_change_watcher()
     app.run(host="0.0.0.0", port=5000, threaded=True)
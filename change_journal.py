@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Change journal of the dump and matched trees (data/change_journal.db): the directories that
+received, lost or rewrote files, kept by an optional background watcher so a run can read what
+changed instead of crawling the libraries.
+
+Backends (setting change_watcher):
+  inotify  kernel notifications (ctypes, Linux); one watch per directory, new directories are
+           watched as they appear
+  poll     periodic scandir of the tree comparing directory mtimes (network mounts, where
+           inotify does not see changes made by other hosts)
+  auto     inotify, or poll for network filesystems / when inotify is unavailable or out of watches
+  off      no watcher; runs crawl as before
+
+On start every directory modified in the last SEED_DAYS days is journaled (from its mtime), so
+the journal is complete from start - SEED_DAYS on. A watched root whose heartbeat is stale, or
+that lost events (inotify queue overflow), is not trusted: readers check covers() and fall back
+to crawling.
+
+Usage:
+  python3 change_journal.py watch /music/Music_dump /music/Music_matched [--mode poll]
+  python3 change_journal.py changes /music/Music_dump/01-2026 [--days 7]
+  python3 change_journal.py status
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+_APP_DIR = Path(__file__).resolve().parent
+DATA_DIR = os.environ.get("AUTOKONG_DATA_DIR", str(_APP_DIR / "data"))
+JOURNAL_DB_PATH = os.path.join(DATA_DIR, "change_journal.db")
+
+VALID_MODES = ("off", "auto", "inotify", "poll")
+# Filesystems where another host can write without inotify seeing it
+NETWORK_FILESYSTEMS = ("nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "fuse.sshfs", "fuse.rclone")
+# Directories modified this recently are journaled when a watcher starts
+SEED_DAYS = 45
+# Entries not touched for this long are dropped
+RETENTION_DAYS = 60
+# Poll backend: seconds between two passes over the tree
+POLL_INTERVAL_SECONDS = 300
+# Watchers refresh their heartbeat this often; a root is stale after 3 missed beats (or poll passes)
+HEARTBEAT_SECONDS = 60
+
+# inotify(7)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_DONT_FOLLOW = 0x02000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (_IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+               | _IN_DELETE_SELF | _IN_ONLYDIR | _IN_DONT_FOLLOW)
+_EVENT = struct.Struct("iIII")
+
+
+def _under(path: str, base: str) -> bool:
+    return path == base or path.startswith(base.rstrip(os.sep) + os.sep)
+
+
+def filesystem_type(path: str) -> Optional[str]:
+    """fstype of the mount holding path (from /proc/self/mounts), None if unknown."""
+    best, fstype = "", None
+    try:
+        with open("/proc/self/mounts", "r", encoding="utf-8") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount = fields[1].replace("\\040", " ")
+                if _under(path, mount) and len(mount) >= len(best):
+                    best, fstype = mount, fields[2]
+    except OSError:
+        return None
+    return fstype
+
+
+class ChangeJournal:
+    """Changed directories and watched-root coverage. Thread-safe."""
+
+    def __init__(self, db_path: str = JOURNAL_DB_PATH):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS changes (
+                path TEXT PRIMARY KEY,
+                changed_at REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS roots (
+                root TEXT PRIMARY KEY,
+                mode TEXT NOT NULL,
+                complete_since REAL NOT NULL,
+                alive_at REAL NOT NULL,
+                stale_after REAL NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def record(self, paths: Iterable[Tuple[str, float]]) -> None:
+        """Journal (directory, changed_at) pairs; a directory keeps its latest change time."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO changes(path, changed_at) VALUES(?, ?) ON CONFLICT(path) DO UPDATE SET "
+                "changed_at = MAX(changed_at, excluded.changed_at)",
+                ((os.path.normpath(p), at) for p, at in paths),
+            )
+            self._conn.commit()
+
+    def changed(self, base: str, since: float = 0.0) -> List[str]:
+        """Journaled directories under base (base included) changed at or after since, sorted."""
+        base = os.path.normpath(base)
+        prefix = base.rstrip(os.sep) + os.sep
+        # [prefix, prefix with its last "/" bumped) is exactly the paths below base: an index range
+        upper = prefix[:-1] + chr(ord(os.sep) + 1)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM changes WHERE ((path >= ? AND path < ?) OR path = ?) AND changed_at >= ?"
+                " ORDER BY path",
+                (prefix, upper, base, since),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    # -- coverage --------------------------------------------------------------------------
+
+    def set_watching(self, root: str, mode: str, complete_since: float, stale_after: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO roots(root, mode, complete_since, alive_at, stale_after)"
+                " VALUES(?, ?, ?, ?, ?)",
+                (os.path.normpath(root), mode, complete_since, now, stale_after),
+            )
+            self._conn.commit()
+
+    def mark_incomplete(self, root: str) -> None:
+        """Events were lost: the journal of root is only complete from now on."""
+        with self._lock:
+            self._conn.execute("UPDATE roots SET complete_since = ? WHERE root = ?",
+                               (time.time(), os.path.normpath(root)))
+            self._conn.commit()
+
+    def heartbeat(self, roots: Iterable[str]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany("UPDATE roots SET alive_at = ? WHERE root = ?",
+                                   ((now, os.path.normpath(r)) for r in roots))
+            self._conn.commit()
+
+    def unwatch(self, root: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM roots WHERE root = ?", (os.path.normpath(root),))
+            self._conn.commit()
+
+    def covers(self, base: str, since: Optional[float] = None) -> bool:
+        """
+        True if a live watcher journals base (or a parent of it) and its journal is complete since
+        `since` (epoch seconds; default: the last SEED_DAYS days, i.e. no events lost since start).
+        """
+        base = os.path.normpath(base)
+        now = time.time()
+        if since is None:
+            since = now - SEED_DAYS * 86400
+        with self._lock:
+            rows = self._conn.execute("SELECT root, complete_since, alive_at, stale_after FROM roots").fetchall()
+        for root, complete_since, alive_at, stale_after in rows:
+            if not _under(base, root) or now - alive_at > stale_after:
+                continue
+            if complete_since <= since:
+                return True
+        return False
+
+    def status(self) -> List[Dict[str, object]]:
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT root, mode, complete_since, alive_at, stale_after FROM roots ORDER BY root"
+            ).fetchall()
+            count = self._conn.execute("SELECT COUNT(*) FROM changes").fetchone()[0]
+        return [{"root": r[0], "mode": r[1], "complete_since": r[2], "alive_at": r[3],
+                 "live": now - r[3] <= r[4], "journaled": count} for r in rows]
+
+    def prune(self, max_age_days: float = RETENTION_DAYS) -> int:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM changes WHERE changed_at < ?", (time.time() - max_age_days * 86400,))
+            self._conn.commit()
+            return cur.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _walk_dirs(root: str) -> Iterable[Tuple[str, int]]:
+    """(directory, mtime_ns) of root and every directory under it; symlinks are not followed."""
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            mtime_ns = os.stat(path, follow_symlinks=False).st_mtime_ns
+            with os.scandir(path) as it:
+                subdirs = [e.path for e in it if e.is_dir(follow_symlinks=False)]
+        except OSError:
+            continue
+        yield path, mtime_ns
+        stack.extend(subdirs)
+
+
+class _Inotify:
+    """Minimal inotify binding (libc through ctypes)."""
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path: str) -> int:
+        wd = self._add(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._rm(self.fd, wd)
+
+    def read_events(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """(wd, mask, name) of the pending events, waiting at most timeout seconds."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buf = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return []
+        events, offset = [], 0
+        while offset + _EVENT.size <= len(buf):
+            wd, mask, _cookie, length = _EVENT.unpack_from(buf, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(buf[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class TreeWatcher:
+    """Background watcher of several roots feeding a ChangeJournal (one thread for all roots)."""
+
+    def __init__(
+        self,
+        roots: Iterable[str],
+        journal: ChangeJournal,
+        mode: str = "auto",
+        poll_interval: float = POLL_INTERVAL_SECONDS,
+        log: Callable[[str], None] = print,
+    ):
+        self.roots = sorted({os.path.normpath(r) for r in roots})
+        self.journal = journal
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.log = log
+        # root -> "inotify" | "poll", once its journal is complete
+        self.backends: Dict[str, str] = {}
+        self._stop = threading.Event()
+        self._sync = threading.Event()
+        self._cond = threading.Condition()
+        self._rounds = 0
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+        self._wds: Dict[int, str] = {}
+
+    # -- lifecycle -------------------------------------------------------------------------
+
+    def start(self) -> "TreeWatcher":
+        """Start watching in the background (the initial walk of the trees happens there too)."""
+        self._thread = threading.Thread(target=self._run, name="change-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def sync(self, timeout: float = 120) -> bool:
+        """Journal pending events now (poll roots get an immediate pass); False on timeout."""
+        if self._thread is None or not self._thread.is_alive():
+            return False
+        with self._cond:
+            target = self._rounds + 1
+            self._sync.set()
+            return self._cond.wait_for(
+                lambda: self._rounds >= target or self._thread is None or not self._thread.is_alive(), timeout
+            )
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._sync.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        for root in list(self.backends):
+            self.journal.unwatch(root)
+
+    def _run(self) -> None:
+        inotify_roots, poll_roots = [], []
+        for root in self.roots:
+            if not os.path.isdir(root):
+                self.log(f"ℹ️ Change watcher: {root} not found, not watched")
+            elif self.mode == "poll" or (self.mode == "auto" and filesystem_type(root) in NETWORK_FILESYSTEMS):
+                poll_roots.append(root)
+            else:
+                inotify_roots.append(root)
+        if inotify_roots:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError) as e:
+                self.log(f"ℹ️ inotify unavailable ({e}), polling instead")
+                poll_roots += inotify_roots
+                inotify_roots = []
+        for root in inotify_roots:
+            started = time.time()
+            try:
+                self._watch_tree(root, started - SEED_DAYS * 86400)
+            except OSError as e:
+                self._unwatch_tree(root)
+                self.log(f"ℹ️ Cannot watch {root} with inotify ({e}; see fs.inotify.max_user_watches), polling it")
+                poll_roots.append(root)
+                continue
+            self.backends[root] = "inotify"
+            self.journal.set_watching(root, "inotify", started - SEED_DAYS * 86400, 3 * HEARTBEAT_SECONDS)
+        seen: Dict[str, Dict[str, int]] = {}
+        for root in poll_roots:
+            started = time.time()
+            seen[root] = self._poll_pass(root, None, started - SEED_DAYS * 86400)
+            self.backends[root] = "poll"
+            self.journal.set_watching(root, "poll", started - SEED_DAYS * 86400,
+                                      2 * self.poll_interval + HEARTBEAT_SECONDS)
+        if self.backends:
+            self.log(f"Change watcher: {', '.join(f'{r} ({b})' for r, b in self.backends.items())}")
+        next_poll = time.monotonic() + self.poll_interval
+        beat = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                if self._wds:
+                    self._handle_events(self._inotify.read_events(1.0))
+                else:
+                    self._sync.wait(1.0)
+                syncing = self._sync.is_set()
+                if syncing and self._wds:
+                    # events queued while the previous read was handled
+                    self._handle_events(self._inotify.read_events(0))
+                if seen and (syncing or time.monotonic() >= next_poll):
+                    for root in seen:
+                        seen[root] = self._poll_pass(root, seen[root], 0.0)
+                    next_poll = time.monotonic() + self.poll_interval
+                if time.monotonic() - beat >= HEARTBEAT_SECONDS:
+                    self.journal.heartbeat(self.backends)
+                    beat = time.monotonic()
+                if syncing:
+                    self._sync.clear()
+                    with self._cond:
+                        self._rounds += 1
+                        self._cond.notify_all()
+        except OSError as e:
+            self.log(f"⚠️ Change watcher stopped: {e}")
+        finally:
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+            with self._cond:
+                self._cond.notify_all()
+
+    # -- inotify ---------------------------------------------------------------------------
+
+    def _watch_tree(self, top: str, seed_since: float, at: Optional[float] = None) -> None:
+        """Watch every directory under top; journal those modified since seed_since (at their mtime, or at)."""
+        seed = []
+        for path, mtime_ns in _walk_dirs(top):
+            self._wds[self._inotify.add_watch(path)] = path
+            if mtime_ns / 1e9 >= seed_since:
+                seed.append((path, at if at is not None else mtime_ns / 1e9))
+        if seed:
+            self.journal.record(seed)
+
+    def _unwatch_tree(self, top: str) -> None:
+        for wd, path in list(self._wds.items()):
+            if _under(path, top):
+                self._inotify.rm_watch(wd)
+                del self._wds[wd]
+
+    def _handle_events(self, events: List[Tuple[int, int, str]]) -> None:
+        now = time.time()
+        changed: Dict[str, float] = {}
+        overflow = False
+        for wd, mask, name in events:
+            if mask & _IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            parent = self._wds.get(wd)
+            if parent is None:
+                continue
+            if mask & _IN_IGNORED:
+                del self._wds[wd]
+                continue
+            if mask & _IN_DELETE_SELF:
+                continue
+            changed[parent] = now
+            if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                # files may have landed before the watch existed: journal the whole new subtree
+                path = os.path.join(parent, name)
+                try:
+                    self._watch_tree(path, 0.0, now)
+                except OSError as e:
+                    self.log(f"⚠️ Change watcher cannot watch {path} ({e}), next run crawls")
+                    self._mark_incomplete(path)
+        if changed:
+            self.journal.record(changed.items())
+        if overflow:
+            self.log("⚠️ Change watcher lost events (inotify queue overflow), next run crawls")
+            for root, backend in self.backends.items():
+                if backend == "inotify":
+                    self.journal.mark_incomplete(root)
+
+    def _mark_incomplete(self, path: str) -> None:
+        root = next((r for r in self.backends if _under(path, r)), None)
+        if root is not None:
+            self.journal.mark_incomplete(root)
+
+    # -- polling ---------------------------------------------------------------------------
+
+    def _poll_pass(self, root: str, previous: Optional[Dict[str, int]], seed_since: float) -> Dict[str, int]:
+        """One scan of root; journals new or modified directories and parents of removed ones."""
+        now = time.time()
+        current = dict(_walk_dirs(root))
+        if previous is None:
+            changed = [(p, m / 1e9) for p, m in current.items() if m / 1e9 >= seed_since]
+        else:
+            changed = [(p, now) for p, m in current.items() if previous.get(p) != m]
+            changed += [(os.path.dirname(p), now) for p in previous if p not in current and p != root]
+        if changed:
+            self.journal.record(changed)
+        return current
+
+
+# One watcher per process (started by the web app, used by runs to sync before reading)
+_active: Optional[TreeWatcher] = None
+_active_lock = threading.Lock()
+
+
+def start_watcher(roots: Iterable[str], mode: str, log: Callable[[str], None] = print) -> Optional[TreeWatcher]:
+    """(Re)start the process-wide watcher; mode "off" only stops it."""
+    global _active
+    with _active_lock:
+        if _active is not None:
+            _active.stop()
+            _active.journal.close()
+            _active = None
+        if mode == "off":
+            return None
+        journal = ChangeJournal()
+        journal.prune()
+        _active = TreeWatcher(roots, journal, mode, log=log).start()
+        return _active
+
+
+def sync_active_watcher(timeout: float = 120) -> bool:
+    """Let the running watcher journal everything pending; False without one (or on timeout)."""
+    with _active_lock:
+        watcher = _active
+    return watcher.sync(timeout) if watcher is not None else False
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Change journal of the music trees.")
+    parser.add_argument("--db", default=JOURNAL_DB_PATH)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_watch = sub.add_parser("watch", help="Run a watcher in the foreground")
+    p_watch.add_argument("roots", nargs="+")
+    p_watch.add_argument("--mode", choices=VALID_MODES[1:], default="auto")
+    p_watch.add_argument("--poll-interval", type=float, default=POLL_INTERVAL_SECONDS)
+    p_changes = sub.add_parser("changes", help="Journaled directories under a path")
+    p_changes.add_argument("base")
+    p_changes.add_argument("--days", type=float, help="Only changes of the last N days")
+    sub.add_parser("status", help="Watched roots and their coverage")
+    args = parser.parse_args()
+
+    journal = ChangeJournal(args.db)
+    if args.cmd == "watch":
+        watcher = TreeWatcher(args.roots, journal, args.mode, args.poll_interval).start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            watcher.stop()
+    elif args.cmd == "changes":
+        since = time.time() - args.days * 86400 if args.days else 0.0
+        if not journal.covers(args.base):
+            print(f"warning: no live watcher covers {args.base}", file=sys.stderr)
+        print("\n".join(journal.changed(args.base, since)))
+    else:
+        print(json.dumps(journal.status(), indent=2))
+    journal.close()
+
+
+if __name__ == "__main__":
+    main()
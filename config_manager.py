@@ -34,6 +34,7 @@ DEFAULT_CONFIG = {
         "preset": "nightly",
         "steps": None,
         "scope": None,
+        "deadline": None,
     },
     "audit_enabled": False,
     "paths": {},
@@ -73,7 +74,7 @@ def save_config(config: Dict[str, Any]) -> None:
 
 
 def config_to_pipeline_overrides(config: Dict[str, Any]) -> Dict[str, Any]:
-    """Convert config (paths, songkong, plex) to overrides for run_pipeline(config_overrides=)."""
+    """Convert config (paths, songkong, plex, workers) to overrides for run_pipeline(config_overrides=)."""
     paths = config.get("paths") or {}
     overrides = {}
     if paths.get("dump_host_dir"):
@@ -107,4 +108,22 @@ def config_to_pipeline_overrides(config: Dict[str, Any]) -> Dict[str, Any]:
             overrides["plex_retry_interval"] = int(str(config["plex_retry_interval"]).strip())
         except ValueError:
             pass
+    for key in ("songkong_workers", "songkong_worker_cpus", "songkong_worker_memory_mb", "audit_jobs",
+                "plex_concurrency", "plex_refresh_fan_out", "plex_scan_timeout"):
+        if config.get(key) is not None:
+            try:
+                overrides[key] = int(str(config[key]).strip())
+            except ValueError:
+                pass
+    if config.get("plex_refresh_max_cost") is not None:
+        try:
+            overrides["plex_refresh_max_cost"] = float(str(config["plex_refresh_max_cost"]).strip())
+        except ValueError:
+            pass
+    if config.get("songkong_executor"):
+        overrides["songkong_executor"] = str(config["songkong_executor"]).strip()
+    if config.get("change_watcher"):
+        overrides["change_watcher"] = str(config["change_watcher"]).strip()
+    if "audit_fingerprint" in config:
+        overrides["audit_fingerprint"] = bool(config["audit_fingerprint"])
     return overrides
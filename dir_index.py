@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Directory index shared by the steps of one pipeline run (folder discovery, autoclean, Plex
+album discovery, audit snapshots). Each directory is listed with os.scandir at most once;
+its entries are kept (os.DirEntry caches its own stat, taken only when a caller needs it), so
+walking the same tree again costs no system call. After a SongKong pass changed a folder, only
+that subtree is invalidated and listed again on next access.
+"""
+
+import os
+import threading
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from tag_scan import AUDIO_EXTENSIONS
+
+
+class Listing(NamedTuple):
+    """Entries of one directory, each sorted by name."""
+    dirs: List[os.DirEntry]
+    files: List[os.DirEntry]
+
+
+def _key(path: str) -> str:
+    return os.path.normpath(path)
+
+
+class DirIndex:
+    """Memoized scandir of directory trees (thread-safe)."""
+
+    def __init__(self) -> None:
+        self._listings: Dict[str, Optional[Listing]] = {}
+        self._has_audio: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+        self.scandir_calls = 0
+
+    def listing(self, path: str) -> Optional[Listing]:
+        """Entries of path; None if it is not a readable directory."""
+        key = _key(path)
+        with self._lock:
+            if key in self._listings:
+                return self._listings[key]
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+            dirs, files = [], []
+            for e in entries:
+                try:
+                    (dirs if e.is_dir() else files).append(e)
+                except OSError:
+                    files.append(e)
+            result: Optional[Listing] = Listing(dirs, files)
+        except OSError:
+            result = None
+        with self._lock:
+            self.scandir_calls += 1
+            self._listings[key] = result
+        return result
+
+    def is_dir(self, path: str) -> bool:
+        return self.listing(path) is not None
+
+    def subdirs(self, path: str) -> List[str]:
+        """Full paths of the subdirectories of path (joined to path as given), sorted by name."""
+        lst = self.listing(path)
+        return [os.path.join(path, e.name) for e in lst.dirs] if lst else []
+
+    def width(self, path: str) -> Optional[int]:
+        """Entries directly under path (refresh_plan.dir_width from the index); None if unreadable."""
+        lst = self.listing(path)
+        return len(lst.dirs) + len(lst.files) if lst else None
+
+    def audio_files(self, path: str) -> List[os.DirEntry]:
+        lst = self.listing(path)
+        return [e for e in lst.files if e.name.lower().endswith(AUDIO_EXTENSIONS)] if lst else []
+
+    def mtime(self, path: str) -> Optional[float]:
+        """Directory mtime, from the parent's entry when it is indexed."""
+        parent = self._listings.get(_key(os.path.dirname(_key(path))))
+        name = os.path.basename(_key(path))
+        try:
+            if parent:
+                for e in parent.dirs:
+                    if e.name == name:
+                        return e.stat().st_mtime
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def walk(self, root: str) -> Iterator[Tuple[str, Listing]]:
+        """(dirpath, listing) top-down, subdirectories by name; symlinked dirs are not followed."""
+        lst = self.listing(root)
+        if lst is None:
+            return
+        yield root, lst
+        for e in lst.dirs:
+            if not e.is_symlink():
+                yield from self.walk(os.path.join(root, e.name))
+
+    def has_audio(self, path: str) -> bool:
+        """True if an audio file exists anywhere under path (memoized per directory)."""
+        key = _key(path)
+        cached = self._has_audio.get(key)
+        if cached is not None:
+            return cached
+        lst = self.listing(path)
+        found = bool(lst) and (
+            any(e.name.lower().endswith(AUDIO_EXTENSIONS) for e in lst.files)
+            or any(self.has_audio(os.path.join(path, e.name)) for e in lst.dirs if not e.is_symlink())
+        )
+        self._has_audio[key] = found
+        return found
+
+    def iter_audio_files(self, root: str) -> Iterator[Tuple[str, str, int, int, int]]:
+        """Same records and order as tag_scan.iter_audio_files, from the index."""
+        for dirpath, _lst in self.walk(root):
+            for e in self.audio_files(dirpath):
+                try:
+                    st = e.stat()
+                    yield os.path.join(dirpath, e.name), e.name, st.st_size, st.st_mtime_ns, st.st_ino
+                except OSError:
+                    yield os.path.join(dirpath, e.name), e.name, 0, 0, 0
+
+    def invalidate(self, path: str) -> None:
+        """Forget path, everything under it and its ancestors' audio flags (listed again on next access)."""
+        key = _key(path)
+        prefix = key.rstrip(os.sep) + os.sep
+        with self._lock:
+            for k in [k for k in self._listings if k == key or k.startswith(prefix)]:
+                del self._listings[k]
+            for k in [k for k in self._has_audio if k == key or k.startswith(prefix) or prefix.startswith(k + os.sep)]:
+                del self._has_audio[k]
+            # the parent's entry for path holds a stale stat (mtime)
+            self._listings.pop(_key(os.path.dirname(key)), None)
+
+    def relist(self, path: str) -> List[str]:
+        """
+        List path again, keeping what is indexed below it; returns the full paths of its
+        subdirectories missing from the previous listing (all of them if it was not indexed).
+        """
+        key = _key(path)
+        with self._lock:
+            old = self._listings.pop(key, None)
+            for k in [k for k in self._has_audio if k == key or key.startswith(k.rstrip(os.sep) + os.sep)]:
+                del self._has_audio[k]
+        known = {e.name for e in old.dirs} if old else set()
+        return [d for d in self.subdirs(path) if os.path.basename(d) not in known]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"directories": len(self._listings), "scandir_calls": self.scandir_calls}
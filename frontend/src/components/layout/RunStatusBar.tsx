@@ -4,10 +4,13 @@ import { Progress } from '@/components/ui/progress';
 import * as api from '@/lib/api';
 import { cn } from '@/lib/utils';
 
+const IDLE_POLL_MS = 5000;
+
 export function RunStatusBar() {
   const [current, setCurrent] = useState<{
     job_id: string | null;
     started_at?: string;
+    eta?: api.RunEta | null;
     progress?: {
       current: number;
       total: number;
@@ -15,20 +18,53 @@ export function RunStatusBar() {
       step_label: string;
       container_name: string | null;
       folder: string | null;
+      eta?: api.RunEta;
     };
   } | null>(null);
   const [loading, setLoading] = useState(true);
-  const intervalRef = useRef<ReturnType<typeof setInterval> | null>(null);
+  const timerRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+  const sourceRef = useRef<EventSource | null>(null);
 
   useEffect(() => {
+    let stopped = false;
+    // Idle: look for a new run every few seconds. Running: progress is pushed by the job's event stream.
     const fetchCurrent = () => {
-      api.getJobCurrent().then(setCurrent).catch(() => setCurrent({ job_id: null })).finally(() => setLoading(false));
+      api.getJobCurrent()
+        .then((c) => {
+          if (stopped) return;
+          setCurrent(c);
+          if (c.job_id) follow(c.job_id);
+          else timerRef.current = setTimeout(fetchCurrent, IDLE_POLL_MS);
+        })
+        .catch(() => {
+          if (stopped) return;
+          setCurrent({ job_id: null });
+          timerRef.current = setTimeout(fetchCurrent, IDLE_POLL_MS);
+        })
+        .finally(() => setLoading(false));
+    };
+    const follow = (jobId: string) => {
+      const source = new EventSource(api.jobEventsUrl(jobId, ['progress']));
+      sourceRef.current = source;
+      source.addEventListener('progress', (e) => {
+        const progress = JSON.parse((e as MessageEvent).data);
+        setCurrent((prev) => (prev ? { ...prev, progress } : prev));
+      });
+      const stop = () => {
+        source.close();
+        sourceRef.current = null;
+        if (!stopped) fetchCurrent();
+      };
+      source.addEventListener('done', stop);
+      source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) stop();
+      };
     };
     fetchCurrent();
-    intervalRef.current = setInterval(fetchCurrent, 2000);
     return () => {
-      if (intervalRef.current) clearInterval(intervalRef.current);
-      intervalRef.current = null;
+      stopped = true;
+      if (timerRef.current) clearTimeout(timerRef.current);
+      sourceRef.current?.close();
     };
   }, []);
 
@@ -54,6 +90,7 @@ export function RunStatusBar() {
   const total = progress?.total ?? 1;
   const stepIndex = (progress?.current ?? 0) + 1;
   const pct = total ? (stepIndex / total) * 100 : 0;
+  const eta = progress?.eta ?? current?.eta ?? null;
 
   return (
     <div
@@ -73,6 +110,14 @@ export function RunStatusBar() {
           <Progress value={pct} className="h-2" />
         </div>
         <span className="shrink-0 text-muted-foreground">{progress?.step_label ?? '…'}</span>
+        {eta && (
+          <span
+            className={cn('shrink-0', eta.late_seconds ? 'text-destructive' : 'text-muted-foreground')}
+            title={`Finish ~${new Date(eta.finish_at).toLocaleTimeString()}${eta.deadline ? `, deadline ${new Date(eta.deadline).toLocaleTimeString()}` : ''}`}
+          >
+            ~{api.formatEta(eta)} left
+          </span>
+        )}
         {progress?.container_name && (
           <span className="inline-flex items-center gap-1 rounded bg-muted px-2 py-0.5 font-mono text-xs">
             <Container className="h-3 w-3" />
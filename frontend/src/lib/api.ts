@@ -1,3 +1,5 @@
+import type { HistoryEntry } from '@/types/autokong';
+
 const API = '/api';
 
 export async function getConfig() {
@@ -21,6 +23,8 @@ export async function startRun(body: {
   scope?: string;
   enable_audit?: boolean;
   folders?: string[];
+  // 'resume': run only the steps interrupted or failed runs left (see getCheckpoints)
+  mode?: 'resume';
 } = {}) {
   const r = await fetch(`${API}/run`, {
     method: 'POST',
@@ -31,12 +35,31 @@ export async function startRun(body: {
   return r.json() as Promise<{ job_id: string; started_at: string }>;
 }
 
+// Remaining time of the running job, predicted from past step timings (perf_model.py)
+export type RunEta = {
+  elapsed_seconds: number;
+  remaining_seconds: number;
+  finish_at: string;
+  remaining_tracks: number;
+  min_samples: number;
+  deadline?: string;
+  late_seconds?: number;
+};
+
+export function formatEta(eta: RunEta) {
+  const s = Math.max(0, eta.remaining_seconds);
+  const h = Math.floor(s / 3600);
+  const m = Math.round((s % 3600) / 60);
+  return h ? `${h}h ${m}m` : `${m}m`;
+}
+
 export async function getJobCurrent() {
   const r = await fetch(`${API}/job/current`);
   if (!r.ok) throw new Error(r.statusText);
   return r.json() as Promise<{
     job_id: string | null;
     started_at?: string;
+    eta?: RunEta | null;
     progress?: {
       current: number;
       total: number;
@@ -44,6 +67,9 @@ export async function getJobCurrent() {
       step_label: string;
       container_name: string | null;
       folder: string | null;
+      stats?: { songs_loaded: number; fingerprinted: number; saved: number; completed: number; errors: number; lines: number };
+      workers?: Record<string, { step_id: string; step_label: string; container_name: string | null; folder: string | null }>;
+      eta?: RunEta;
     };
   }>;
 }
@@ -54,16 +80,40 @@ export async function getJob(jobId: string) {
   return r.json();
 }
 
-export async function getJobLog(jobId: string) {
-  const r = await fetch(`${API}/job/${jobId}/log`);
+// Optional paging of the log endpoints: { offset, limit } or { tail }; the response then also
+// carries offset, next_offset and total (poll again from next_offset for new lines only).
+export type LogWindow = { offset?: number; limit?: number; tail?: number };
+type LogPage = { lines: string[]; offset?: number; next_offset?: number; total?: number };
+
+function logWindowQuery(window?: LogWindow) {
+  if (!window) return '';
+  const params = new URLSearchParams();
+  for (const [key, value] of Object.entries(window)) {
+    if (value != null) params.set(key, String(value));
+  }
+  const query = params.toString();
+  return query ? `?${query}` : '';
+}
+
+export async function getJobLog(jobId: string, window?: LogWindow) {
+  const r = await fetch(`${API}/job/${jobId}/log${logWindowQuery(window)}`);
   if (!r.ok) throw new Error(r.statusText);
-  return r.json() as Promise<{ job_id: string; status: string; lines: string[] }>;
+  return r.json() as Promise<{ job_id: string; status: string } & LogPage>;
 }
 
-export async function getJobContainerLog(jobId: string) {
-  const r = await fetch(`${API}/job/${jobId}/container-log`);
+export async function getJobContainerLog(jobId: string, window?: LogWindow) {
+  const r = await fetch(`${API}/job/${jobId}/container-log${logWindowQuery(window)}`);
   if (!r.ok) throw new Error(r.statusText);
-  return r.json() as Promise<{ job_id: string; lines: string[] }>;
+  return r.json() as Promise<{ job_id: string } & LogPage>;
+}
+
+// Server-Sent Events of a job: "log" / "container" ({ offset, lines }), "progress", then "done" ({ status }).
+// EventSource resumes with Last-Event-ID on reconnect.
+export type JobEventKind = 'log' | 'container' | 'progress';
+
+export function jobEventsUrl(jobId: string, kinds?: JobEventKind[]) {
+  const query = kinds?.length ? `?kinds=${kinds.join(',')}` : '';
+  return `${API}/job/${jobId}/events${query}`;
 }
 
 export async function getJobAudit(jobId: string) {
@@ -72,10 +122,26 @@ export async function getJobAudit(jobId: string) {
   return r.json();
 }
 
-export async function getHistory() {
-  const r = await fetch(`${API}/history`);
+// Cursor-paginated run history: pass next_cursor of the previous page as cursor.
+export type HistoryQuery = {
+  limit?: number;
+  cursor?: string | null;
+  status?: string;
+  scope?: string;
+  from?: string;
+  to?: string;
+  folder?: string;
+};
+
+export async function getHistory(query: HistoryQuery = {}) {
+  const params = new URLSearchParams();
+  for (const [key, value] of Object.entries(query)) {
+    if (value != null && value !== '') params.set(key, String(value));
+  }
+  const qs = params.toString();
+  const r = await fetch(`${API}/history${qs ? `?${qs}` : ''}`);
   if (!r.ok) throw new Error(r.statusText);
-  return r.json();
+  return r.json() as Promise<{ runs: HistoryEntry[]; next_cursor: string | null }>;
 }
 
 export async function getSchedule() {
@@ -154,10 +220,61 @@ export async function putSongkongConfigFile(filename: string, content: string) {
   return r.json();
 }
 
-export async function getPreview(scope = 'daily') {
-  const r = await fetch(`${API}/preview?scope=${encodeURIComponent(scope)}`);
+// Plex refreshes the plex_scans step would send: changed albums collapsed into refresh roots
+export type PlexRefreshPlan = {
+  requested?: number;
+  requests?: number;
+  roots?: { path: string; covers: number }[];
+  error?: string;
+};
+
+// Step checkpoints of folders left partially processed by interrupted or failed runs
+export type StepCheckpoint = {
+  step: string;
+  status: 'pending' | 'done' | 'error';
+  run_id: string | null;
+  updated_at: string | null;
+};
+
+export type Checkpoints = {
+  folders: { folder: string; steps: StepCheckpoint[] }[];
+  global_steps: StepCheckpoint[];
+  pending: number;
+};
+
+export async function getCheckpoints() {
+  const r = await fetch(`${API}/checkpoints`);
+  if (!r.ok) throw new Error(r.statusText);
+  return r.json() as Promise<Checkpoints>;
+}
+
+export async function discardCheckpoints(folder?: string) {
+  const q = folder ? `?folder=${encodeURIComponent(folder)}` : '';
+  const r = await fetch(`${API}/checkpoints${q}`, { method: 'DELETE' });
   if (!r.ok) throw new Error(r.statusText);
-  return r.json() as Promise<{ scope: string; count: number; folders: string[] }>;
+  return r.json() as Promise<{ discarded: number }>;
+}
+
+// Album dirs without audio the autoclean_empty step would remove under the previewed folders (dry run)
+export type AutocleanPlan = {
+  root?: string;
+  count?: number;
+  directories?: string[];
+  error?: string;
+};
+
+export async function getPreview(scope = 'daily', options: { plexPlan?: boolean; autocleanPlan?: boolean } = {}) {
+  const plexPlan = options.plexPlan ? '&plex_plan=1' : '';
+  const autocleanPlan = options.autocleanPlan ? '&autoclean_plan=1' : '';
+  const r = await fetch(`${API}/preview?scope=${encodeURIComponent(scope)}${plexPlan}${autocleanPlan}`);
+  if (!r.ok) throw new Error(r.statusText);
+  return r.json() as Promise<{
+    scope: string;
+    count: number;
+    folders: string[];
+    plex_plan?: PlexRefreshPlan;
+    autoclean_plan?: AutocleanPlan;
+  }>;
 }
 
 export async function getHealth() {
@@ -165,3 +282,33 @@ export async function getHealth() {
   if (!r.ok) throw new Error(r.statusText);
   return r.json() as Promise<{ ok: boolean; checks?: Record<string, boolean> }>;
 }
+
+// Per-step resources of the last runs (run_metrics.py), oldest first, for the performance chart
+export type StepMetrics = {
+  nodes: number;
+  wall_seconds: number | null;
+  cpu_seconds: number | null;
+  mem_peak_bytes: number | null;
+  read_bytes: number | null;
+  write_bytes: number | null;
+  tracks: number | null;
+};
+
+export type MetricsSeries = {
+  runs: {
+    id: string;
+    started_at: string;
+    status: string;
+    duration_seconds: number | null;
+    tracks: number;
+    steps: Record<string, StepMetrics>;
+    plex: Record<string, { requests: number; p50_seconds: number | null; p95_seconds: number | null }>;
+  }[];
+  steps: string[];
+};
+
+export async function getMetricsSeries(runs = 30) {
+  const r = await fetch(`${API}/metrics?format=json&runs=${runs}`);
+  if (!r.ok) throw new Error(r.statusText);
+  return r.json() as Promise<MetricsSeries>;
+}
@@ -1,10 +1,11 @@
 import { useState, useEffect } from 'react';
-import { Settings, FileText, Download, Save, Loader2, Check, Server, HardDrive } from 'lucide-react';
+import { Settings, FileText, Download, Save, Loader2, Check, Server, HardDrive, Gauge } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { Card, CardHeader, CardTitle, CardDescription, CardContent } from '@/components/shared/Card';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/shared/Select';
 import { Textarea } from '@/components/shared/Textarea';
 import { Input } from '@/components/shared/Input';
+import { Checkbox } from '@/components/shared/Checkbox';
 import * as api from '@/lib/api';
 
 const taskConfigs = [
@@ -21,6 +22,64 @@ const defaultSongkongFiles: Record<string, string> = {
   rename: 'songkong_renamefiles.properties',
 };
 
+// Numeric performance settings, saved individually on blur (validated server-side)
+const performanceFields: { key: string; label: string; placeholder: string; help: string }[] = [
+  {
+    key: 'songkong_workers',
+    label: 'Parallel SongKong workers',
+    placeholder: '1',
+    help: 'Folders processed at the same time, each with its own SongKong Prefs/Database copy.',
+  },
+  {
+    key: 'songkong_worker_cpus',
+    label: 'CPUs per worker',
+    placeholder: '2',
+    help: 'Workers are capped to host CPUs divided by this value.',
+  },
+  {
+    key: 'songkong_worker_memory_mb',
+    label: 'Memory per worker (MB)',
+    placeholder: '4096',
+    help: 'Workers are capped to available RAM divided by this value.',
+  },
+  {
+    key: 'audit_jobs',
+    label: 'Audit tag reader processes',
+    placeholder: '0',
+    help: 'Processes reading tags for audit snapshots (0 = one per CPU).',
+  },
+  {
+    key: 'log_retention_days',
+    label: 'Log retention (days)',
+    placeholder: '90',
+    help: 'Archived logs and audits of older runs are deleted daily; run history is kept (0 = keep forever).',
+  },
+  {
+    key: 'plex_concurrency',
+    label: 'Parallel Plex refreshes',
+    placeholder: '4',
+    help: 'Partial-scan requests sent to Plex at the same time over kept-alive connections.',
+  },
+  {
+    key: 'plex_refresh_fan_out',
+    label: 'Plex refresh fan-out',
+    placeholder: '8',
+    help: 'A parent folder is scanned instead of its changed albums once that saves at least this many requests.',
+  },
+  {
+    key: 'plex_refresh_max_cost',
+    label: 'Plex refresh max cost',
+    placeholder: '4',
+    help: 'Only if the parent has at most this many times as many entries as changed ones.',
+  },
+  {
+    key: 'plex_scan_timeout',
+    label: 'Plex scan wait (seconds)',
+    placeholder: '600',
+    help: 'Plex trash is emptied once the triggered scans finish, or after this long (0 = do not wait).',
+  },
+];
+
 export function ConfigPage() {
   const [taskSettings, setTaskSettings] = useState<Record<string, string>>(defaultSongkongFiles);
   const [fileList, setFileList] = useState<string[]>([]);
@@ -59,6 +118,12 @@ export function ConfigPage() {
   const [plexSections, setPlexSections] = useState<{ key: string; title: string; type?: string }[]>([]);
   const [plexSectionsError, setPlexSectionsError] = useState<string | null>(null);
 
+  const [performance, setPerformance] = useState<Record<string, string>>({});
+  const [performanceError, setPerformanceError] = useState<string | null>(null);
+  const [executorMode, setExecutorMode] = useState('run');
+  const [changeWatcher, setChangeWatcher] = useState('off');
+  const [auditFingerprint, setAuditFingerprint] = useState(false);
+
   const [hostRoot, setHostRoot] = useState('');
   const [dumpHostDir, setDumpHostDir] = useState('');
   const [extraDumpDirs, setExtraDumpDirs] = useState<string>('');
@@ -78,6 +143,10 @@ export function ConfigPage() {
       setPlexLibrarySection(String((c.plex_library_section as string) ?? '1'));
       setPlexDumpPath((c.plex_dump_path as string) ?? '');
       setPlexMatchedPath((c.plex_matched_path as string) ?? '');
+      setPerformance(Object.fromEntries(performanceFields.map((f) => [f.key, String(c[f.key] ?? '')])));
+      setExecutorMode((c.songkong_executor as string) || 'run');
+      setChangeWatcher((c.change_watcher as string) || 'off');
+      setAuditFingerprint(!!c.audit_fingerprint);
     }).catch((e) => setConfigError(e.message)).finally(() => setLoading(false));
     api.getSongkongConfigDiscover().then((d) => {
       setDiscover({
@@ -100,6 +169,15 @@ export function ConfigPage() {
     }
   };
 
+  const savePerformanceSetting = async (key: string, value: string) => {
+    setPerformanceError(null);
+    try {
+      await api.saveConfig({ [key]: value });
+    } catch (e) {
+      setPerformanceError(e instanceof Error ? e.message : 'Save failed');
+    }
+  };
+
   const handlePlexDiscover = async () => {
     setPlexDiscoverLoading(true);
     try {
@@ -576,6 +654,96 @@ export function ConfigPage() {
           </div>
         </CardContent>
       </Card>
+
+      <Card className="mt-6">
+        <CardHeader>
+          <CardTitle className="flex items-center gap-2">
+            <Gauge className="h-4 w-4 text-primary" />
+            Performance
+          </CardTitle>
+          <CardDescription>
+            Concurrency and resource limits used by pipeline runs.
+          </CardDescription>
+        </CardHeader>
+        <CardContent className="space-y-4">
+          {performanceError && (
+            <p className="text-sm text-destructive">{performanceError}</p>
+          )}
+          <div className="space-y-1.5">
+            <label className="text-sm font-medium">SongKong executor</label>
+            <Select
+              value={executorMode}
+              onValueChange={(v) => {
+                setExecutorMode(v);
+                savePerformanceSetting('songkong_executor', v);
+              }}
+            >
+              <SelectTrigger>
+                <SelectValue />
+              </SelectTrigger>
+              <SelectContent>
+                <SelectItem value="run">New container per pass (docker run)</SelectItem>
+                <SelectItem value="exec">Long-lived container per worker (docker exec)</SelectItem>
+              </SelectContent>
+            </Select>
+            <p className="text-xs text-muted-foreground">
+              The long-lived mode saves container start-up on every pass and falls back to docker run if exec fails.
+            </p>
+          </div>
+          <div className="space-y-1.5">
+            <label className="text-sm font-medium">Change journal</label>
+            <Select
+              value={changeWatcher}
+              onValueChange={(v) => {
+                setChangeWatcher(v);
+                savePerformanceSetting('change_watcher', v);
+              }}
+            >
+              <SelectTrigger>
+                <SelectValue />
+              </SelectTrigger>
+              <SelectContent>
+                <SelectItem value="off">Off (crawl the libraries on every run)</SelectItem>
+                <SelectItem value="auto">Auto (inotify, polling on network mounts)</SelectItem>
+                <SelectItem value="inotify">inotify</SelectItem>
+                <SelectItem value="poll">Polling (every 5 minutes)</SelectItem>
+              </SelectContent>
+            </Select>
+            <p className="text-xs text-muted-foreground">
+              A background watcher journals the folders that change, so runs find new daily folders and recent albums without crawling.
+            </p>
+          </div>
+          <div className="grid gap-4 sm:grid-cols-2">
+            {performanceFields.map((field) => (
+              <div key={field.key} className="space-y-1.5">
+                <label className="text-sm font-medium">{field.label}</label>
+                <Input
+                  value={performance[field.key] ?? ''}
+                  onChange={(e) => setPerformance({ ...performance, [field.key]: e.target.value })}
+                  onBlur={() => savePerformanceSetting(field.key, performance[field.key] ?? '')}
+                  placeholder={field.placeholder}
+                />
+                <p className="text-xs text-muted-foreground">{field.help}</p>
+              </div>
+            ))}
+          </div>
+          <label className="flex cursor-pointer items-center gap-3 rounded-lg p-2 transition-colors hover:bg-accent/50">
+            <Checkbox
+              checked={auditFingerprint}
+              onCheckedChange={(c) => {
+                setAuditFingerprint(!!c);
+                savePerformanceSetting('audit_fingerprint', c ? 'true' : 'false');
+              }}
+            />
+            <div>
+              <span className="text-sm font-medium">Audio fingerprints in audits</span>
+              <p className="text-xs text-muted-foreground">
+                Pair renamed/moved files by a sampled hash of the audio data, so tag rewrites do not hide renames.
+              </p>
+            </div>
+          </label>
+        </CardContent>
+      </Card>
     </div>
   );
 }
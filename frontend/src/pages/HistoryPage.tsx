@@ -1,8 +1,12 @@
 import { useState, useEffect, useRef } from 'react';
-import { History, Eye, AlertTriangle } from 'lucide-react';
+import { History, Eye, AlertTriangle, Gauge } from 'lucide-react';
+import { Bar, BarChart, CartesianGrid, XAxis, YAxis } from 'recharts';
 import { Button } from '@/components/ui/button';
 import { Card, CardHeader, CardTitle, CardDescription, CardContent } from '@/components/shared/Card';
+import { Input } from '@/components/shared/Input';
+import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/shared/Select';
 import { StatusBadge } from '@/components/shared/StatusBadge';
+import { ChartContainer, ChartLegend, ChartLegendContent, ChartTooltip, ChartTooltipContent, type ChartConfig } from '@/components/ui/chart';
 import * as api from '@/lib/api';
 import type { HistoryEntry, AuditResult } from '@/types/autokong';
 
@@ -40,34 +44,137 @@ function mapApiAuditToResult(a: {
   };
 }
 
-type HistoryRun = HistoryEntry & {
-  summary?: { duration_seconds?: number; steps_run?: string[] } | null;
+// Performance chart: one bar per run, stacked by step (peak memory is the max over the steps, not stacked)
+type PerfMetric = 'wall_seconds' | 'cpu_seconds' | 'mem_peak_bytes' | 'write_bytes';
+
+const perfMetrics: Record<PerfMetric, { label: string; unit: string; scale: number; stacked: boolean }> = {
+  wall_seconds: { label: 'Wall time', unit: 'min', scale: 60, stacked: true },
+  cpu_seconds: { label: 'CPU time', unit: 'min', scale: 60, stacked: true },
+  mem_peak_bytes: { label: 'Peak memory', unit: 'MiB', scale: 1024 * 1024, stacked: false },
+  write_bytes: { label: 'Bytes written', unit: 'MiB', scale: 1024 * 1024, stacked: true },
 };
 
+const stepColors = ['38 92% 50%', '199 89% 48%', '142 71% 45%', '262 83% 58%', '0 72% 51%', '173 58% 39%', '330 81% 60%'];
+
+function PerformanceChart() {
+  const [series, setSeries] = useState<api.MetricsSeries | null>(null);
+  const [metric, setMetric] = useState<PerfMetric>('wall_seconds');
+
+  useEffect(() => {
+    api.getMetricsSeries().then(setSeries).catch(() => setSeries(null));
+  }, []);
+
+  if (!series || series.runs.length === 0) return null;
+  const { unit, scale, stacked } = perfMetrics[metric];
+  const config: ChartConfig = Object.fromEntries(
+    series.steps.map((step, i) => [step, { label: step, color: `hsl(${stepColors[i % stepColors.length]})` }]),
+  );
+  const data = series.runs.map((run) => ({
+    run: new Date(run.started_at).toLocaleDateString('en-US', { month: 'short', day: 'numeric' }),
+    ...Object.fromEntries(
+      series.steps.map((step) => {
+        const value = run.steps[step]?.[metric];
+        return [step, value != null ? Math.round((value / scale) * 10) / 10 : 0];
+      }),
+    ),
+  }));
+
+  return (
+    <Card className="mt-6">
+      <CardHeader className="flex flex-row items-center justify-between gap-4">
+        <div>
+          <CardTitle className="flex items-center gap-2">
+            <Gauge className="h-4 w-4 text-primary" />
+            Performance
+          </CardTitle>
+          <CardDescription>Per-step resources of the last {series.runs.length} run(s), in {unit}</CardDescription>
+        </div>
+        <Select value={metric} onValueChange={(v) => setMetric(v as PerfMetric)}>
+          <SelectTrigger className="w-44">
+            <SelectValue />
+          </SelectTrigger>
+          <SelectContent>
+            {Object.entries(perfMetrics).map(([value, m]) => (
+              <SelectItem key={value} value={value}>{m.label}</SelectItem>
+            ))}
+          </SelectContent>
+        </Select>
+      </CardHeader>
+      <CardContent>
+        <ChartContainer config={config} className="aspect-auto h-64 w-full">
+          <BarChart data={data}>
+            <CartesianGrid vertical={false} />
+            <XAxis dataKey="run" tickLine={false} axisLine={false} />
+            <YAxis tickLine={false} axisLine={false} width={48} />
+            <ChartTooltip content={<ChartTooltipContent />} />
+            <ChartLegend content={<ChartLegendContent />} />
+            {series.steps.map((step) => (
+              <Bar key={step} dataKey={step} stackId={stacked ? 'steps' : undefined} fill={`var(--color-${step})`} />
+            ))}
+          </BarChart>
+        </ChartContainer>
+      </CardContent>
+    </Card>
+  );
+}
+
+const PAGE_SIZE = 50;
+// Select items cannot have an empty value
+const ANY = 'any';
+
+type HistoryFilters = { status: string; scope: string; from: string; to: string; folder: string };
+
+const emptyFilters: HistoryFilters = { status: ANY, scope: ANY, from: '', to: '', folder: '' };
+
+function toQuery(filters: HistoryFilters): api.HistoryQuery {
+  return {
+    limit: PAGE_SIZE,
+    status: filters.status === ANY ? undefined : filters.status,
+    scope: filters.scope === ANY ? undefined : filters.scope,
+    from: filters.from,
+    to: filters.to,
+    folder: filters.folder.trim(),
+  };
+}
+
 export function HistoryPage() {
-  const [runs, setRuns] = useState<HistoryRun[]>([]);
+  const [runs, setRuns] = useState<HistoryEntry[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [filters, setFilters] = useState<HistoryFilters>(emptyFilters);
   const [selectedRunId, setSelectedRunId] = useState<string | null>(null);
   const [audit, setAudit] = useState<AuditResult | null | undefined>(undefined);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const filtersRef = useRef(filters);
+  filtersRef.current = filters;
 
+  // First page for the current filters (replaces the list)
   const fetchHistory = () => {
-    api.getHistory().then((list: { id: string; started_at: string; finished_at: string | null; scope: string; status: string; summary?: { duration_seconds?: number; steps_run?: string[] } | null }[]) => {
-      setRuns(list.map((r) => ({
-        id: r.id,
-        started_at: r.started_at,
-        finished_at: r.finished_at,
-        scope: r.scope as HistoryEntry['scope'],
-        status: r.status as HistoryEntry['status'],
-        has_audit: r.status === 'ok' || r.status === 'error',
-        summary: r.summary ?? null,
-      })));
+    api.getHistory(toQuery(filtersRef.current)).then((page) => {
+      setRuns(page.runs);
+      setNextCursor(page.next_cursor);
+      setError(null);
     }).catch((e) => setError(e.message)).finally(() => setLoading(false));
   };
 
+  const loadMore = () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    api.getHistory({ ...toQuery(filters), cursor: nextCursor }).then((page) => {
+      setRuns((prev) => [...prev, ...page.runs]);
+      setNextCursor(page.next_cursor);
+    }).catch((e) => setError(e.message)).finally(() => setLoadingMore(false));
+  };
+
+  // Refetch when filters change; the folder text field is debounced
   useEffect(() => {
-    fetchHistory();
-  }, []);
+    const t = setTimeout(fetchHistory, 300);
+    return () => clearTimeout(t);
+  }, [filters]);
+
+  const setFilter = (key: keyof HistoryFilters, value: string) =>
+    setFilters((prev) => ({ ...prev, [key]: value }));
 
   const prevJobIdRef = useRef<string | null>(null);
   useEffect(() => {
@@ -125,6 +232,47 @@ export function HistoryPage() {
               </CardTitle>
             </CardHeader>
             <CardContent>
+              <div className="mb-4 grid gap-3 sm:grid-cols-2 xl:grid-cols-5">
+                <Select value={filters.status} onValueChange={(v) => setFilter('status', v)}>
+                  <SelectTrigger>
+                    <SelectValue />
+                  </SelectTrigger>
+                  <SelectContent>
+                    <SelectItem value={ANY}>Any status</SelectItem>
+                    <SelectItem value="ok">OK</SelectItem>
+                    <SelectItem value="error">Error</SelectItem>
+                    <SelectItem value="no_folders">No folders</SelectItem>
+                  </SelectContent>
+                </Select>
+                <Select value={filters.scope} onValueChange={(v) => setFilter('scope', v)}>
+                  <SelectTrigger>
+                    <SelectValue />
+                  </SelectTrigger>
+                  <SelectContent>
+                    <SelectItem value={ANY}>Any scope</SelectItem>
+                    {Object.entries(scopeLabels).map(([value, label]) => (
+                      <SelectItem key={value} value={value}>{label}</SelectItem>
+                    ))}
+                  </SelectContent>
+                </Select>
+                <Input
+                  type="date"
+                  value={filters.from}
+                  onChange={(e) => setFilter('from', e.target.value)}
+                  title="Started from"
+                />
+                <Input
+                  type="date"
+                  value={filters.to}
+                  onChange={(e) => setFilter('to', e.target.value)}
+                  title="Started until"
+                />
+                <Input
+                  value={filters.folder}
+                  onChange={(e) => setFilter('folder', e.target.value)}
+                  placeholder="Folder contains…"
+                />
+              </div>
               <div className="overflow-x-auto">
                 <table className="w-full">
                   <thead>
@@ -144,6 +292,12 @@ export function HistoryPage() {
                       <th className="pb-3 text-left text-xs font-semibold uppercase tracking-wider text-muted-foreground">
                         Steps
                       </th>
+                      <th className="pb-3 text-left text-xs font-semibold uppercase tracking-wider text-muted-foreground">
+                        Folders
+                      </th>
+                      <th className="pb-3 text-left text-xs font-semibold uppercase tracking-wider text-muted-foreground">
+                        Errors
+                      </th>
                       <th className="pb-3 text-left text-xs font-semibold uppercase tracking-wider text-muted-foreground">
                         Status
                       </th>
@@ -168,10 +322,16 @@ export function HistoryPage() {
                         </td>
                         <td className="py-4 text-sm">{scopeLabels[entry.scope] ?? entry.scope}</td>
                         <td className="py-4 text-sm text-muted-foreground">
-                          {entry.summary?.duration_seconds != null ? `${entry.summary.duration_seconds}s` : '–'}
+                          {entry.duration_seconds != null ? `${entry.duration_seconds}s` : '–'}
                         </td>
                         <td className="py-4 text-sm text-muted-foreground">
-                          {entry.summary?.steps_run?.length ?? '–'}
+                          {entry.steps_count ?? '–'}
+                        </td>
+                        <td className="py-4 text-sm text-muted-foreground">
+                          {entry.folder_count ?? '–'}
+                        </td>
+                        <td className={`py-4 text-sm ${entry.error_count ? 'text-destructive' : 'text-muted-foreground'}`}>
+                          {entry.error_count ?? '–'}
                         </td>
                         <td className="py-4">
                           <StatusBadge status={entry.status} />
@@ -191,6 +351,16 @@ export function HistoryPage() {
                   </tbody>
                 </table>
               </div>
+              {runs.length === 0 && (
+                <p className="py-8 text-center text-sm text-muted-foreground">No runs match these filters</p>
+              )}
+              {nextCursor && (
+                <div className="mt-4 flex justify-center">
+                  <Button variant="outline" size="sm" onClick={loadMore} disabled={loadingMore}>
+                    {loadingMore ? 'Loading…' : 'Load more'}
+                  </Button>
+                </div>
+              )}
             </CardContent>
           </Card>
         </div>
@@ -263,6 +433,8 @@ export function HistoryPage() {
           </Card>
         </div>
       </div>
+
+      <PerformanceChart />
     </div>
   );
 }
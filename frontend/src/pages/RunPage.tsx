@@ -1,5 +1,5 @@
-import { useState, useEffect } from 'react';
-import { Play, Folder, FileCheck, Loader2, Container, ChevronDown, ChevronUp } from 'lucide-react';
+import { useState, useEffect, useRef } from 'react';
+import { Play, Folder, FileCheck, Loader2, Container, ChevronDown, ChevronUp, RotateCcw } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { Card, CardHeader, CardTitle, CardDescription, CardContent } from '@/components/shared/Card';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/shared/Select';
@@ -10,6 +10,26 @@ import { StatusBadge } from '@/components/shared/StatusBadge';
 import * as api from '@/lib/api';
 import type { PipelineStep, RunScope, RunSummary, AuditResult } from '@/types/autokong';
 
+export interface SongKongLiveStats {
+  songs_loaded: number;
+  fingerprinted: number;
+  saved: number;
+  completed: number;
+  errors: number;
+  lines: number;
+}
+
+export interface WorkerProgress {
+  step_id: string;
+  step_label: string;
+  container_name: string | null;
+  folder: string | null;
+  stats?: SongKongLiveStats;
+}
+
+const formatStats = (s: SongKongLiveStats) =>
+  `${s.songs_loaded} loaded · ${s.fingerprinted} fingerprinted · ${s.saved} saved · ${s.errors} errors`;
+
 export interface JobProgress {
   current: number;
   total: number;
@@ -17,6 +37,9 @@ export interface JobProgress {
   step_label: string;
   container_name: string | null;
   folder: string | null;
+  stats?: SongKongLiveStats;
+  workers?: Record<string, WorkerProgress>;
+  eta?: api.RunEta;
 }
 
 const scopeOptions: { value: RunScope; label: string; description: string }[] = [
@@ -52,24 +75,43 @@ const stepGroups: { label: string; steps: { id: PipelineStep; label: string }[]
 
 const allSteps = stepGroups.flatMap((g) => g.steps.map((s) => s.id));
 
+// Terminals keep the last MAX_TERMINAL_LINES lines; base is the stream offset of lines[0]
+const MAX_TERMINAL_LINES = 5000;
+type TerminalLines = { base: number; lines: string[] };
+const emptyLines: TerminalLines = { base: 0, lines: [] };
+
+// Lines arrive with their stream offset: replaying after a reconnect overwrites instead of duplicating
+function appendAt(prev: TerminalLines, offset: number, lines: string[]): TerminalLines {
+  const base = Math.min(prev.base, offset);
+  const merged = [...prev.lines.slice(0, offset - base), ...lines];
+  const drop = Math.max(0, merged.length - MAX_TERMINAL_LINES);
+  return { base: base + drop, lines: drop ? merged.slice(drop) : merged };
+}
+
 export function RunPage() {
   const [scope, setScope] = useState<RunScope>('daily');
   const [selectedSteps, setSelectedSteps] = useState<Set<PipelineStep>>(new Set(allSteps));
   const [finalChecks, setFinalChecks] = useState(false);
   const [isRunning, setIsRunning] = useState(false);
   const [isLaunching, setIsLaunching] = useState(false);
-  const [logLines, setLogLines] = useState<string[]>([]);
+  const [logLines, setLogLines] = useState<TerminalLines>(emptyLines);
   const [summary, setSummary] = useState<RunSummary | null>(null);
   const [audit, setAudit] = useState<AuditResult | null>(null);
   const [previewFolders, setPreviewFolders] = useState<string[]>([]);
   const [selectedFolders, setSelectedFolders] = useState<Set<string>>(new Set());
   const [previewError, setPreviewError] = useState<string | null>(null);
+  const [plexPlan, setPlexPlan] = useState<api.PlexRefreshPlan | null>(null);
+  const [autocleanPlan, setAutocleanPlan] = useState<api.AutocleanPlan | null>(null);
+  const [checkpoints, setCheckpoints] = useState<api.Checkpoints | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [jobId, setJobId] = useState<string | null>(null);
   const [progress, setProgress] = useState<JobProgress | null>(null);
-  const [containerLogLines, setContainerLogLines] = useState<string[]>([]);
+  const [containerLogLines, setContainerLogLines] = useState<TerminalLines>(emptyLines);
   const [showContainerTerminal, setShowContainerTerminal] = useState(false);
+  const eventsRef = useRef<EventSource | null>(null);
+
+  useEffect(() => () => eventsRef.current?.close(), []);
 
   useEffect(() => {
     api.getConfig().then((c: { scope?: string; steps_enabled?: string[]; audit_enabled?: boolean }) => {
@@ -94,7 +136,44 @@ export function RunPage() {
     });
   }, [scope]);
 
-  // Container log is polled together with job+log in the main poll loop when isRunning
+  // Plex refresh plan is a separate, slower preview (walks recent albums); only when plex_scans is selected
+  const plexScansSelected = selectedSteps.has('plex_scans');
+  useEffect(() => {
+    setPlexPlan(null);
+    if (!plexScansSelected) return;
+    let cancelled = false;
+    api.getPreview(scope, { plexPlan: true })
+      .then((p) => { if (!cancelled) setPlexPlan(p.plex_plan ?? null); })
+      .catch(() => {});
+    return () => { cancelled = true; };
+  }, [scope, plexScansSelected]);
+
+  const autocleanSelected = selectedSteps.has('autoclean_empty');
+  useEffect(() => {
+    setAutocleanPlan(null);
+    if (!autocleanSelected) return;
+    let cancelled = false;
+    api.getPreview(scope, { autocleanPlan: true })
+      .then((p) => { if (!cancelled) setAutocleanPlan(p.autoclean_plan ?? null); })
+      .catch(() => {});
+    return () => { cancelled = true; };
+  }, [scope, autocleanSelected]);
+
+  // Folders an interrupted or failed run left partially processed (reloaded when a run ends)
+  const loadCheckpoints = () => api.getCheckpoints().then(setCheckpoints).catch(() => setCheckpoints(null));
+  useEffect(() => {
+    if (!isRunning) loadCheckpoints();
+  }, [isRunning]);
+
+  const discardCheckpoints = async () => {
+    try {
+      await api.discardCheckpoints();
+    } finally {
+      loadCheckpoints();
+    }
+  };
+
+  // Log, container log and progress are pushed by the job's event stream while isRunning
 
   const toggleStep = (step: PipelineStep) => {
     const newSteps = new Set(selectedSteps);
@@ -113,78 +192,89 @@ export function RunPage() {
   const selectAllFolders = () => setSelectedFolders(new Set(previewFolders));
   const deselectAllFolders = () => setSelectedFolders(new Set());
 
-  const handleLaunch = async () => {
+  const handleLaunch = async (resume = false) => {
     setError(null);
     setIsLaunching(true);
     setSummary(null);
     setAudit(null);
-    setLogLines([]);
-    setContainerLogLines([]);
+    setLogLines(emptyLines);
+    setContainerLogLines(emptyLines);
     setProgress(null);
     setJobId(null);
     try {
-      await api.saveConfig({
-        steps_enabled: Array.from(selectedSteps),
-        scope,
-        audit_enabled: finalChecks,
-      });
-      const { job_id } = await api.startRun({
-        steps: Array.from(selectedSteps),
-        scope,
-        enable_audit: finalChecks,
-        folders: Array.from(selectedFolders),
-      });
+      let job_id: string;
+      if (resume) {
+        ({ job_id } = await api.startRun({ mode: 'resume', enable_audit: finalChecks }));
+      } else {
+        await api.saveConfig({
+          steps_enabled: Array.from(selectedSteps),
+          scope,
+          audit_enabled: finalChecks,
+        });
+        ({ job_id } = await api.startRun({
+          steps: Array.from(selectedSteps),
+          scope,
+          enable_audit: finalChecks,
+          folders: Array.from(selectedFolders),
+        }));
+      }
       setJobId(job_id);
       setIsLaunching(false);
       setIsRunning(true);
       setShowContainerTerminal(true);
 
-      const poll = async () => {
+      const finish = async () => {
+        setIsRunning(false);
+        setProgress(null);
         try {
-          const [job, log, containerLog] = await Promise.all([
-            api.getJob(job_id),
-            api.getJobLog(job_id),
-            api.getJobContainerLog(job_id),
-          ]);
-          setLogLines(log.lines || []);
-          setContainerLogLines(containerLog.lines || []);
-          if ((job as { progress?: JobProgress }).progress) {
-            setProgress((job as { progress: JobProgress }).progress);
-          }
-          if (job.status !== 'running') {
-            setIsRunning(false);
-            setProgress(null);
-            setSummary(job.summary as RunSummary);
-            const finalContainerLog = await api.getJobContainerLog(job_id).catch(() => ({ lines: [] }));
-            setContainerLogLines(finalContainerLog.lines || []);
-            if ((job.status === 'ok' || job.status === 'error') && finalChecks) {
-              try {
-                const a = await api.getJobAudit(job_id);
-                const sum = (a as { summary?: { files_deleted_count?: number; files_renamed_or_moved_count?: number }; albums_with_holes?: { artist: string; album: string; after_count?: number; missing_tracks?: number[] }[] }).summary;
-                const holes = (a as { albums_with_holes?: { artist: string; album: string; after_count?: number; missing_tracks?: number[] }[] }).albums_with_holes || [];
-                setAudit({
-                  files_deleted: sum?.files_deleted_count ?? 0,
-                  files_renamed: sum?.files_renamed_or_moved_count ?? 0,
-                  albums_with_holes: holes.map((h) => ({
-                    artist: h.artist,
-                    album: h.album,
-                    total_tracks: h.after_count,
-                    missing_tracks: h.missing_tracks || [],
-                  })),
-                });
-              } catch {
-                setAudit(null);
-              }
+          const job = await api.getJob(job_id);
+          setSummary(job.summary as RunSummary);
+          if ((job.status === 'ok' || job.status === 'error') && finalChecks) {
+            try {
+              const a = await api.getJobAudit(job_id);
+              const sum = (a as { summary?: { files_deleted_count?: number; files_renamed_or_moved_count?: number }; albums_with_holes?: { artist: string; album: string; after_count?: number; missing_tracks?: number[] }[] }).summary;
+              const holes = (a as { albums_with_holes?: { artist: string; album: string; after_count?: number; missing_tracks?: number[] }[] }).albums_with_holes || [];
+              setAudit({
+                files_deleted: sum?.files_deleted_count ?? 0,
+                files_renamed: sum?.files_renamed_or_moved_count ?? 0,
+                albums_with_holes: holes.map((h) => ({
+                  artist: h.artist,
+                  album: h.album,
+                  total_tracks: h.after_count,
+                  missing_tracks: h.missing_tracks || [],
+                })),
+              });
+            } catch {
+              setAudit(null);
             }
-            return;
           }
         } catch {
-          setIsRunning(false);
-          return;
+          setSummary(null);
         }
-        setTimeout(poll, 1000);
       };
-      poll();
+
+      eventsRef.current?.close();
+      const source = new EventSource(api.jobEventsUrl(job_id));
+      eventsRef.current = source;
+      source.addEventListener('log', (e) => {
+        const { offset, lines } = JSON.parse((e as MessageEvent).data) as { offset: number; lines: string[] };
+        setLogLines((prev) => appendAt(prev, offset, lines));
+      });
+      source.addEventListener('container', (e) => {
+        const { offset, lines } = JSON.parse((e as MessageEvent).data) as { offset: number; lines: string[] };
+        setContainerLogLines((prev) => appendAt(prev, offset, lines));
+      });
+      source.addEventListener('progress', (e) => {
+        setProgress(JSON.parse((e as MessageEvent).data) as JobProgress);
+      });
+      source.addEventListener('done', () => {
+        source.close();
+        finish();
+      });
+      source.onerror = () => {
+        // EventSource reconnects by itself unless the server refused the stream
+        if (source.readyState === EventSource.CLOSED) setIsRunning(false);
+      };
     } catch (e) {
       setError(e instanceof Error ? e.message : 'Launch failed');
       setIsLaunching(false);
@@ -276,6 +366,20 @@ export function RunPage() {
                   ))}
                 </div>
               </div>
+              {plexPlan && (
+                <p className="mt-3 text-xs text-muted-foreground">
+                  {plexPlan.error
+                    ? `Plex refresh plan unavailable: ${plexPlan.error}`
+                    : `Plex refresh plan: ${plexPlan.requested ?? 0} recent album(s) in ${plexPlan.requests ?? 0} request(s)`}
+                </p>
+              )}
+              {autocleanPlan && (
+                <p className="mt-1 text-xs text-muted-foreground" title={autocleanPlan.directories?.join('\n')}>
+                  {autocleanPlan.error
+                    ? `Autoclean plan unavailable: ${autocleanPlan.error}`
+                    : `Autoclean plan: ${autocleanPlan.count ?? 0} empty album dir(s) under ${autocleanPlan.root ?? ''} (before processing)`}
+                </p>
+              )}
             </CardContent>
           </Card>
 
@@ -319,10 +423,57 @@ export function RunPage() {
             </CardContent>
           </Card>
 
+          {checkpoints && checkpoints.pending > 0 && (
+            <Card>
+              <CardHeader>
+                <CardTitle className="flex items-center gap-2">
+                  <RotateCcw className="h-4 w-4" />
+                  Partially processed
+                </CardTitle>
+                <CardDescription>
+                  {checkpoints.pending} step(s) left by an interrupted or failed run
+                </CardDescription>
+              </CardHeader>
+              <CardContent>
+                <div className="max-h-48 space-y-2 overflow-y-auto text-xs">
+                  {checkpoints.folders.map(({ folder, steps }) => (
+                    <div key={folder}>
+                      <p className="truncate font-medium" title={folder}>
+                        {folder.split(/[/\\]/).pop() || folder}
+                      </p>
+                      <p className="text-muted-foreground">
+                        {steps.map((c) => `${c.step} ${c.status === 'done' ? '✓' : c.status === 'error' ? '✗' : '…'}`).join(' · ')}
+                      </p>
+                    </div>
+                  ))}
+                  {checkpoints.global_steps.some((c) => c.status !== 'done') && (
+                    <p className="text-muted-foreground">
+                      Then: {checkpoints.global_steps.filter((c) => c.status !== 'done').map((c) => c.step).join(', ')}
+                    </p>
+                  )}
+                </div>
+                <div className="mt-3 flex gap-2">
+                  <Button
+                    type="button"
+                    size="sm"
+                    onClick={() => handleLaunch(true)}
+                    disabled={isLaunching || isRunning}
+                  >
+                    <RotateCcw className="h-4 w-4" />
+                    Resume
+                  </Button>
+                  <Button type="button" variant="outline" size="sm" onClick={discardCheckpoints} disabled={isRunning}>
+                    Discard
+                  </Button>
+                </div>
+              </CardContent>
+            </Card>
+          )}
+
           <Button
             className="w-full"
             size="lg"
-            onClick={handleLaunch}
+            onClick={() => handleLaunch()}
             disabled={isLaunching || isRunning || selectedSteps.size === 0 || selectedFolders.size === 0}
           >
             {isLaunching ? (
@@ -354,6 +505,12 @@ export function RunPage() {
                 </CardTitle>
                 <CardDescription>
                   Step {progress.current + 1} of {progress.total} — {progress.step_label}
+                  {progress.eta && (
+                    <span className={progress.eta.late_seconds ? 'text-destructive' : undefined}>
+                      {' '}· ~{api.formatEta(progress.eta)} left (finish ~{new Date(progress.eta.finish_at).toLocaleTimeString()}
+                      {progress.eta.late_seconds ? `, past the ${new Date(progress.eta.deadline ?? '').toLocaleTimeString()} deadline` : ''})
+                    </span>
+                  )}
                 </CardDescription>
               </CardHeader>
               <CardContent className="space-y-3">
@@ -371,6 +528,27 @@ export function RunPage() {
                     </span>
                   )}
                 </div>
+                {progress.stats && (
+                  <p className="text-xs font-mono text-muted-foreground">{formatStats(progress.stats)}</p>
+                )}
+                {progress.workers && Object.keys(progress.workers).length > 1 && (
+                  <div className="space-y-1 border-t border-border pt-3 text-xs">
+                    {Object.entries(progress.workers).map(([worker, w]) => (
+                      <div key={worker} className="flex items-center gap-2">
+                        <span className="w-8 shrink-0 font-mono text-muted-foreground">w{worker}</span>
+                        <span className="shrink-0">{w.step_label}</span>
+                        {w.folder && (
+                          <span className="truncate text-muted-foreground" title={w.folder}>
+                            {w.folder.split(/[/\\]/).pop() || w.folder}
+                          </span>
+                        )}
+                        {w.stats && (
+                          <span className="ml-auto shrink-0 font-mono text-muted-foreground">{formatStats(w.stats)}</span>
+                        )}
+                      </div>
+                    ))}
+                  </div>
+                )}
               </CardContent>
             </Card>
           )}
@@ -391,7 +569,7 @@ export function RunPage() {
               </CardDescription>
             </CardHeader>
             <CardContent>
-              <Terminal lines={logLines} maxHeight="320px" />
+              <Terminal lines={logLines.lines} maxHeight="320px" />
             </CardContent>
           </Card>
 
@@ -417,7 +595,7 @@ export function RunPage() {
             </CardHeader>
             {showContainerTerminal && (
               <CardContent>
-                <Terminal lines={containerLogLines} maxHeight="320px" className="rounded-b-lg border border-border" />
+                <Terminal lines={containerLogLines.lines} maxHeight="320px" className="rounded-b-lg border border-border" />
               </CardContent>
             )}
           </Card>
@@ -447,6 +625,21 @@ export function RunPage() {
                     <p className="mt-1 text-xl font-semibold">{Array.isArray(summary.steps_run) ? summary.steps_run.length : 0}</p>
                   </div>
                 </div>
+                {summary.critical_path && summary.critical_path.path.length > 0 && (
+                  <div className="mt-4">
+                    <p className="text-xs text-muted-foreground">Critical path</p>
+                    <ol className="mt-1 space-y-0.5 text-xs">
+                      {summary.critical_path.path.map((p) => (
+                        <li key={p.node} className="flex justify-between gap-4">
+                          <span className="truncate" title={p.node}>{p.label}</span>
+                          <span className="shrink-0 text-muted-foreground">
+                            {p.seconds.toFixed(0)}s{p.wait_seconds >= 1 ? ` (waited ${p.wait_seconds.toFixed(0)}s)` : ''}
+                          </span>
+                        </li>
+                      ))}
+                    </ol>
+                  </div>
+                )}
               </CardContent>
             </Card>
           )}
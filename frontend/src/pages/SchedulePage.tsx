@@ -63,6 +63,7 @@ export function SchedulePage() {
   const [isSaving, setIsSaving] = useState(false);
   const [savedMessage, setSavedMessage] = useState<string | null>(null);
   const [nextRun, setNextRun] = useState<string | null>(null);
+  const [deadline, setDeadline] = useState('');
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
@@ -97,6 +98,7 @@ export function SchedulePage() {
         setSelectedSteps(new Set(defaultSteps as PipelineStep[]));
       }
       setNextRun((sched as { next_run?: string }).next_run || null);
+      setDeadline((sched as { deadline?: string | null }).deadline || '');
     }).catch((e) => setError(e.message)).finally(() => setLoading(false));
   }, []);
 
@@ -142,6 +144,7 @@ export function SchedulePage() {
         cron: preset === 'custom' ? customCron : cron,
         scope,
         steps: useCustomSteps ? Array.from(selectedSteps) : null,
+        deadline: deadline || null,
       });
       const updated = await api.getSchedule();
       setNextRun((updated as { next_run?: string }).next_run || null);
@@ -328,6 +331,20 @@ export function SchedulePage() {
               </div>
             )}
 
+            {/* Deadline */}
+            <div className="space-y-2">
+              <label className="section-header">Finish by (optional)</label>
+              <Input
+                type="time"
+                value={deadline}
+                onChange={(e) => setDeadline(e.target.value)}
+                className="w-36"
+              />
+              <p className="text-xs text-muted-foreground">
+                The run log warns when a scheduled run is predicted, from past step timings, to end after this time.
+              </p>
+            </div>
+
             {/* Scope */}
             <div className="space-y-2">
               <label className="section-header">Scope</label>
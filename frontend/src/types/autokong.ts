@@ -29,6 +29,13 @@ export interface RunSummary {
   steps_run: string[];
   duration_seconds: number;
   folders_processed?: number;
+  critical_path?: CriticalPath;
+}
+
+// Chain of steps that set the run's wall time (step_graph.py), each with its duration and slot/lock wait
+export interface CriticalPath {
+  wall_seconds: number;
+  path: { node: string; label: string; seconds: number; wait_seconds: number }[];
 }
 
 export interface AuditResult {
@@ -51,7 +58,10 @@ export interface HistoryEntry {
   finished_at: string | null;
   scope: RunScope;
   status: RunStatus;
-  has_audit: boolean;
+  duration_seconds?: number | null;
+  folder_count?: number | null;
+  error_count?: number | null;
+  steps_count?: number | null;
 }
 
 export interface ScheduleConfig {
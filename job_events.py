@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Live output of a pipeline job, shared by every reader (polling endpoints and Server-Sent Events).
+Log and container-log lines are append-only, so a reader only needs its offsets to resume:
+appending is O(1) and each reader fetches just the lines it has not seen yet.
+
+Memory stays bounded however long the run: each line stream keeps its last RING_LINES lines
+in memory and writes every line to a spill file (data/job_logs/<job>.<kind>.jsonl), from which
+older offsets are read back through a sparse line index.
+"""
+
+import json
+import os
+import threading
+import weakref
+from array import array
+from collections import deque
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+# Line streams of a job; progress is sent as a separate event kind
+LINE_KINDS = ("log", "container")
+EVENT_KINDS = LINE_KINDS + ("progress",)
+
+# Max lines per SSE event, and seconds between keep-alive comments when nothing happens
+EVENT_BATCH_LINES = 500
+HEARTBEAT_SECONDS = 15.0
+
+# Lines of each stream kept in memory; older lines are read back from the spill file
+RING_LINES = 10000
+# Spill file index: byte offset of every INDEX_STRIDE-th line
+INDEX_STRIDE = 1024
+
+
+def _remove_files(paths: List[str]) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def clear_spill_dir(spill_dir: str) -> None:
+    """Remove spill files left by a previous process (jobs do not survive a restart)."""
+    if os.path.isdir(spill_dir):
+        _remove_files([os.path.join(spill_dir, n) for n in os.listdir(spill_dir) if n.endswith(".jsonl")])
+
+
+class LineBuffer:
+    """
+    Append-only lines addressed by offset. With a spill_path, only the last ring_lines stay in
+    memory and every line is also written to the file (one JSON string per line); without one,
+    all lines are kept in memory (finished jobs replayed from the runs table).
+    """
+
+    def __init__(self, spill_path: Optional[str] = None, ring_lines: int = RING_LINES,
+                 lines: Optional[List[str]] = None) -> None:
+        self.spill_path = spill_path
+        self._ring: Union[deque, List[str]] = deque(maxlen=ring_lines) if spill_path else (lines or [])
+        self.total = len(self._ring)
+        self._file = open(spill_path, "w+b") if spill_path else None
+        self._index = array("q")
+
+    def append(self, line: str) -> None:
+        if self._file is not None:
+            if self.total % INDEX_STRIDE == 0:
+                self._index.append(self._file.tell())
+            self._file.write((json.dumps(line) + "\n").encode("utf-8"))
+        self._ring.append(line)
+        self.total += 1
+
+    def read(self, offset: int = 0, limit: Optional[int] = None) -> List[str]:
+        end = self.total if limit is None else min(self.total, offset + limit)
+        if offset >= end:
+            return []
+        ring_start = self.total - len(self._ring)
+        if offset >= ring_start:
+            if isinstance(self._ring, list):
+                return self._ring[offset:end]
+            return list(islice(self._ring, offset - ring_start, end - ring_start))
+        return self._read_spilled(offset, end)
+
+    def _read_spilled(self, offset: int, end: int) -> List[str]:
+        self._file.flush()
+        out: List[str] = []
+        with open(self.spill_path, "rb") as f:
+            f.seek(self._index[offset // INDEX_STRIDE])
+            skip = offset % INDEX_STRIDE
+            for raw in f:
+                if skip:
+                    skip -= 1
+                    continue
+                out.append(json.loads(raw))
+                if len(out) >= end - offset:
+                    break
+        return out
+
+    def close(self) -> None:
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+
+class JobStream:
+    """
+    Append-only log / container-log lines and latest progress of one job. With a spill_dir, lines
+    spill to <spill_dir>/<job_id>.<kind>.jsonl; the files are removed once the stream is unreferenced
+    (the job is stored and every reader is gone).
+    """
+
+    def __init__(self, job_id: Optional[str] = None, spill_dir: Optional[str] = None) -> None:
+        self._cond = threading.Condition()
+        self._lines: Dict[str, LineBuffer] = {}
+        if job_id and spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            for kind in LINE_KINDS:
+                self._lines[kind] = LineBuffer(os.path.join(spill_dir, f"{job_id}.{kind}.jsonl"))
+            buffers = list(self._lines.values())
+            weakref.finalize(self, _close_buffers, buffers)
+        else:
+            self._lines = {kind: LineBuffer() for kind in LINE_KINDS}
+        self._progress: Dict[str, Any] = {}
+        self.progress_version = 0
+        self.status: Optional[str] = None
+
+    @classmethod
+    def replay(cls, sources: Dict[str, Any], status: str) -> "JobStream":
+        """Closed stream of a finished job; sources are line sources with the LineBuffer interface."""
+        stream = cls()
+        stream._lines = dict(sources)
+        stream.status = status
+        return stream
+
+    @classmethod
+    def from_lines(cls, log: List[str], container: List[str], status: str) -> "JobStream":
+        """Closed in-memory stream replaying a finished job."""
+        return cls.replay({"log": LineBuffer(lines=log), "container": LineBuffer(lines=container)}, status)
+
+    def append(self, kind: str, line: str) -> None:
+        with self._cond:
+            self._lines[kind].append(line)
+            self._cond.notify_all()
+
+    def read(self, kind: str, offset: int = 0, limit: Optional[int] = None) -> List[str]:
+        with self._cond:
+            return self._lines[kind].read(offset, limit)
+
+    def iter_lines(self, kind: str, batch: int = RING_LINES) -> Iterator[str]:
+        """Every line of kind, read batch by batch (stays bounded for spilled streams)."""
+        offset = 0
+        while True:
+            lines = self.read(kind, offset, batch)
+            if not lines:
+                return
+            offset += len(lines)
+            yield from lines
+
+    def count(self, kind: str) -> int:
+        with self._cond:
+            return self._lines[kind].total
+
+    def set_progress(self, progress: Dict[str, Any]) -> None:
+        with self._cond:
+            self._progress = progress
+            self.progress_version += 1
+            self._cond.notify_all()
+
+    @property
+    def progress(self) -> Dict[str, Any]:
+        with self._cond:
+            return self._progress
+
+    @property
+    def closed(self) -> bool:
+        return self.status is not None
+
+    def close(self, status: str) -> None:
+        """Mark the job finished; readers drain the remaining lines then get a "done" event."""
+        with self._cond:
+            self.status = status
+            self._cond.notify_all()
+
+    def wait(self, offsets: Dict[str, int], progress_version: int, timeout: float) -> bool:
+        """Block until a new line, a progress update or close; False on timeout."""
+        def changed() -> bool:
+            return (
+                self.status is not None
+                or self.progress_version != progress_version
+                or any(self._lines[k].total > offsets.get(k, 0) for k in LINE_KINDS)
+            )
+        with self._cond:
+            return self._cond.wait_for(changed, timeout=timeout)
+
+
+def _close_buffers(buffers: List[LineBuffer]) -> None:
+    for buf in buffers:
+        buf.close()
+    _remove_files([buf.spill_path for buf in buffers if buf.spill_path])
+
+
+def read_window(stream: JobStream, kind: str, offset: int = 0, limit: Optional[int] = None,
+                tail: Optional[int] = None) -> Dict[str, Any]:
+    """
+    One page of a line stream: {lines, offset, next_offset, total}. tail=N returns the last N lines
+    (offset ignored); poll again with offset=next_offset to get only new lines.
+    """
+    total = stream.count(kind)
+    if tail is not None:
+        offset, limit = max(0, total - tail), None
+    lines = stream.read(kind, offset, limit)
+    return {"lines": lines, "offset": offset, "next_offset": offset + len(lines), "total": total}
+
+
+def format_event_id(offsets: Dict[str, int]) -> str:
+    return f"{offsets.get('log', 0)}-{offsets.get('container', 0)}"
+
+
+def parse_event_id(value: Optional[str]) -> Dict[str, int]:
+    """Offsets from a Last-Event-ID ("<log>-<container>"); zeros if missing or malformed."""
+    try:
+        log, container = (int(x) for x in (value or "").split("-", 1))
+        return {"log": max(0, log), "container": max(0, container)}
+    except ValueError:
+        return {"log": 0, "container": 0}
+
+
+def _sse(event: str, data: Any, event_id: Optional[str] = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def iter_events(
+    stream: JobStream,
+    offsets: Dict[str, int],
+    kinds: Iterable[str] = EVENT_KINDS,
+    heartbeat: float = HEARTBEAT_SECONDS,
+) -> Iterator[str]:
+    """
+    SSE body for one client: "log" / "container" events ({offset, lines}), "progress" events,
+    then a "done" event ({status}) once the job is closed and every line was sent.
+    Event ids carry the line offsets so EventSource resumes where it stopped (Last-Event-ID).
+    """
+    kinds = [k for k in kinds if k in EVENT_KINDS]
+    offsets = {k: offsets.get(k, 0) for k in LINE_KINDS}
+    progress_version = -1
+    yield "retry: 3000\n\n"
+    while True:
+        closed = stream.closed
+        sent = False
+        for kind in LINE_KINDS:
+            if kind not in kinds:
+                continue
+            lines = stream.read(kind, offsets[kind], EVENT_BATCH_LINES)
+            if lines:
+                start = offsets[kind]
+                offsets[kind] += len(lines)
+                sent = True
+                yield _sse(kind, {"offset": start, "lines": lines}, format_event_id(offsets))
+        if "progress" in kinds and stream.progress_version != progress_version:
+            progress_version = stream.progress_version
+            if stream.progress:
+                yield _sse("progress", stream.progress, format_event_id(offsets))
+        if sent:
+            continue
+        if closed:
+            yield _sse("done", {"status": stream.status}, format_event_id(offsets))
+            return
+        waiting = {k: (offsets[k] if k in kinds else stream.count(k)) for k in LINE_KINDS}
+        if not stream.wait(waiting, progress_version if "progress" in kinds else stream.progress_version, heartbeat):
+            yield ": ping\n\n"
+
+
+def stored_stream(log_text: Optional[str], container_log_text: Optional[str], status: str) -> JobStream:
+    """Closed stream of a finished job from its runs row."""
+    log = log_text.split("\n") if log_text else []
+    container = container_log_text.strip().split("\n") if container_log_text else []
+    return JobStream.from_lines(log, container, status)
+
+
+def offsets_from_request(last_event_id: Optional[str], args: Dict[str, str]) -> Dict[str, int]:
+    """Last-Event-ID wins (reconnect); otherwise ?log_offset=&container_offset= (first connect)."""
+    if last_event_id:
+        return parse_event_id(last_event_id)
+    offsets: Dict[str, int] = {}
+    for kind in LINE_KINDS:
+        try:
+            offsets[kind] = max(0, int(args.get(f"{kind}_offset", 0)))
+        except (TypeError, ValueError):
+            offsets[kind] = 0
+    return offsets
+
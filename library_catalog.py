@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent catalog of the matched library (data/library_catalog.db): one row per album directory
+(initial/artist/album under the library root) with its mtime, track count and total size.
+
+refresh() only lists the albums of artist directories whose mtime changed since the previous
+refresh (an album added, renamed or removed changes its artist directory); the other artists
+are skipped with a single stat. Albums whose own mtime changed are rescanned. Because files
+rewritten inside an existing album do not touch the artist directory, every artist is visited
+again once the last full refresh is older than full_every_days.
+
+Each refresh stamps the albums it found new, changed or removed, so "what changed since the last
+run" and "albums modified in the last N days" are indexed queries instead of a tree crawl.
+
+Usage:
+  python3 library_catalog.py refresh /music/Music_matched [--full]
+  python3 library_catalog.py changes /music/Music_matched [--since 2026-01-31T00:00]
+  python3 library_catalog.py stats /music/Music_matched
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import stat
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from dir_index import DirIndex
+
+_APP_DIR = Path(__file__).resolve().parent
+DATA_DIR = os.environ.get("AUTOKONG_DATA_DIR", str(_APP_DIR / "data"))
+CATALOG_DB_PATH = os.path.join(DATA_DIR, "library_catalog.db")
+
+# Visit every artist (not only changed ones) when the last full refresh is older than this
+DEFAULT_FULL_EVERY_DAYS = 7
+# Removed albums are kept this long so changes() can report them
+REMOVED_RETENTION_DAYS = 90
+
+
+def _album_totals(index: DirIndex, album: str) -> Tuple[int, int]:
+    """(audio files, bytes) anywhere under album (disc subfolders included)."""
+    tracks = size = 0
+    for dirpath, _lst in index.walk(album):
+        for e in index.audio_files(dirpath):
+            tracks += 1
+            try:
+                size += e.stat().st_size
+            except OSError:
+                pass
+    return tracks, size
+
+
+class LibraryCatalog:
+    """Album catalog of one or more library roots. Thread-safe."""
+
+    def __init__(self, db_path: str = CATALOG_DB_PATH):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS albums (
+                path TEXT PRIMARY KEY,
+                root TEXT NOT NULL,
+                artist TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                track_count INTEGER NOT NULL,
+                total_bytes INTEGER NOT NULL,
+                changed_at REAL NOT NULL,
+                removed_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_albums_artist ON albums(artist);
+            CREATE INDEX IF NOT EXISTS idx_albums_root_mtime ON albums(root, mtime_ns);
+            CREATE INDEX IF NOT EXISTS idx_albums_root_changed ON albums(root, changed_at);
+            CREATE TABLE IF NOT EXISTS artists (
+                path TEXT PRIMARY KEY,
+                root TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_artists_root ON artists(root);
+            CREATE TABLE IF NOT EXISTS refreshes (
+                root TEXT PRIMARY KEY,
+                started_at REAL NOT NULL,
+                full_at REAL NOT NULL,
+                summary TEXT NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    # -- refresh ---------------------------------------------------------------------------
+
+    def refresh(
+        self,
+        root: str,
+        index: Optional[DirIndex] = None,
+        full: Optional[bool] = None,
+        full_every_days: float = DEFAULT_FULL_EVERY_DAYS,
+    ) -> Dict[str, Any]:
+        """
+        Bring the catalog of root up to date; returns a summary (albums, added, changed, removed,
+        artists_scanned, artists_skipped, full, seconds). full=None decides from full_every_days.
+        Raises FileNotFoundError if root is not a directory.
+        """
+        root = os.path.normpath(root)
+        index = index or DirIndex()
+        top = index.listing(root)
+        if top is None:
+            raise FileNotFoundError(f"Library root not found: {root}")
+        t0 = time.perf_counter()
+        now = time.time()
+        with self._lock:
+            last = self._conn.execute("SELECT full_at FROM refreshes WHERE root = ?", (root,)).fetchone()
+            if full is None:
+                full = last is None or now - last[0] >= full_every_days * 86400
+            known = dict(self._conn.execute("SELECT path, mtime_ns FROM artists WHERE root = ?", (root,)))
+        counts = {"added": 0, "changed": 0, "removed": 0, "artists_scanned": 0, "artists_skipped": 0}
+        seen = set()
+        for initial in top.dirs:
+            initial_path = os.path.join(root, initial.name)
+            lst = index.listing(initial_path)
+            for artist in lst.dirs if lst else []:
+                path = os.path.join(initial_path, artist.name)
+                seen.add(path)
+                try:
+                    # taken before listing the albums: a change during the scan shows up next time
+                    mtime_ns = artist.stat().st_mtime_ns
+                except OSError:
+                    continue
+                if not full and known.get(path) == mtime_ns:
+                    counts["artists_skipped"] += 1
+                    continue
+                counts["artists_scanned"] += 1
+                self._scan_artist(root, path, mtime_ns, index, now, counts)
+        gone = [p for p in known if p not in seen]
+        with self._lock:
+            for path in gone:
+                counts["removed"] += self._conn.execute(
+                    "UPDATE albums SET removed_at = ?, changed_at = ? WHERE artist = ? AND removed_at IS NULL",
+                    (now, now, path),
+                ).rowcount
+                self._conn.execute("DELETE FROM artists WHERE path = ?", (path,))
+            self._conn.execute(
+                "DELETE FROM albums WHERE root = ? AND removed_at < ?",
+                (root, now - REMOVED_RETENTION_DAYS * 86400),
+            )
+            total = self._conn.execute(
+                "SELECT COUNT(*) FROM albums WHERE root = ? AND removed_at IS NULL", (root,)
+            ).fetchone()[0]
+            summary = {"albums": total, **counts, "full": full, "seconds": round(time.perf_counter() - t0, 3)}
+            self._conn.execute(
+                "INSERT INTO refreshes(root, started_at, full_at, summary) VALUES(?, ?, ?, ?) "
+                "ON CONFLICT(root) DO UPDATE SET started_at = excluded.started_at, "
+                "full_at = CASE WHEN ? THEN excluded.started_at ELSE refreshes.full_at END, "
+                "summary = excluded.summary",
+                (root, now, now, json.dumps(summary), full),
+            )
+            self._conn.commit()
+        return summary
+
+    def _scan_artist(self, root: str, artist: str, mtime_ns: int, index: DirIndex,
+                     now: float, counts: Dict[str, int]) -> None:
+        with self._lock:
+            stored = dict(self._conn.execute(
+                "SELECT path, mtime_ns FROM albums WHERE artist = ? AND removed_at IS NULL", (artist,)
+            ))
+        rows = []
+        on_disk = set()
+        lst = index.listing(artist)
+        for album in lst.dirs if lst else []:
+            path = os.path.join(artist, album.name)
+            on_disk.add(path)
+            try:
+                album_mtime = album.stat().st_mtime_ns
+            except OSError:
+                continue
+            if stored.get(path) == album_mtime:
+                continue
+            counts["changed" if path in stored else "added"] += 1
+            tracks, size = _album_totals(index, path)
+            rows.append((path, root, artist, album_mtime, tracks, size, now))
+        removed = [p for p in stored if p not in on_disk]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO albums(path, root, artist, mtime_ns, track_count, total_bytes, changed_at,"
+                " removed_at) VALUES(?, ?, ?, ?, ?, ?, ?, NULL)",
+                rows,
+            )
+            self._conn.executemany(
+                "UPDATE albums SET removed_at = ?, changed_at = ? WHERE path = ?", ((now, now, p) for p in removed)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artists(path, root, mtime_ns) VALUES(?, ?, ?)", (artist, root, mtime_ns)
+            )
+        counts["removed"] += len(removed)
+
+    def update(self, root: str, albums: Iterable[str], index: Optional[DirIndex] = None) -> Dict[str, int]:
+        """
+        Bring the given album directories up to date (e.g. from the change journal) without visiting
+        the rest of the tree: new or changed albums are counted again, missing ones marked removed.
+        """
+        root = os.path.normpath(root)
+        index = index or DirIndex()
+        now = time.time()
+        counts = {"added": 0, "changed": 0, "removed": 0}
+        rows, removed = [], []
+        for path in albums:
+            path = os.path.normpath(path)
+            with self._lock:
+                stored = self._conn.execute(
+                    "SELECT mtime_ns FROM albums WHERE path = ? AND removed_at IS NULL", (path,)
+                ).fetchone()
+            try:
+                st = os.stat(path)
+            except OSError:
+                st = None
+            if st is None or not stat.S_ISDIR(st.st_mode):
+                if stored is not None:
+                    removed.append(path)
+                continue
+            mtime_ns = st.st_mtime_ns
+            if stored is not None and stored[0] == mtime_ns:
+                continue
+            counts["changed" if stored is not None else "added"] += 1
+            tracks, size = _album_totals(index, path)
+            rows.append((path, root, os.path.dirname(path), mtime_ns, tracks, size, now))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO albums(path, root, artist, mtime_ns, track_count, total_bytes, changed_at,"
+                " removed_at) VALUES(?, ?, ?, ?, ?, ?, ?, NULL)",
+                rows,
+            )
+            self._conn.executemany(
+                "UPDATE albums SET removed_at = ?, changed_at = ? WHERE path = ?", ((now, now, p) for p in removed)
+            )
+            self._conn.commit()
+        counts["removed"] = len(removed)
+        return counts
+
+    # -- queries ---------------------------------------------------------------------------
+
+    def last_refresh(self, root: str) -> Optional[Dict[str, Any]]:
+        """{started_at, full_at, summary} of the latest refresh of root, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT started_at, full_at, summary FROM refreshes WHERE root = ?", (os.path.normpath(root),)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"started_at": row[0], "full_at": row[1], "summary": json.loads(row[2])}
+
+    def recent(self, root: str, since: float) -> List[str]:
+        """Album paths of root whose directory mtime is at least since (epoch seconds), sorted."""
+        with self._lock:
+            return [r[0] for r in self._conn.execute(
+                "SELECT path FROM albums WHERE root = ? AND mtime_ns >= ? AND removed_at IS NULL ORDER BY path",
+                (os.path.normpath(root), int(since * 1_000_000_000)),
+            )]
+
+    def changes(self, root: str, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Albums added, changed or removed by refreshes started at or after since (epoch seconds);
+        since=None means the latest refresh. Each: {path, track_count, total_bytes, changed_at, removed}.
+        """
+        root = os.path.normpath(root)
+        if since is None:
+            last = self.last_refresh(root)
+            if last is None:
+                return []
+            since = last["started_at"]
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, track_count, total_bytes, changed_at, removed_at FROM albums"
+                " WHERE root = ? AND changed_at >= ? ORDER BY path",
+                (root, since),
+            ).fetchall()
+        return [{"path": r[0], "track_count": r[1], "total_bytes": r[2], "changed_at": r[3],
+                 "removed": r[4] is not None} for r in rows]
+
+    def stats(self, root: str) -> Dict[str, int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(track_count), 0), COALESCE(SUM(total_bytes), 0) FROM albums"
+                " WHERE root = ? AND removed_at IS NULL",
+                (os.path.normpath(root),),
+            ).fetchone()
+        return {"albums": row[0], "tracks": row[1], "bytes": row[2]}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def parse_since(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Matched library catalog.")
+    parser.add_argument("--db", default=CATALOG_DB_PATH)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_refresh = sub.add_parser("refresh", help="Update the catalog from disk")
+    p_refresh.add_argument("root")
+    p_refresh.add_argument("--full", action="store_true", help="Visit every artist, changed or not")
+    p_changes = sub.add_parser("changes", help="Albums changed since a time (default: the last refresh)")
+    p_changes.add_argument("root")
+    p_changes.add_argument("--since", help="ISO date/time or epoch seconds")
+    p_stats = sub.add_parser("stats", help="Album, track and byte totals")
+    p_stats.add_argument("root")
+    args = parser.parse_args()
+
+    catalog = LibraryCatalog(args.db)
+    try:
+        if args.cmd == "refresh":
+            result: Any = catalog.refresh(args.root, full=True if args.full else None)
+        elif args.cmd == "changes":
+            result = catalog.changes(args.root, parse_since(args.since))
+        else:
+            result = {**catalog.stats(args.root), "last_refresh": catalog.last_refresh(args.root)}
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    finally:
+        catalog.close()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asynchronous log sink of the pipeline. log_action() and the container stdout readers only put a
+record on a queue; one background thread takes records in batches and
+  - writes them to stdout (one flush per batch),
+  - appends them to the action log (plain text) and its JSON-lines twin (one record per line:
+    ts, kind, worker, msg), both rotated by size and age,
+  - hands each line to the callback captured with it (the web UI job stream), in order.
+A slow callback or disk therefore never holds up a SongKong pass. flush() is a barrier: it
+returns once every record queued before the call has been written and delivered.
+"""
+
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Rotate a log file past this size or age; keep this many rotated files (.1 is the newest)
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 7 * 86400
+DEFAULT_BACKUPS = 5
+# Records written per batch at most, and longest wait for more records before a batch is written
+MAX_BATCH = 1000
+BATCH_WAIT_SECONDS = 0.1
+
+
+class RotatingFile:
+    """Append-only text file rotated to path.1 .. path.N by size or by age (since this process opened it)."""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age: float = DEFAULT_MAX_AGE_SECONDS, backups: int = DEFAULT_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backups = max(1, backups)
+        self._fp = None
+        self._size = 0
+        self._opened_at = 0.0
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._fp = open(self.path, "a", encoding="utf-8")
+        self._size = self._fp.tell()
+        self._opened_at = time.time()
+
+    def write(self, text: str) -> None:
+        if self._fp is None:
+            self._open()
+        elif self._size >= self.max_bytes or (self.max_age and time.time() - self._opened_at >= self.max_age):
+            self.rotate()
+        self._fp.write(text)
+        self._size += len(text.encode("utf-8"))
+
+    def rotate(self) -> None:
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if os.path.exists(self.path):
+            os.replace(self.path, f"{self.path}.1")
+        self._open()
+
+    def flush(self) -> None:
+        if self._fp is not None:
+            self._fp.flush()
+
+    def close(self) -> None:
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+
+# Queue item: (line, record or None, callback or None, write to stdout/files)
+_Item = Tuple[str, Optional[Dict[str, Any]], Optional[Callable[[str], None]], bool]
+
+
+class LogSink:
+    """Queue + background writer thread (started on first use, restarted after a fork)."""
+
+    def __init__(
+        self,
+        text_path: Optional[str] = None,
+        json_path: Optional[str] = None,
+        stdout: bool = True,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = DEFAULT_MAX_AGE_SECONDS,
+        backups: int = DEFAULT_BACKUPS,
+    ):
+        self._text = RotatingFile(text_path, max_bytes, max_age, backups) if text_path else None
+        self._json = RotatingFile(json_path, max_bytes, max_age, backups) if json_path else None
+        self._stdout = stdout
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = 0
+        self.written = 0
+        self.callback_errors = 0
+        self.write_errors = 0
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+                self._thread.start()
+
+    def emit(self, line: str, record: Optional[Dict[str, Any]] = None,
+             callback: Optional[Callable[[str], None]] = None, persist: bool = True) -> None:
+        """
+        Queue one line. With persist, it goes to stdout and the text log, and record (or
+        {"msg": line}) to the JSON-lines log; callback(line) is called from the writer thread.
+        """
+        self._ensure_thread()
+        self._queue.put((line, record, callback, persist))
+
+    def flush(self, timeout: float = 30) -> bool:
+        """Wait until everything queued so far is written and delivered; False on timeout."""
+        if self._thread is None or self._pid != os.getpid():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Any] = [self._queue.get()]
+            deadline = time.monotonic() + BATCH_WAIT_SECONDS
+            while len(batch) < MAX_BATCH and not isinstance(batch[-1], threading.Event):
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            self._write([b for b in batch if not isinstance(b, threading.Event)])
+            for b in batch:
+                if isinstance(b, threading.Event):
+                    b.set()
+
+    def _write(self, items: List[_Item]) -> None:
+        persisted = [(line, record) for line, record, _cb, persist in items if persist]
+        if persisted:
+            try:
+                if self._stdout:
+                    sys.stdout.write("".join(f"{line}\n" for line, _ in persisted))
+                    sys.stdout.flush()
+                if self._text is not None:
+                    self._text.write("".join(f"{line}\n" for line, _ in persisted))
+                    self._text.flush()
+                if self._json is not None:
+                    self._json.write("".join(
+                        json.dumps(record if record is not None else {"msg": line}, ensure_ascii=False) + "\n"
+                        for line, record in persisted
+                    ))
+                    self._json.flush()
+            except (OSError, ValueError):
+                self.write_errors += 1
+            self.written += len(persisted)
+        for line, _record, callback, _persist in items:
+            if callback is not None:
+                try:
+                    callback(line)
+                except Exception:
+                    self.callback_errors += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"written": self.written, "write_errors": self.write_errors, "callback_errors": self.callback_errors}
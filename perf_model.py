@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persisted performance model of the pipeline steps (data/perf_model.db).
+
+Every finished step of a run is stored as a sample (step, profile, tracks, bytes, seconds); the
+profile is the SongKong .properties file of the pass ("" for the global steps). For each
+(step, profile) the model fits
+
+    seconds = fixed + per_track * tracks + per_gb * GB
+
+by weighted least squares on the last MAX_SAMPLES samples, recent runs weighing more. Smaller
+models (fixed + per_track, per_track alone, fixed alone) are fitted too, and the best one without
+a negative rate is kept: tracks and size are often too collinear to separate. Below MIN_SAMPLES
+samples the plain ratio of the samples is used, and without any the DEFAULT_* guesses.
+
+RunEstimate follows the nodes of a run's step graph (step_graph.py) and predicts its remaining
+time from the track counts of the folders still to process, divided by the SongKong workers.
+
+Usage:
+  python3 perf_model.py show
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from dir_index import DirIndex
+
+_APP_DIR = Path(__file__).resolve().parent
+DATA_DIR = os.environ.get("AUTOKONG_DATA_DIR", str(_APP_DIR / "data"))
+PERF_DB_PATH = os.path.join(DATA_DIR, "perf_model.db")
+
+# Samples used per (step, profile), and the weight factor per older sample
+MAX_SAMPLES = 200
+DECAY = 0.97
+MIN_SAMPLES = 3
+# Guesses before any sample exists
+DEFAULT_SECONDS_PER_TRACK = 2.0
+DEFAULT_STEP_SECONDS = 10.0
+GB = 1024 ** 3
+
+
+class Fit(NamedTuple):
+    fixed: float
+    per_track: float
+    per_gb: float
+    samples: int
+
+    def predict(self, tracks: int, size: int) -> float:
+        return self.fixed + self.per_track * tracks + self.per_gb * size / GB
+
+
+def folder_totals(index: DirIndex, folder: str) -> Tuple[int, int]:
+    """(audio files, bytes) anywhere under folder, from the run's directory index."""
+    tracks = size = 0
+    for _path, _name, file_size, _mtime, _ino in index.iter_audio_files(folder):
+        tracks += 1
+        size += file_size
+    return tracks, size
+
+
+def _solve(a: List[List[float]], b: List[float]) -> Optional[List[float]]:
+    """Gaussian elimination with partial pivoting; None if the system is (nearly) singular."""
+    n = len(b)
+    scale = [max(abs(row[c]) for row in a) or 1.0 for c in range(n)]
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(m[r][col]))
+        if abs(m[pivot][col]) < 1e-9 * scale[col]:
+            return None
+        m[col], m[pivot] = m[pivot], m[col]
+        for r in range(n):
+            if r != col:
+                f = m[r][col] / m[col][col]
+                m[r] = [x - f * y for x, y in zip(m[r], m[col])]
+    return [m[i][n] / m[i][i] for i in range(n)]
+
+
+def _weighted_lstsq(xs: Sequence[Sequence[float]], ys: Sequence[float],
+                    ws: Sequence[float]) -> Optional[List[float]]:
+    k = len(xs[0])
+    a = [[sum(w * x[i] * x[j] for x, w in zip(xs, ws)) for j in range(k)] for i in range(k)]
+    b = [sum(w * x[i] * y for x, y, w in zip(xs, ys, ws)) for i in range(k)]
+    return _solve(a, b)
+
+
+def fit_samples(samples: Sequence[Tuple[int, int, float]]) -> Fit:
+    """Fit from (tracks, bytes, seconds) samples, newest first."""
+    n = len(samples)
+    if n == 0:
+        return Fit(DEFAULT_STEP_SECONDS, DEFAULT_SECONDS_PER_TRACK, 0.0, 0)
+    total_tracks = sum(t for t, _s, _y in samples)
+    total_seconds = sum(y for _t, _s, y in samples)
+    if n >= MIN_SAMPLES and total_tracks:
+        ws = [DECAY ** i for i in range(n)]
+        ys = [y for _t, _s, y in samples]
+        # candidate models ([fixed, per_track, per_gb] column lists): the best fit without a negative rate
+        best: Optional[Tuple[float, Fit]] = None
+        for cols in ((0, 1, 2), (0, 1), (1,), (0,)):
+            xs = [[(1.0, float(t), s / GB)[c] for c in cols] for t, s, _y in samples]
+            coef = _weighted_lstsq(xs, ys, ws)
+            if coef is None or any(c < 0 for c in coef):
+                continue
+            full = [0.0, 0.0, 0.0]
+            for c, v in zip(cols, coef):
+                full[c] = v
+            fit = Fit(full[0], full[1], full[2], n)
+            sse = sum(w * (fit.predict(t, s) - y) ** 2 for (t, s, y), w in zip(samples, ws))
+            # a smaller model must fit clearly worse to lose
+            if best is None or sse < best[0] * 0.99:
+                best = (sse, fit)
+        if best is not None:
+            return best[1]
+    if total_tracks:
+        return Fit(0.0, total_seconds / total_tracks, 0.0, n)
+    # steps without tracks (global steps): mean duration
+    return Fit(total_seconds / n, 0.0, 0.0, n)
+
+
+class PerfModel:
+    """Step timing samples and their fits. Thread-safe."""
+
+    def __init__(self, db_path: str = PERF_DB_PATH):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS samples (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                step TEXT NOT NULL,
+                profile TEXT NOT NULL,
+                tracks INTEGER NOT NULL,
+                bytes INTEGER NOT NULL,
+                seconds REAL NOT NULL,
+                recorded_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_samples_step ON samples(step, profile, id);
+        """)
+        self._conn.commit()
+        self._fits: Dict[Tuple[str, str], Fit] = {}
+
+    def record(self, step: str, profile: str, tracks: int, size: int, seconds: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO samples(step, profile, tracks, bytes, seconds, recorded_at) VALUES(?, ?, ?, ?, ?, ?)",
+                (step, profile or "", tracks, size, seconds, time.time()),
+            )
+            # keep the table bounded: samples beyond the fitting window are never read again
+            self._conn.execute(
+                "DELETE FROM samples WHERE step = ? AND profile = ? AND id <= ("
+                "SELECT id FROM samples WHERE step = ? AND profile = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (step, profile or "", step, profile or "", MAX_SAMPLES),
+            )
+            self._conn.commit()
+            self._fits.pop((step, profile or ""), None)
+
+    def fit(self, step: str, profile: str = "") -> Fit:
+        key = (step, profile or "")
+        with self._lock:
+            cached = self._fits.get(key)
+            if cached is not None:
+                return cached
+            rows = self._conn.execute(
+                "SELECT tracks, bytes, seconds FROM samples WHERE step = ? AND profile = ? "
+                "ORDER BY id DESC LIMIT ?",
+                (key[0], key[1], MAX_SAMPLES),
+            ).fetchall()
+            if not rows and key[1]:
+                # new profile file for a known step: start from the step's other profiles
+                rows = self._conn.execute(
+                    "SELECT tracks, bytes, seconds FROM samples WHERE step = ? ORDER BY id DESC LIMIT ?",
+                    (key[0], MAX_SAMPLES),
+                ).fetchall()
+            fit = fit_samples(rows)
+            self._fits[key] = fit
+            return fit
+
+    def predict(self, step: str, profile: str, tracks: int, size: int) -> float:
+        return max(0.0, self.fit(step, profile).predict(tracks, size))
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """One entry per (step, profile) with samples: its fit."""
+        with self._lock:
+            keys = self._conn.execute("SELECT DISTINCT step, profile FROM samples ORDER BY step, profile").fetchall()
+        out = []
+        for step, profile in keys:
+            f = self.fit(step, profile)
+            out.append({"step": step, "profile": profile, "samples": f.samples, "fixed_seconds": round(f.fixed, 2),
+                        "seconds_per_track": round(f.per_track, 3), "seconds_per_gb": round(f.per_gb, 2)})
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RunEstimate:
+    """
+    Remaining-time estimate of one run. add() every graph node with its input size before the
+    run, then pass each node status change to on_node(); finished nodes become model samples.
+    """
+
+    def __init__(self, model: PerfModel, workers: int = 1, deadline: Optional[datetime] = None):
+        self.model = model
+        self.workers = max(1, workers)
+        self.deadline = deadline
+        self.started = time.monotonic()
+        self.started_at = datetime.now()
+        self._lock = threading.Lock()
+        # key -> {step, profile, folder, tracks, bytes, pool, predicted, status, t0}
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, key: str, step: str, profile: str = "", folder: str = "", tracks: int = 0, size: int = 0,
+            pool: str = "songkong") -> float:
+        predicted = self.model.predict(step, profile, tracks, size)
+        with self._lock:
+            self._nodes[key] = {"step": step, "profile": profile, "folder": folder, "tracks": tracks, "bytes": size,
+                                "pool": pool, "predicted": predicted, "status": "waiting", "t0": None}
+        return predicted
+
+    def on_node(self, node: Any) -> None:
+        """StepGraph listener: node.key, node.status ('running', 'done', ...), node.seconds."""
+        with self._lock:
+            n = self._nodes.get(node.key)
+            if n is None:
+                return
+            n["status"] = node.status
+            if node.status == "running":
+                n["t0"] = time.monotonic()
+        if node.status == "done":
+            self.model.record(n["step"], n["profile"], n["tracks"], n["bytes"], node.seconds)
+
+    def remaining_seconds(self) -> float:
+        now = time.monotonic()
+        songkong = other = 0.0
+        with self._lock:
+            for n in self._nodes.values():
+                if n["status"] == "waiting":
+                    left = n["predicted"]
+                elif n["status"] == "running":
+                    left = max(0.0, n["predicted"] - (now - n["t0"]))
+                else:
+                    continue
+                if n["pool"] == "songkong":
+                    songkong += left
+                else:
+                    other += left
+        return songkong / self.workers + other
+
+    def predicted_seconds(self) -> float:
+        """Whole-run prediction, as made before the run started."""
+        with self._lock:
+            nodes = list(self._nodes.values())
+        songkong = sum(n["predicted"] for n in nodes if n["pool"] == "songkong")
+        return songkong / self.workers + sum(n["predicted"] for n in nodes if n["pool"] != "songkong")
+
+    def late_seconds(self) -> Optional[float]:
+        """Seconds the estimated finish is past the deadline (None without deadline or if on time)."""
+        if self.deadline is None:
+            return None
+        late = (datetime.now() + timedelta(seconds=self.remaining_seconds()) - self.deadline).total_seconds()
+        return late if late > 0 else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        remaining = self.remaining_seconds()
+        with self._lock:
+            left = [n for n in self._nodes.values() if n["status"] in ("waiting", "running")]
+            remaining_tracks = sum({n["folder"]: n["tracks"] for n in left if n["folder"]}.values())
+            samples = min((self.model.fit(n["step"], n["profile"]).samples for n in left), default=0)
+        finish = datetime.now() + timedelta(seconds=remaining)
+        out = {
+            "elapsed_seconds": round(time.monotonic() - self.started),
+            "remaining_seconds": round(remaining),
+            "finish_at": finish.isoformat(timespec="seconds"),
+            "remaining_tracks": remaining_tracks,
+            # fewest samples behind the prediction of a remaining step (0 = default guesses)
+            "min_samples": samples,
+        }
+        if self.deadline is not None:
+            out["deadline"] = self.deadline.isoformat(timespec="seconds")
+            out["late_seconds"] = round(max(0.0, (finish - self.deadline).total_seconds()))
+        return out
+
+
+def next_deadline(hhmm: str, after: Optional[datetime] = None) -> Optional[datetime]:
+    """Next occurrence of local time "HH:MM" after `after` (default: now); None if not a valid time."""
+    try:
+        hour, minute = (int(x) for x in hhmm.strip().split(":"))
+        after = after or datetime.now()
+        at = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    except (ValueError, AttributeError):
+        return None
+    return at if at > after else at + timedelta(days=1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Show the fitted Autokong step performance model.")
+    parser.add_argument("--db", default=PERF_DB_PATH, help=f"Model database (default: {PERF_DB_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("show", help="Per step and profile: samples and fitted rates")
+    args = parser.parse_args()
+    model = PerfModel(args.db)
+    try:
+        for row in model.summary():
+            print(f"{row['step']:<18} {row['profile'] or '-':<40} {row['samples']:>4} sample(s): "
+                  f"{row['fixed_seconds']}s + {row['seconds_per_track']}s/track + {row['seconds_per_gb']}s/GB")
+    finally:
+        model.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,57 +9,70 @@ import os
 from collections import defaultdict
 from typing import Any, Dict, List, Optional, Set, Tuple
 
-AUDIO_EXTENSIONS = (".mp3", ".flac", ".wav", ".aac", ".m4a", ".ogg", ".wma", ".alac", ".aiff")
+from tag_scan import AUDIO_EXTENSIONS, iter_audio_files, read_files_many  # noqa: F401
 
 
-def _read_file_tags(filepath: str) -> Dict[str, Any]:
-    """Read audio tags; return dict with artist, album, title, track, etc. or empty on error."""
-    try:
-        from tinytag import TinyTag
-    except ImportError:
-        return {}
-    try:
-        tag = TinyTag.get(filepath)
-        return {
-            "artist": (tag.artist or "").strip() or None,
-            "album": (tag.album or "").strip() or None,
-            "title": (tag.title or "").strip() or None,
-            "track": str(tag.track).split("/")[0].strip() if tag.track else None,
-            "track_total": str(tag.track_total).strip() if tag.track_total else None,
-            "albumartist": (tag.albumartist or "").strip() or None,
-        }
-    except Exception:
-        return {}
-
-
-def snapshot_zone(root_paths: List[str]) -> Dict[str, Any]:
+def snapshot_zone(
+    root_paths: List[str],
+    cache: Optional[Any] = None,
+    previous: Optional[Dict[str, Any]] = None,
+    jobs: int = 1,
+    fingerprint: bool = False,
+    index: Optional[Any] = None,
+) -> Dict[str, Any]:
     """
     Build a full snapshot of the given root paths: all directories and audio files with tags.
-    Returns a dict: roots, files (list of {path, root, name, size, tags}).
+    Returns a dict: roots, files (list of {path, root, name, size, mtime_ns, inode, tags, fingerprint}),
+    cache_stats. Tags of a file unchanged since `previous` (same size, mtime, inode) are reused as is;
+    otherwise `cache` (a tag_cache.TagCache) is consulted, and the remaining files are parsed by `jobs`
+    processes. With `fingerprint`, each file also gets an audio fingerprint (tag_scan.audio_fingerprint).
+    Directories are listed through `index` (a dir_index.DirIndex shared by the run) when given.
     """
     result: Dict[str, Any] = {"roots": list(root_paths), "files": []}
+    reuse: Dict[str, Dict[str, Any]] = {}
+    if previous:
+        reuse = {f["full_path"]: f for f in previous.get("files", []) if "mtime_ns" in f}
+    stats = {"reused": 0, "hits": 0, "misses": 0}
+    to_read: List[Dict[str, Any]] = []
+    list_audio = index.iter_audio_files if index is not None else iter_audio_files
     for root in root_paths:
-        if not os.path.isdir(root):
+        if not (index.is_dir(root) if index is not None else os.path.isdir(root)):
             continue
-        for dirpath, _dirnames, filenames in os.walk(root):
-            for name in filenames:
-                if not name.lower().endswith(AUDIO_EXTENSIONS):
-                    continue
-                full = os.path.join(dirpath, name)
-                try:
-                    size = os.path.getsize(full)
-                except OSError:
-                    size = 0
-                rel = os.path.relpath(full, root)
-                tags = _read_file_tags(full)
-                result["files"].append({
-                    "path": rel,
-                    "root": root,
-                    "full_path": full,
-                    "name": name,
-                    "size": size,
-                    "tags": tags,
-                })
+        for full, name, size, mtime_ns, inode in list_audio(root):
+            record = {
+                "path": os.path.relpath(full, root),
+                "root": root,
+                "full_path": full,
+                "name": name,
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "inode": inode,
+                "tags": None,
+                "fingerprint": None,
+            }
+            result["files"].append(record)
+            prev = reuse.get(full)
+            if (prev is not None and (prev["size"], prev["mtime_ns"], prev["inode"]) == (size, mtime_ns, inode)
+                    and (prev.get("fingerprint") or not fingerprint)):
+                record["tags"] = prev.get("tags") or {}
+                record["fingerprint"] = prev.get("fingerprint")
+                stats["reused"] += 1
+                continue
+            cached = cache.get(full, size, mtime_ns, inode, need_fingerprint=fingerprint) if cache is not None else None
+            if cached is not None:
+                record["tags"], record["fingerprint"] = cached
+                stats["hits"] += 1
+            else:
+                to_read.append(record)
+    stats["misses"] = len(to_read)
+    infos = read_files_many([r["full_path"] for r in to_read], jobs=jobs, fingerprint=fingerprint)
+    for record, (tags, fp) in zip(to_read, infos):
+        record["tags"], record["fingerprint"] = tags, fp
+        if cache is not None and record["mtime_ns"]:
+            cache.put(record["full_path"], record["size"], record["mtime_ns"], record["inode"], tags, fp)
+    if cache is not None:
+        cache.flush()
+    result["cache_stats"] = stats
     return result
 
 
@@ -80,68 +93,96 @@ def _track_num(tags: Dict[str, Any]) -> Optional[int]:
         return None
 
 
+def _file_id(f: Dict[str, Any], track: Optional[int]) -> Tuple[Any, ...]:
+    """Identity used to pair renamed/moved files: (root, size, artist, album, track)."""
+    t = f.get("tags") or {}
+    return (f["root"], f["size"], t.get("artist"), t.get("album"), track)
+
+
+def _index_snapshot(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    One pass over a snapshot's files, building every lookup compare_snapshots needs:
+    - by_path: (root, path) -> record
+    - albums: (artist, album) -> {"count": files, "tracks": set of track numbers}
+    - title_tracks: album title -> track number -> set of artists having that track
+    """
+    by_path: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    albums: Dict[Tuple[Optional[str], Optional[str]], Dict[str, Any]] = {}
+    title_tracks: Dict[Optional[str], Dict[int, Set[Optional[str]]]] = defaultdict(dict)
+    for f in snapshot.get("files", []):
+        tn = _track_num(f.get("tags") or {})
+        by_path[(f["root"], f["path"])] = f
+        key = _album_key(f)
+        entry = albums.get(key)
+        if entry is None:
+            entry = albums[key] = {"count": 0, "tracks": set()}
+        entry["count"] += 1
+        if tn is not None:
+            entry["tracks"].add(tn)
+            title_tracks[key[1]].setdefault(tn, set()).add(key[0])
+    return {"by_path": by_path, "albums": albums, "title_tracks": title_tracks}
+
+
+def _pair_renamed(deleted: List[Dict[str, Any]], added: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Pair files whose path disappeared with files whose path appeared: by audio fingerprint first
+    (survives tag rewrites), then by (root, size, artist, album, track) for files without one.
+    Keys map to lists, so duplicates pair one-to-one in walk order instead of collapsing.
+    """
+    pairs: List[Dict[str, Any]] = []
+    keys = (
+        ("fingerprint", lambda f: f.get("fingerprint")),
+        ("identity", lambda f: _file_id(f, _track_num(f.get("tags") or {}))),
+    )
+    for match, key_of in keys:
+        candidates: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+        for af in reversed(added):
+            key = key_of(af)
+            if key is not None:
+                candidates[key].append(af)
+        paired: Set[int] = set()
+        unpaired: List[Dict[str, Any]] = []
+        for bf in deleted:
+            key = key_of(bf)
+            if key is None or not candidates.get(key):
+                unpaired.append(bf)
+                continue
+            af = candidates[key].pop()
+            paired.add(id(af))
+            pairs.append({
+                "old_path": os.path.join(bf["root"], bf["path"]),
+                "new_path": os.path.join(af["root"], af["path"]),
+                "match": match,
+            })
+        deleted = unpaired
+        added = [f for f in added if id(f) not in paired]
+    return pairs
+
+
 def compare_snapshots(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
     """
     Compare before/after snapshots. Returns:
     - albums_changed: list of (artist, album) that have changes
     - files_deleted: list of {path, root, tags}
-    - files_renamed_or_moved: list of {old_path, new_path, ...}
+    - files_renamed_or_moved: list of {old_path, new_path, match ("fingerprint" or "identity")}
     - tags_changed: list of {path, field, old_val, new_val}
     - albums_with_holes: list of {artist, album, before_count, after_count, missing_tracks}
+    Runs in time linear in the number of files (every lookup goes through _index_snapshot).
     """
-    before_files = {(f["root"], f["path"]): f for f in before.get("files", [])}
-    after_files = {(f["root"], f["path"]): f for f in after.get("files", [])}
-    before_by_album: Dict[Tuple[Optional[str], Optional[str]], List[Dict]] = defaultdict(list)
-    after_by_album: Dict[Tuple[Optional[str], Optional[str]], List[Dict]] = defaultdict(list)
-    for f in before.get("files", []):
-        before_by_album[_album_key(f)].append(f)
-    for f in after.get("files", []):
-        after_by_album[_album_key(f)].append(f)
-
-    files_deleted: List[Dict[str, Any]] = []
-    for key in before_files:
-        if key not in after_files:
-            files_deleted.append(before_files[key])
-    files_added: List[Dict[str, Any]] = []
-    for key in after_files:
-        if key not in before_files:
-            files_added.append(after_files[key])
-
-    # Build a simple match by (root, size, artist, album, track) to detect renames/moves
-    def file_id(f: Dict[str, Any]) -> Tuple[Any, ...]:
-        t = f.get("tags") or {}
-        return (f["root"], f["size"], t.get("artist"), t.get("album"), _track_num(t))
-
-    before_by_id: Dict[Tuple, Dict] = {}
-    for f in before.get("files", []):
-        fid = file_id(f)
-        if fid not in before_by_id:
-            before_by_id[fid] = f
-    after_by_id: Dict[Tuple, Dict] = {}
-    for f in after.get("files", []):
-        fid = file_id(f)
-        if fid not in after_by_id:
-            after_by_id[fid] = f
-
-    files_renamed_or_moved: List[Dict[str, Any]] = []
-    matched_after_keys: Set[Tuple[str, str]] = set()
-    for fid, bf in before_by_id.items():
-        if fid in after_by_id:
-            af = after_by_id[fid]
-            bpath = (bf["root"], bf["path"])
-            apath = (af["root"], af["path"])
-            if bpath != apath:
-                files_renamed_or_moved.append({
-                    "old_path": os.path.join(bf["root"], bf["path"]),
-                    "new_path": os.path.join(af["root"], af["path"]),
-                })
-            matched_after_keys.add(apath)
+    bidx = _index_snapshot(before)
+    aidx = _index_snapshot(after)
+    before_files, after_files = bidx["by_path"], aidx["by_path"]
+
+    files_deleted = [f for key, f in before_files.items() if key not in after_files]
+    files_added = [f for key, f in after_files.items() if key not in before_files]
+
+    files_renamed_or_moved = _pair_renamed(files_deleted, files_added)
 
     tags_changed: List[Dict[str, Any]] = []
-    for key in before_files:
-        if key not in after_files:
+    for key, bf in before_files.items():
+        af = after_files.get(key)
+        if af is None:
             continue
-        bf, af = before_files[key], after_files[key]
         bt, at = bf.get("tags") or {}, af.get("tags") or {}
         for field in ("artist", "album", "title", "track"):
             if bt.get(field) != at.get(field):
@@ -153,27 +194,23 @@ def compare_snapshots(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str
                 })
 
     albums_with_holes: List[Dict[str, Any]] = []
-    all_albums = set(before_by_album) | set(after_by_album)
-    for (artist, album) in all_albums:
-        blist = before_by_album.get((artist, album), [])
-        alist = after_by_album.get((artist, album), [])
-        b_tracks = sorted({_track_num(f.get("tags") or {}) for f in blist} - {None})
-        a_tracks = sorted({_track_num(f.get("tags") or {}) for f in alist} - {None})
+    after_albums = aidx["albums"]
+    after_title_tracks = aidx["title_tracks"]
+    empty: Dict[str, Any] = {"count": 0, "tracks": set()}
+    for (artist, album), bentry in bidx["albums"].items():
+        b_tracks = bentry["tracks"]
         if not b_tracks:
             continue
-        before_count = len(blist)
-        after_count = len(alist)
-        if after_count < before_count or (set(a_tracks) != set(b_tracks) and set(a_tracks) < set(b_tracks)):
-            missing = set(b_tracks) - set(a_tracks)
+        aentry = after_albums.get((artist, album), empty)
+        a_tracks = aentry["tracks"]
+        before_count, after_count = bentry["count"], aentry["count"]
+        if after_count < before_count or a_tracks < b_tracks:
+            missing = b_tracks - a_tracks
             # Do not report as hole when missing track numbers reappear under same album, other artist (tag split)
-            other_artist_tracks: Set[int] = set()
-            for (oa, oal) in after_by_album:
-                if oal == album and oa != artist:
-                    for f in after_by_album[(oa, oal)]:
-                        tn = _track_num(f.get("tags") or {})
-                        if tn is not None:
-                            other_artist_tracks.add(tn)
-            if missing and missing <= other_artist_tracks:
+            by_track = after_title_tracks.get(album, {})
+            if missing and all(
+                any(a != artist for a in by_track.get(tn, ())) for tn in missing
+            ):
                 continue
             albums_with_holes.append({
                 "artist": artist,
@@ -208,5 +245,8 @@ def compare_snapshots(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str
             "files_renamed_or_moved_count": len(files_renamed_or_moved),
             "tags_changed_count": len(tags_changed),
             "albums_with_holes_count": len(albums_with_holes),
+            # Tag reads saved by the cache: reused (unchanged since "before"), hits, misses (parsed)
+            "tag_cache_before": before.get("cache_stats"),
+            "tag_cache_after": after.get("cache_stats"),
         },
     }
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Plex scan activity watcher: lets the pipeline wait for the refreshes it sent instead of polling
+the library section XML on a fixed interval.
+
+The watcher subscribes to Plex's /:/websockets/notifications stream (websocket-client, imported
+lazily) and tracks library activities ("started" / "updated" / "ended") of one section. Each
+tracked refresh path is settled when
+  - an activity mentioning it (subtitle = one of its folder names) ended, or
+  - the section is idle and either a scan ran since the refresh was sent, or nothing started
+    within start_grace seconds (Plex skips refreshes of unchanged folders).
+Without websocket-client, or when the connection fails or drops, waiting falls back to polling
+a callable (PlexClient.is_refreshing) with an interval that grows while Plex stays busy.
+"""
+
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Seconds a refresh may take to show up as an activity before it is considered skipped
+START_GRACE_SECONDS = 10.0
+# Polling fallback: first interval, growth factor while scanning, cap
+POLL_MIN_SECONDS = 2.0
+POLL_BACKOFF = 1.5
+POLL_MAX_SECONDS = 30.0
+# Consecutive idle polls before the section is considered done
+POLL_IDLE_CONFIRM = 2
+
+
+def _mentions(path: str, subtitle: str) -> bool:
+    """True when the activity subtitle is the path's folder name or its parent's."""
+    parts = [p for p in path.split("/") if p]
+    return bool(subtitle) and subtitle in parts[-2:]
+
+
+class PlexActivityWatcher:
+    """Scan activity of one library section, from notifications or polling."""
+
+    def __init__(
+        self,
+        host: str,
+        token: str,
+        section: str,
+        poll: Optional[Callable[[], bool]] = None,
+        log: Callable[[str], None] = print,
+        start_grace: float = START_GRACE_SECONDS,
+    ):
+        self.host = host.rstrip("/")
+        self.token = token
+        self.section = str(section)
+        self.poll = poll
+        self.log = log
+        self.start_grace = start_grace
+        self.connected = False
+        self._cond = threading.Condition()
+        self._active: Dict[str, str] = {}
+        self._paths: Dict[str, Dict[str, Any]] = {}
+        self._last_ended = 0.0
+        self._ws = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- notifications stream --------------------------------------------------------------
+
+    def _ws_url(self) -> str:
+        scheme, rest = self.host.split("://", 1) if "://" in self.host else ("http", self.host)
+        return f"{'wss' if scheme == 'https' else 'ws'}://{rest}/:/websockets/notifications"
+
+    def start(self) -> bool:
+        """Connect to the notifications stream; False means waits will poll instead."""
+        try:
+            import websocket
+        except ImportError:
+            self.log("ℹ️ websocket-client not installed, Plex scans will be polled")
+            return False
+        try:
+            ws = websocket.create_connection(self._ws_url(), timeout=10, header=[f"X-Plex-Token: {self.token}"])
+        except Exception as e:
+            self.log(f"ℹ️ Plex notifications unavailable ({e}), Plex scans will be polled")
+            return False
+        ws.settimeout(1.0)
+        self._ws = ws
+        self.connected = True
+        self._thread = threading.Thread(target=self._reader, name="plex-notifications", daemon=True)
+        self._thread.start()
+        return True
+
+    def _reader(self) -> None:
+        import websocket
+        while not self._stop.is_set():
+            try:
+                raw = self._ws.recv()
+            except websocket.WebSocketTimeoutException:
+                continue
+            except Exception as e:
+                if not self._stop.is_set():
+                    self.log(f"ℹ️ Plex notifications closed ({e}), falling back to polling")
+                break
+            if raw:
+                self.handle_message(raw)
+        with self._cond:
+            self.connected = False
+            self._cond.notify_all()
+
+    def handle_message(self, raw: Any) -> None:
+        """Apply one notification (JSON text); non-activity messages are ignored."""
+        try:
+            container = json.loads(raw).get("NotificationContainer") or {}
+        except (ValueError, AttributeError):
+            return
+        for note in container.get("ActivityNotification") or []:
+            self._on_activity(note)
+
+    def _on_activity(self, note: Dict[str, Any]) -> None:
+        activity = note.get("Activity") or {}
+        if not str(activity.get("type", "")).startswith("library."):
+            return
+        section = (activity.get("Context") or {}).get("librarySectionID")
+        if section is not None and str(section) != self.section:
+            return
+        uuid = note.get("uuid") or activity.get("uuid")
+        subtitle = activity.get("subtitle") or ""
+        ended = note.get("event") == "ended"
+        with self._cond:
+            if ended:
+                subtitle = self._active.pop(uuid, subtitle)
+                self._last_ended = time.monotonic()
+            else:
+                self._active[uuid] = subtitle or self._active.get(uuid, "")
+            for path, state in self._paths.items():
+                if _mentions(path, subtitle):
+                    state["seen"] = True
+                    state["ended"] = state["ended"] or ended
+            self._cond.notify_all()
+
+    # -- tracking --------------------------------------------------------------------------
+
+    def track(self, paths: Iterable[str]) -> None:
+        """Register refreshes about to be sent (call before sending so no activity is missed)."""
+        now = time.monotonic()
+        with self._cond:
+            for p in paths:
+                self._paths[p] = {"at": now, "seen": False, "ended": False}
+
+    def _settled(self, path: str, now: float) -> bool:
+        state = self._paths.get(path)
+        if state is None or state["ended"]:
+            return True
+        if self._active:
+            return False
+        return self._last_ended >= state["at"] or now - state["at"] >= self.start_grace
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per tracked path: seen (an activity mentioned it), ended, settled."""
+        now = time.monotonic()
+        with self._cond:
+            return {p: {"seen": s["seen"], "ended": s["ended"], "settled": self._settled(p, now)}
+                    for p, s in self._paths.items()}
+
+    def wait(self, paths: Optional[List[str]] = None, timeout: float = 600) -> bool:
+        """Block until the given tracked paths (default: all) are settled; False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            targets = list(self._paths) if paths is None else list(paths)
+            while self.connected:
+                now = time.monotonic()
+                if all(self._settled(p, now) for p in targets):
+                    for p in targets:
+                        self._paths.pop(p, None)
+                    return True
+                if now >= deadline:
+                    return False
+                # wake up at least every second: the start grace expires without any event
+                self._cond.wait(min(deadline - now, 1.0))
+        return self._poll_wait(deadline - time.monotonic())
+
+    def _poll_wait(self, timeout: float) -> bool:
+        """Poll until the section is idle POLL_IDLE_CONFIRM times in a row (interval grows while busy)."""
+        if self.poll is None:
+            return True
+        deadline = time.monotonic() + max(timeout, 0)
+        interval = POLL_MIN_SECONDS
+        idle = 0
+        while True:
+            try:
+                busy = self.poll()
+            except Exception:
+                busy = False
+            if busy:
+                idle = 0
+                interval = min(interval * POLL_BACKOFF, POLL_MAX_SECONDS)
+                self.log(f"… Plex still scanning, next check in {interval:.0f}s")
+            else:
+                idle += 1
+                interval = POLL_MIN_SECONDS
+                if idle >= POLL_IDLE_CONFIRM:
+                    return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(interval, remaining))
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._ws is not None:
+            try:
+                # close frame without waiting for the reply, then drop the socket (ends recv() at once)
+                self._ws.send_close()
+                self._ws.shutdown()
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=2)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Plex HTTP client used by the pipeline: one keep-alive requests.Session (connection pool sized
+to the concurrency), partial-scan refreshes sent by a bounded thread pool, retries with
+exponential backoff and jitter, and a latency record of every request for the run report.
+
+Refresh paths are coalesced before sending: duplicates and paths below another requested path
+are dropped, and with min_siblings, that many sibling paths collapse into one refresh of their
+common parent.
+"""
+
+import posixpath
+import random
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Parallel refresh requests sent to Plex
+DEFAULT_CONCURRENCY = 4
+# Attempts per request; waits grow as retry_interval * 2**n (capped), with jitter
+DEFAULT_ATTEMPTS = 3
+MAX_BACKOFF_SECONDS = 60.0
+# Status codes worth retrying (anything else non-2xx is a permanent failure)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def coalesce_paths(paths: Iterable[str], min_siblings: int = 0) -> Dict[str, List[str]]:
+    """
+    Map each refresh root to the requested paths it covers. Duplicates and paths below another
+    requested path are folded into it; with min_siblings > 0, groups of at least that many
+    siblings are folded into their parent (one level).
+    """
+    # Sorting by components puts every path right after its nearest requested ancestor
+    unique = sorted({p.rstrip("/") or "/" for p in paths}, key=lambda p: p.split("/"))
+    roots: Dict[str, List[str]] = {}
+    last = None
+    for p in unique:
+        if last is not None and p.startswith(last.rstrip("/") + "/"):
+            roots[last].append(p)
+        else:
+            roots[p] = [p]
+            last = p
+    if min_siblings <= 0:
+        return roots
+    by_parent: Dict[str, List[str]] = {}
+    for r in roots:
+        by_parent.setdefault(posixpath.dirname(r), []).append(r)
+    out: Dict[str, List[str]] = {}
+    for parent, children in by_parent.items():
+        if len(children) >= min_siblings and parent not in ("", "/"):
+            out[parent] = [p for c in children for p in roots[c]]
+        else:
+            for c in children:
+                out[c] = roots[c]
+    return out
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+class PlexClient:
+    """Pooled client for one Plex library section."""
+
+    def __init__(
+        self,
+        host: str,
+        token: str,
+        section: str,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        retry_interval: float = 5,
+        attempts: int = DEFAULT_ATTEMPTS,
+        log: Callable[[str], None] = print,
+    ):
+        self.host = host.rstrip("/")
+        self.section = str(section)
+        self.concurrency = max(1, int(concurrency))
+        self.retry_interval = float(retry_interval)
+        self.attempts = max(1, int(attempts))
+        self.log = log
+        self.session = requests.Session()
+        self.session.headers["X-Plex-Token"] = token
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._records: List[Dict[str, Any]] = []
+        self._records_lock = threading.Lock()
+
+    # -- transport -------------------------------------------------------------------------
+
+    def _backoff(self, attempt: int) -> float:
+        """Wait before retry number attempt (1-based): half fixed, half random."""
+        delay = min(MAX_BACKOFF_SECONDS, self.retry_interval * (2 ** (attempt - 1)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _request(self, op: str, method: str, path: str, timeout: float = 30,
+                 label: str = "") -> Optional[requests.Response]:
+        """Send with retries; returns the final response (None if every attempt raised)."""
+        url = f"{self.host}{path}"
+        response: Optional[requests.Response] = None
+        error = None
+        t0 = time.perf_counter()
+        attempt = 0
+        for attempt in range(1, self.attempts + 1):
+            try:
+                response = self.session.request(method, url, timeout=timeout)
+                error = None
+                if response.status_code not in RETRY_STATUSES:
+                    break
+                self.log(f"✘ Plex returned {response.status_code} on attempt {attempt} for {label or path}")
+            except requests.RequestException as e:
+                response, error = None, e
+                self.log(f"✘ Plex exception on attempt {attempt} for {label or path}: {e}")
+            if attempt < self.attempts:
+                time.sleep(self._backoff(attempt))
+        with self._records_lock:
+            self._records.append({
+                "op": op,
+                "target": label or path,
+                "status": response.status_code if response is not None else None,
+                "error": str(error) if error else None,
+                "attempts": attempt,
+                "seconds": round(time.perf_counter() - t0, 4),
+            })
+        return response
+
+    # -- Plex operations -------------------------------------------------------------------
+
+    def refresh(self, path: str) -> bool:
+        """Partial scan of one library path."""
+        r = self._request("refresh", "GET",
+                          f"/library/sections/{self.section}/refresh?path={quote(path, safe='/')}", label=path)
+        if r is not None and r.status_code == 200:
+            self.log(f"✔ Plex accepted refresh for {path}")
+            return True
+        if r is not None and r.status_code not in RETRY_STATUSES:
+            self.log(f"✘ Plex returned {r.status_code} for {path}")
+        self.log(f"⚠️ Giving up Plex refresh for {path}")
+        return False
+
+    def refresh_many(self, paths: Iterable[str], min_siblings: int = 0) -> Dict[str, bool]:
+        """
+        Coalesce paths (see coalesce_paths) and refresh the roots concurrently.
+        Returns {requested path: accepted} (a path is accepted when the root covering it was).
+        """
+        return self.refresh_plan(coalesce_paths(paths, min_siblings))
+
+    def refresh_plan(self, roots: Dict[str, List[str]]) -> Dict[str, bool]:
+        """Refresh each root of {root: [covered paths]} concurrently; returns {covered path: accepted}."""
+        if not roots:
+            return {}
+        if len(roots) == 1 or self.concurrency == 1:
+            ok = {root: self.refresh(root) for root in roots}
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(roots)),
+                                    thread_name_prefix="plex") as pool:
+                ok = dict(zip(roots, pool.map(self.refresh, roots)))
+        return {p: ok[root] for root, covered in roots.items() for p in covered}
+
+    def is_refreshing(self) -> bool:
+        """True while the library section is scanning."""
+        r = self._request("section", "GET", f"/library/sections/{self.section}", timeout=10)
+        if r is None or r.status_code != 200:
+            return False
+        try:
+            return ET.fromstring(r.content).attrib.get("refreshing") == "1"
+        except ET.ParseError:
+            return False
+
+    def empty_trash(self) -> bool:
+        r = self._request("empty_trash", "PUT", f"/library/sections/{self.section}/emptyTrash")
+        if r is not None and r.status_code in (200, 204):
+            self.log("✔ Plex trash emptied")
+            return True
+        if r is not None:
+            self.log(f"✘ Plex emptyTrash returned {r.status_code}: {r.text}")
+        return False
+
+    # -- report ----------------------------------------------------------------------------
+
+    def records(self) -> List[Dict[str, Any]]:
+        with self._records_lock:
+            return list(self._records)
+
+    def report(self) -> Dict[str, Any]:
+        """Per-operation request count, failures, retries and latency percentiles (seconds)."""
+        by_op: Dict[str, List[Dict[str, Any]]] = {}
+        for rec in self.records():
+            by_op.setdefault(rec["op"], []).append(rec)
+        ops = {}
+        for op, recs in by_op.items():
+            secs = sorted(r["seconds"] for r in recs)
+            ops[op] = {
+                "requests": len(recs),
+                "failed": sum(1 for r in recs if r["status"] is None or r["status"] >= 400),
+                "retries": sum(r["attempts"] - 1 for r in recs),
+                "total_seconds": round(sum(secs), 3),
+                "p50_seconds": _percentile(secs, 50),
+                "p95_seconds": _percentile(secs, 95),
+                "max_seconds": secs[-1],
+            }
+        return {"requests": sum(o["requests"] for o in ops.values()), "ops": ops}
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Plex refresh planner: turns the album directories touched by a run into a small set of
+partial-scan roots. Changed paths are inserted in a prefix tree (one node per path component
+below a library floor); walking it bottom-up, a directory replaces the refreshes planned below
+it when
+  - at least fan_out refreshes would be saved (they collapse into one), and
+  - scanning it stays cheap: its entries on disk <= max_cost x its changed entries
+    (a directory where 3 of 300 artists changed is not worth a full scan).
+The floor itself (library root) is never refreshed as a whole.
+"""
+
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Refreshes that must collapse into one before a parent directory is scanned instead
+DEFAULT_FAN_OUT = 8
+# Max ratio of directory entries to changed entries for that parent scan
+DEFAULT_MAX_COST = 4.0
+
+# Marks a requested path in the prefix tree (never a valid path component)
+_REQUESTED = ""
+
+
+def dir_width(path: str) -> Optional[int]:
+    """Entries directly under path (what a partial scan of it lists); None if unreadable."""
+    try:
+        with os.scandir(path) as it:
+            return sum(1 for _ in it)
+    except OSError:
+        return None
+
+
+def plan_refresh_roots(
+    paths: Iterable[str],
+    floor: str,
+    fan_out: int = DEFAULT_FAN_OUT,
+    max_cost: float = DEFAULT_MAX_COST,
+    width: Optional[Callable[[str], Optional[int]]] = dir_width,
+) -> Dict[str, List[str]]:
+    """
+    Map each refresh root to the requested paths it covers (sorted). Paths are "/"-separated,
+    under floor; paths outside it are kept as their own roots. width(dir) gives the entries of a
+    candidate parent; with width=None only the fan-out rule applies.
+    """
+    floor = floor.rstrip("/")
+    trie: Dict[str, Any] = {}
+    plan: Dict[str, List[str]] = {}
+    for p in sorted({p.rstrip("/") for p in paths if p}):
+        if not p.startswith(floor + "/"):
+            plan.setdefault(p, []).append(p)
+            continue
+        node = trie
+        for part in p[len(floor) + 1:].split("/"):
+            node = node.setdefault(part, {})
+        node[_REQUESTED] = p
+
+    def covered(node: Dict[str, Any]) -> List[str]:
+        out = [node[_REQUESTED]] if _REQUESTED in node else []
+        for name, child in node.items():
+            if name != _REQUESTED:
+                out.extend(covered(child))
+        return out
+
+    def visit(node: Dict[str, Any], path: str) -> Dict[str, List[str]]:
+        if _REQUESTED in node:
+            # a requested directory is scanned whole: its requested descendants come for free
+            return {path: sorted(covered(node))}
+        below: Dict[str, List[str]] = {}
+        for name, child in node.items():
+            below.update(visit(child, f"{path}/{name}"))
+        if path == floor or len(below) < fan_out:
+            return below
+        changed = len(node)
+        entries = width(path) if width is not None else changed
+        if entries is None or entries > changed * max_cost:
+            return below
+        return {path: sorted(p for ps in below.values() for p in ps)}
+
+    plan.update(visit(trie, floor))
+    return plan
+
+
+def describe_plan(plan: Dict[str, List[str]]) -> Dict[str, Any]:
+    """JSON view of a plan: {requested, requests, roots: [{path, covers}]}."""
+    return {
+        "requested": sum(len(v) for v in plan.values()),
+        "requests": len(plan),
+        "roots": [{"path": root, "covers": len(v)} for root, v in sorted(plan.items())],
+    }
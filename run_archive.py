@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compressed storage of finished runs' logs and audits (data/run_logs), referenced from the runs
+table instead of TEXT blobs so runs.db only holds metadata.
+
+- log / container log: <job_id>.<kind>.jsonl.gz, one JSON string per line (same offsets as the
+  live job stream, multi-line entries included)
+- audit report: <job_id>.audit.json.gz
+Files are written to a temporary name then renamed, and read back by streaming decompression.
+"""
+
+import gzip
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+_APP_DIR = Path(__file__).resolve().parent
+DATA_DIR = os.environ.get("AUTOKONG_DATA_DIR", str(_APP_DIR / "data"))
+RUN_LOGS_DIR = os.path.join(DATA_DIR, "run_logs")
+
+# Uncompressed bytes per chunk when streaming an archived document
+STREAM_CHUNK = 64 * 1024
+
+
+def _path(ref: str, archive_dir: str = RUN_LOGS_DIR) -> str:
+    # refs are bare file names; never let one escape the archive directory
+    return os.path.join(archive_dir, os.path.basename(ref))
+
+
+def _write(name: str, chunks: Iterable[str], archive_dir: str) -> str:
+    os.makedirs(archive_dir, exist_ok=True)
+    path = _path(name, archive_dir)
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp, path)
+    return name
+
+
+def write_lines(job_id: str, kind: str, lines: Iterable[str], archive_dir: str = RUN_LOGS_DIR) -> Tuple[str, int]:
+    """Store lines as <job_id>.<kind>.jsonl.gz; returns (ref, line count)."""
+    count = 0
+
+    def encoded() -> Iterator[str]:
+        nonlocal count
+        for line in lines:
+            count += 1
+            yield json.dumps(line) + "\n"
+
+    ref = _write(f"{job_id}.{kind}.jsonl.gz", encoded(), archive_dir)
+    return ref, count
+
+
+def write_json(job_id: str, kind: str, document: Any, archive_dir: str = RUN_LOGS_DIR) -> str:
+    """Store a JSON document as <job_id>.<kind>.json.gz; returns its ref."""
+    return _write(f"{job_id}.{kind}.json.gz", [json.dumps(document)], archive_dir)
+
+
+def iter_lines(ref: str, archive_dir: str = RUN_LOGS_DIR) -> Iterator[str]:
+    with gzip.open(_path(ref, archive_dir), "rt", encoding="utf-8") as f:
+        for raw in f:
+            yield json.loads(raw)
+
+
+def iter_json_chunks(ref: str, archive_dir: str = RUN_LOGS_DIR) -> Iterator[bytes]:
+    """Decompressed JSON document, chunk by chunk (for a streamed HTTP response)."""
+    with gzip.open(_path(ref, archive_dir), "rb") as f:
+        while True:
+            chunk = f.read(STREAM_CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+
+def read_json(ref: str, archive_dir: str = RUN_LOGS_DIR) -> Any:
+    with gzip.open(_path(ref, archive_dir), "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def exists(ref: Optional[str], archive_dir: str = RUN_LOGS_DIR) -> bool:
+    return bool(ref) and os.path.isfile(_path(ref, archive_dir))
+
+
+def remove(refs: Iterable[Optional[str]], archive_dir: str = RUN_LOGS_DIR) -> int:
+    removed = 0
+    for ref in refs:
+        if not ref:
+            continue
+        try:
+            os.remove(_path(ref, archive_dir))
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+class ArchivedLines:
+    """
+    Read-only line source over an archived log, with the LineBuffer interface (total, read, close)
+    used by job_events.JobStream. Sequential reads continue from the current decompression
+    position; reading backwards reopens the file.
+    """
+
+    def __init__(self, ref: Optional[str], total: int, archive_dir: str = RUN_LOGS_DIR) -> None:
+        self.ref = ref if exists(ref, archive_dir) else None
+        self.total = total if self.ref else 0
+        self.archive_dir = archive_dir
+        self.spill_path = None
+        self._it: Optional[Iterator[str]] = None
+        self._pos = 0
+
+    def read(self, offset: int = 0, limit: Optional[int] = None) -> List[str]:
+        end = self.total if limit is None else min(self.total, offset + limit)
+        if offset >= end:
+            return []
+        if self._it is None or offset < self._pos:
+            self._it = iter_lines(self.ref, self.archive_dir)
+            self._pos = 0
+        out: List[str] = []
+        for line in self._it:
+            self._pos += 1
+            if self._pos > offset:
+                out.append(line)
+                if self._pos >= end:
+                    break
+        return out
+
+    def close(self) -> None:
+        self._it = None
+
+
+def orphan_files(referenced: Iterable[str], archive_dir: str = RUN_LOGS_DIR,
+                 min_age_seconds: float = 3600) -> List[str]:
+    """Archive files no runs row references (older than min_age_seconds, so in-flight writes are kept)."""
+    if not os.path.isdir(archive_dir):
+        return []
+    keep = set(referenced)
+    now = time.time()
+    orphans = []
+    for name in os.listdir(archive_dir):
+        path = os.path.join(archive_dir, name)
+        if name in keep or now - os.path.getmtime(path) < min_age_seconds:
+            continue
+        orphans.append(name)
+    return orphans
+
+
+def archive_size(archive_dir: str = RUN_LOGS_DIR) -> Dict[str, int]:
+    if not os.path.isdir(archive_dir):
+        return {"files": 0, "bytes": 0}
+    names = os.listdir(archive_dir)
+    return {"files": len(names), "bytes": sum(os.path.getsize(os.path.join(archive_dir, n)) for n in names)}
@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-step resource and timing metrics of pipeline runs, stored in runs.db.
+
+For every node of a run's step graph (one SongKong pass of one folder, an autoclean, the Plex
+steps), NodeMeter records its wall time, CPU seconds, peak memory, bytes read and written and the
+tracks of its folder:
+  - SongKong passes run in containers: ContainerSampler polls the pass container every
+    SAMPLE_INTERVAL seconds, from its cgroup files (cgroup v2 or v1, under CGROUP_ROOT) when the
+    host's cgroup tree is visible, else from `docker stats`. In exec mode the worker container is
+    long-lived, so its counters are taken as differences from the first sample.
+  - Steps running inside this process (autoclean, Plex requests) count the CPU time and storage
+    bytes of their own thread (time.thread_time, /proc/thread-self/io); no memory figure.
+Plex request latencies come from the run's PlexClient report (per operation).
+
+Tables (created by init_tables, written by store_run):
+  run_steps(run_id, node, step, folder, status, started_at, wall_seconds, cpu_seconds,
+            mem_peak_bytes, read_bytes, write_bytes, tracks, source)
+  run_plex_requests(run_id, op, requests, failed, retries, total_seconds, p50_seconds,
+                    p95_seconds, max_seconds)
+
+prometheus_text() renders the Prometheus text exposition served at /api/metrics (totals per step
+over all runs, the last run per step, Plex latencies); series() the per-run JSON of the history
+performance chart.
+
+Usage:
+  python3 run_metrics.py prometheus
+  python3 run_metrics.py series [--runs 30]
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_APP_DIR = Path(__file__).resolve().parent
+DATA_DIR = os.environ.get("AUTOKONG_DATA_DIR", str(_APP_DIR / "data"))
+RUNS_DB_PATH = os.path.join(DATA_DIR, "runs.db")
+
+# Host cgroup tree (mount it read-only into the Autokong container to get exact counters)
+CGROUP_ROOT = os.environ.get("AUTOKONG_CGROUP_ROOT", "/sys/fs/cgroup")
+# Seconds between two samples of a pass container
+SAMPLE_INTERVAL = float(os.environ.get("AUTOKONG_METRICS_INTERVAL", "5"))
+
+_SIZE_UNITS = {
+    "b": 1, "kb": 1000, "mb": 1000 ** 2, "gb": 1000 ** 3, "tb": 1000 ** 4,
+    "kib": 1024, "mib": 1024 ** 2, "gib": 1024 ** 3, "tib": 1024 ** 4,
+}
+_SIZE_RE = re.compile(r"^\s*([\d.]+)\s*([a-zA-Z]*)\s*$")
+
+# Record fields summed over the parts of a node (container passes, thread usage); memory is a max
+_SUMMED = ("cpu_seconds", "read_bytes", "write_bytes")
+
+# (metric suffix, run_steps column, help) of the per-step counters
+_STEP_COUNTERS = (
+    ("wall_seconds", "wall_seconds", "Wall time of the step, summed over its nodes"),
+    ("cpu_seconds", "cpu_seconds", "CPU time of the step (containers and in-process work)"),
+    ("read_bytes", "read_bytes", "Bytes read from storage by the step"),
+    ("write_bytes", "write_bytes", "Bytes written to storage by the step"),
+    ("tracks", "tracks", "Tracks in the folders the step processed"),
+)
+
+
+def parse_size(text: str) -> Optional[int]:
+    """Bytes of a `docker stats` size ("12.5MiB", "3kB", "0B"); None if unreadable."""
+    m = _SIZE_RE.match(text or "")
+    if not m:
+        return None
+    factor = _SIZE_UNITS.get(m.group(2).lower() or "b")
+    return int(float(m.group(1)) * factor) if factor else None
+
+
+def _read_int(path: str) -> Optional[int]:
+    try:
+        with open(path, encoding="ascii") as f:
+            return int(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _read_keyed(path: str) -> Dict[str, int]:
+    """Lines "key value" (cpu.stat, /proc/*/io with "key: value") as a dict."""
+    out: Dict[str, int] = {}
+    try:
+        with open(path, encoding="ascii") as f:
+            for line in f:
+                parts = line.replace(":", " ").split()
+                if len(parts) == 2 and parts[1].isdigit():
+                    out[parts[0]] = int(parts[1])
+    except OSError:
+        pass
+    return out
+
+
+def _io_v2(path: str) -> Tuple[int, int]:
+    """(rbytes, wbytes) summed over the devices of a cgroup v2 io.stat."""
+    read = written = 0
+    try:
+        with open(path, encoding="ascii") as f:
+            for line in f:
+                for field in line.split()[1:]:
+                    key, _, value = field.partition("=")
+                    if key == "rbytes":
+                        read += int(value)
+                    elif key == "wbytes":
+                        written += int(value)
+    except (OSError, ValueError):
+        pass
+    return read, written
+
+
+def _io_v1(path: str) -> Tuple[int, int]:
+    """(Read, Write) bytes summed over the devices of a cgroup v1 blkio.throttle.io_service_bytes."""
+    read = written = 0
+    try:
+        with open(path, encoding="ascii") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[1] in ("Read", "Write"):
+                    if parts[1] == "Read":
+                        read += int(parts[2])
+                    else:
+                        written += int(parts[2])
+    except (OSError, ValueError):
+        pass
+    return read, written
+
+
+class ContainerSampler:
+    """
+    Background sampling of one container while a pass runs. start() then stop() -> usage record
+    {cpu_seconds, mem_peak_bytes, read_bytes, write_bytes, samples, source}. fresh: the container
+    is created for the pass (docker run), its counters start at zero.
+    """
+
+    def __init__(self, name: str, fresh: bool = True, interval: float = SAMPLE_INTERVAL):
+        self.name = name
+        self.fresh = fresh
+        self.interval = max(0.5, interval)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._id: Optional[str] = None
+        self._cgroup: Optional[Tuple[str, Dict[str, str]]] = None
+        self._first: Optional[Tuple[float, int, int]] = None
+        self._last: Optional[Tuple[float, int, int]] = None
+        self._cpu_integrated = 0.0
+        self._last_at: Optional[float] = None
+        self._mem_peak = 0
+        self._samples = 0
+        self._source = ""
+
+    def start(self) -> "ContainerSampler":
+        self._thread = threading.Thread(target=self._run, name=f"metrics-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Dict[str, Any]:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+        return self.usage()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.sample()
+            except Exception:
+                pass
+            if self._stop.wait(self.interval):
+                return
+
+    def _container_id(self) -> Optional[str]:
+        if self._id is None:
+            try:
+                out = subprocess.run(["docker", "inspect", "-f", "{{.Id}}", self.name],
+                                     capture_output=True, text=True, timeout=10)
+            except (OSError, subprocess.SubprocessError):
+                return None
+            if out.returncode == 0 and out.stdout.strip():
+                self._id = out.stdout.strip()
+        return self._id
+
+    def _cgroup_files(self, cid: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        """("v2" | "v1", {cpu, mem, io: path}) of the container's cgroup, if visible from here."""
+        for base in (f"system.slice/docker-{cid}.scope", f"docker/{cid}"):
+            d = os.path.join(CGROUP_ROOT, base)
+            if os.path.exists(os.path.join(d, "cpu.stat")):
+                return "v2", {"cpu": os.path.join(d, "cpu.stat"), "mem": os.path.join(d, "memory.current"),
+                              "io": os.path.join(d, "io.stat")}
+        for rel in (f"docker/{cid}", f"system.slice/docker-{cid}.scope"):
+            cpu = os.path.join(CGROUP_ROOT, "cpuacct", rel, "cpuacct.usage")
+            if os.path.exists(cpu):
+                return "v1", {
+                    "cpu": cpu,
+                    "mem": os.path.join(CGROUP_ROOT, "memory", rel, "memory.usage_in_bytes"),
+                    "io": os.path.join(CGROUP_ROOT, "blkio", rel, "blkio.throttle.io_service_bytes"),
+                }
+        return None
+
+    def _read_cgroup(self) -> Optional[Tuple[float, int, int, int]]:
+        version, files = self._cgroup
+        if version == "v2":
+            usec = _read_keyed(files["cpu"]).get("usage_usec")
+            if usec is None:
+                return None
+            read, written = _io_v2(files["io"])
+            return usec / 1e6, _read_int(files["mem"]) or 0, read, written
+        ns = _read_int(files["cpu"])
+        if ns is None:
+            return None
+        read, written = _io_v1(files["io"])
+        return ns / 1e9, _read_int(files["mem"]) or 0, read, written
+
+    def _read_docker_stats(self) -> Optional[Tuple[float, int, int, int]]:
+        try:
+            out = subprocess.run(["docker", "stats", "--no-stream", "--format", "{{json .}}", self.name],
+                                 capture_output=True, text=True, timeout=30)
+        except (OSError, subprocess.SubprocessError):
+            return None
+        if out.returncode != 0 or not out.stdout.strip():
+            return None
+        try:
+            stats = json.loads(out.stdout.strip().splitlines()[0])
+            cpu_pct = float(str(stats.get("CPUPerc", "0")).rstrip("%") or 0)
+        except ValueError:
+            return None
+        mem = parse_size(str(stats.get("MemUsage", "")).split("/")[0]) or 0
+        block = str(stats.get("BlockIO", "")).split("/")
+        read = parse_size(block[0]) or 0
+        written = parse_size(block[1]) if len(block) > 1 else 0
+        # docker stats gives a CPU rate: integrate it over the time since the previous sample
+        now = time.monotonic()
+        if self._last_at is not None:
+            self._cpu_integrated += cpu_pct / 100.0 * (now - self._last_at)
+        self._last_at = now
+        return self._cpu_integrated, mem, read, written or 0
+
+    def sample(self) -> bool:
+        """Take one sample; False while the container does not exist (yet)."""
+        cid = self._container_id()
+        if cid is None:
+            return False
+        if self._cgroup is None and self._source != "docker_stats":
+            self._cgroup = self._cgroup_files(cid)
+        values = None
+        if self._cgroup is not None:
+            values = self._read_cgroup()
+            self._source = f"cgroup_{self._cgroup[0]}"
+        if values is None:
+            self._cgroup = None
+            self._source = "docker_stats"
+            values = self._read_docker_stats()
+        if values is None:
+            return False
+        cpu, mem, read, written = values
+        self._mem_peak = max(self._mem_peak, mem)
+        if self._first is None:
+            self._first = (0.0, 0, 0) if self.fresh else (cpu, read, written)
+        self._last = (cpu, read, written)
+        self._samples += 1
+        return True
+
+    def usage(self) -> Dict[str, Any]:
+        if self._first is None or self._last is None:
+            return {"cpu_seconds": None, "mem_peak_bytes": None, "read_bytes": None, "write_bytes": None,
+                    "samples": 0, "source": None}
+        return {
+            "cpu_seconds": round(max(0.0, self._last[0] - self._first[0]), 3),
+            "mem_peak_bytes": self._mem_peak or None,
+            "read_bytes": max(0, self._last[1] - self._first[1]),
+            "write_bytes": max(0, self._last[2] - self._first[2]),
+            "samples": self._samples,
+            "source": self._source,
+        }
+
+
+def _thread_usage() -> Tuple[float, Optional[int], Optional[int]]:
+    """(CPU seconds, storage bytes read, written) of the calling thread so far."""
+    io = _read_keyed("/proc/thread-self/io")
+    return time.thread_time(), io.get("read_bytes"), io.get("write_bytes")
+
+
+def _merge(record: Dict[str, Any], usage: Dict[str, Any]) -> None:
+    for key in _SUMMED:
+        if usage.get(key) is not None:
+            record[key] = (record.get(key) or 0) + usage[key]
+    if usage.get("mem_peak_bytes") is not None:
+        record["mem_peak_bytes"] = max(record.get("mem_peak_bytes") or 0, usage["mem_peak_bytes"])
+    if usage.get("source"):
+        record["source"] = usage["source"]
+
+
+_current = threading.local()
+
+
+@contextmanager
+def sample_container(name: str, fresh: bool = True) -> Iterator[None]:
+    """Sample container name for the duration of the block, on behalf of the node the thread measures (if any)."""
+    record = getattr(_current, "record", None)
+    if record is None:
+        yield
+        return
+    sampler = ContainerSampler(name, fresh).start()
+    try:
+        yield
+    finally:
+        _merge(record, sampler.stop())
+
+
+class NodeMeter:
+    """Resource records of the nodes of one run, keyed by graph node."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records: Dict[str, Dict[str, Any]] = {}
+
+    @contextmanager
+    def measure(self, key: str) -> Iterator[None]:
+        """Measure the block as node key: this thread's usage plus the containers it samples."""
+        record: Dict[str, Any] = {"source": "process"}
+        cpu0, read0, write0 = _thread_usage()
+        _current.record = record
+        try:
+            yield
+        finally:
+            _current.record = None
+            cpu1, read1, write1 = _thread_usage()
+            _merge(record, {
+                "cpu_seconds": round(cpu1 - cpu0, 3),
+                "read_bytes": read1 - read0 if read0 is not None and read1 is not None else None,
+                "write_bytes": write1 - write0 if write0 is not None and write1 is not None else None,
+            })
+            with self._lock:
+                self._records[key] = record
+
+    def records(self, timings: List[Dict[str, Any]], started_at: datetime,
+                nodes: Dict[str, Tuple[str, str, int]]) -> List[Dict[str, Any]]:
+        """
+        One record per node that ran: graph timings (step_graph.StepGraph.timings()) joined with the
+        measured usage; nodes maps key -> (step, folder, tracks). started_at: wall clock of graph start.
+        """
+        out = []
+        with self._lock:
+            measured = dict(self._records)
+        for t in timings:
+            if t["start"] is None:
+                continue
+            step, folder, tracks = nodes.get(t["node"], (t["node"], "", 0))
+            usage = measured.get(t["node"], {})
+            out.append({
+                "node": t["node"],
+                "step": step,
+                "folder": folder,
+                "status": t["status"],
+                "started_at": datetime.fromtimestamp(started_at.timestamp() + t["start"]).isoformat(timespec="seconds"),
+                "wall_seconds": t["seconds"],
+                "cpu_seconds": usage.get("cpu_seconds"),
+                "mem_peak_bytes": usage.get("mem_peak_bytes"),
+                "read_bytes": usage.get("read_bytes"),
+                "write_bytes": usage.get("write_bytes"),
+                "tracks": tracks,
+                "source": usage.get("source"),
+            })
+        return out
+
+
+# --- Storage and exposition (runs.db) ---
+
+def init_tables(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS run_steps (
+            run_id TEXT NOT NULL,
+            node TEXT NOT NULL,
+            step TEXT NOT NULL,
+            folder TEXT NOT NULL DEFAULT '',
+            status TEXT,
+            started_at TEXT,
+            wall_seconds REAL,
+            cpu_seconds REAL,
+            mem_peak_bytes INTEGER,
+            read_bytes INTEGER,
+            write_bytes INTEGER,
+            tracks INTEGER,
+            source TEXT,
+            PRIMARY KEY (run_id, node)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS run_plex_requests (
+            run_id TEXT NOT NULL,
+            op TEXT NOT NULL,
+            requests INTEGER,
+            failed INTEGER,
+            retries INTEGER,
+            total_seconds REAL,
+            p50_seconds REAL,
+            p95_seconds REAL,
+            max_seconds REAL,
+            PRIMARY KEY (run_id, op)
+        ) WITHOUT ROWID
+    """)
+    conn.commit()
+
+
+def store_run(conn: sqlite3.Connection, run_id: str, steps: List[Dict[str, Any]],
+              plex: Optional[Dict[str, Any]]) -> None:
+    """Rows of one run: steps from NodeMeter.records(), plex the PlexClient report (or None)."""
+    conn.executemany(
+        """INSERT OR REPLACE INTO run_steps (run_id, node, step, folder, status, started_at, wall_seconds,
+           cpu_seconds, mem_peak_bytes, read_bytes, write_bytes, tracks, source)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        [(run_id, s["node"], s["step"], s.get("folder") or "", s.get("status"), s.get("started_at"),
+          s.get("wall_seconds"), s.get("cpu_seconds"), s.get("mem_peak_bytes"), s.get("read_bytes"),
+          s.get("write_bytes"), s.get("tracks"), s.get("source")) for s in steps],
+    )
+    ops = (plex or {}).get("ops") or {}
+    conn.executemany(
+        """INSERT OR REPLACE INTO run_plex_requests (run_id, op, requests, failed, retries, total_seconds,
+           p50_seconds, p95_seconds, max_seconds) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        [(run_id, op, o.get("requests"), o.get("failed"), o.get("retries"), o.get("total_seconds"),
+          o.get("p50_seconds"), o.get("p95_seconds"), o.get("max_seconds")) for op, o in ops.items()],
+    )
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _sample(name: str, labels: Dict[str, str], value: Any) -> str:
+    inner = ",".join(f'{k}="{_label(v)}"' for k, v in labels.items())
+    number = str(value) if isinstance(value, int) else repr(float(value))
+    return f"{name}{{{inner}}} {number}" if inner else f"{name} {number}"
+
+
+def prometheus_text(conn: sqlite3.Connection, running: bool = False) -> str:
+    """Prometheus text exposition (version 0.0.4) of the stored runs."""
+    lines: List[str] = []
+
+    def family(name: str, kind: str, help_text: str, samples: List[Tuple[Dict[str, str], Any]]) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(_sample(name, labels, value) for labels, value in samples if value is not None)
+
+    runs = conn.execute("SELECT status, COUNT(*), COALESCE(SUM(duration_seconds), 0) FROM runs GROUP BY status").fetchall()
+    family("autokong_runs_total", "counter", "Finished pipeline runs by status",
+           [({"status": status}, count) for status, count, _ in runs])
+    family("autokong_run_seconds_total", "counter", "Duration of finished pipeline runs",
+           [({"status": status}, secs) for status, _, secs in runs])
+    family("autokong_run_in_progress", "gauge", "1 while a pipeline run is in progress", [({}, int(running))])
+    last = conn.execute(
+        "SELECT id, duration_seconds, finished_at FROM runs WHERE finished_at IS NOT NULL ORDER BY started_at DESC LIMIT 1"
+    ).fetchone()
+    if last is not None:
+        finished = datetime.fromisoformat(last[2].rstrip("Z")).replace(tzinfo=timezone.utc) if last[2] else None
+        family("autokong_last_run_duration_seconds", "gauge", "Duration of the last finished run", [({}, last[1])])
+        family("autokong_last_run_timestamp_seconds", "gauge", "End of the last finished run (Unix time, UTC)",
+               [({}, finished.timestamp() if finished else None)])
+
+    totals = conn.execute(
+        """SELECT step, COUNT(*), SUM(wall_seconds), SUM(cpu_seconds), SUM(read_bytes), SUM(write_bytes),
+           SUM(tracks), MAX(mem_peak_bytes) FROM run_steps GROUP BY step ORDER BY step"""
+    ).fetchall()
+    family("autokong_step_runs_total", "counter", "Graph nodes run per step (one per folder for SongKong passes)",
+           [({"step": r[0]}, r[1]) for r in totals])
+    for i, (suffix, _column, help_text) in enumerate(_STEP_COUNTERS):
+        family(f"autokong_step_{suffix}_total", "counter", help_text, [({"step": r[0]}, r[2 + i]) for r in totals])
+    family("autokong_step_memory_peak_bytes", "gauge", "Highest container memory seen for the step",
+           [({"step": r[0]}, r[7]) for r in totals])
+
+    if last is not None:
+        per_step = conn.execute(
+            """SELECT step, SUM(wall_seconds), SUM(cpu_seconds), MAX(mem_peak_bytes), SUM(tracks)
+               FROM run_steps WHERE run_id = ? GROUP BY step ORDER BY step""", (last[0],)
+        ).fetchall()
+        family("autokong_last_run_step_wall_seconds", "gauge", "Wall time per step in the last run",
+               [({"step": r[0]}, r[1]) for r in per_step])
+        family("autokong_last_run_step_cpu_seconds", "gauge", "CPU time per step in the last run",
+               [({"step": r[0]}, r[2]) for r in per_step])
+        family("autokong_last_run_step_memory_peak_bytes", "gauge", "Peak container memory per step in the last run",
+               [({"step": r[0]}, r[3]) for r in per_step])
+        family("autokong_last_run_step_tracks", "gauge", "Tracks processed per step in the last run",
+               [({"step": r[0]}, r[4]) for r in per_step])
+
+    plex_totals = conn.execute(
+        "SELECT op, SUM(requests), SUM(failed), SUM(total_seconds) FROM run_plex_requests GROUP BY op ORDER BY op"
+    ).fetchall()
+    family("autokong_plex_requests_total", "counter", "Plex requests per operation",
+           [({"op": r[0]}, r[1]) for r in plex_totals])
+    family("autokong_plex_request_failures_total", "counter", "Failed Plex requests per operation",
+           [({"op": r[0]}, r[2]) for r in plex_totals])
+    # Quantiles of each operation's latest run with requests; _sum/_count over all runs
+    latest = conn.execute(
+        """SELECT p.op, p.p50_seconds, p.p95_seconds FROM run_plex_requests p JOIN runs r ON r.id = p.run_id
+           WHERE r.started_at = (SELECT MAX(r2.started_at) FROM run_plex_requests p2 JOIN runs r2 ON r2.id = p2.run_id
+                                 WHERE p2.op = p.op) ORDER BY p.op"""
+    ).fetchall()
+    samples: List[Tuple[Dict[str, str], Any]] = []
+    for op, p50, p95 in latest:
+        samples += [({"op": op, "quantile": "0.5"}, p50), ({"op": op, "quantile": "0.95"}, p95)]
+    family("autokong_plex_request_seconds", "summary", "Plex request latency per operation (quantiles of the last run)",
+           samples)
+    for op, count, _failed, secs in plex_totals:
+        lines.append(_sample("autokong_plex_request_seconds_sum", {"op": op}, secs or 0))
+        lines.append(_sample("autokong_plex_request_seconds_count", {"op": op}, count or 0))
+    return "\n".join(lines) + "\n"
+
+
+def series(conn: sqlite3.Connection, runs: int = 30) -> Dict[str, Any]:
+    """
+    Last runs (oldest first) with their totals per step and Plex latencies, for the performance chart:
+    {runs: [{id, started_at, status, duration_seconds, tracks, steps: {step: {...}}, plex: {op: {...}}}], steps}
+    """
+    rows = conn.execute(
+        """SELECT id, started_at, status, duration_seconds FROM runs WHERE finished_at IS NOT NULL
+           AND EXISTS (SELECT 1 FROM run_steps s WHERE s.run_id = runs.id)
+           ORDER BY started_at DESC LIMIT ?""", (max(1, runs),)
+    ).fetchall()
+    out: List[Dict[str, Any]] = []
+    all_steps: List[str] = []
+    for run_id, started_at, status, duration in reversed(rows):
+        steps: Dict[str, Any] = {}
+        for step, nodes, wall, cpu, mem, read, written, tracks in conn.execute(
+            """SELECT step, COUNT(*), SUM(wall_seconds), SUM(cpu_seconds), MAX(mem_peak_bytes), SUM(read_bytes),
+               SUM(write_bytes), SUM(tracks) FROM run_steps WHERE run_id = ? GROUP BY step""", (run_id,)
+        ):
+            steps[step] = {"nodes": nodes, "wall_seconds": wall, "cpu_seconds": cpu, "mem_peak_bytes": mem,
+                           "read_bytes": read, "write_bytes": written, "tracks": tracks}
+            if step not in all_steps:
+                all_steps.append(step)
+        plex = {op: {"requests": n, "p50_seconds": p50, "p95_seconds": p95}
+                for op, n, p50, p95 in conn.execute(
+                    "SELECT op, requests, p50_seconds, p95_seconds FROM run_plex_requests WHERE run_id = ?", (run_id,))}
+        out.append({
+            "id": run_id,
+            "started_at": started_at,
+            "status": status,
+            "duration_seconds": duration,
+            "tracks": max((s["tracks"] or 0 for s in steps.values()), default=0),
+            "steps": steps,
+            "plex": plex,
+        })
+    return {"runs": out, "steps": all_steps}
+
+
+def run_steps(conn: sqlite3.Connection, run_id: str) -> List[Dict[str, Any]]:
+    """Every stored node of one run (per folder and step), in start order."""
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(
+        "SELECT * FROM run_steps WHERE run_id = ? ORDER BY started_at, node", (run_id,)
+    ).fetchall()
+    return [{k: r[k] for k in r.keys() if k != "run_id"} for r in rows]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stored per-step metrics of pipeline runs (runs.db)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("prometheus", help="Prometheus text exposition")
+    p_series = sub.add_parser("series", help="Per-run JSON series")
+    p_series.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+    with sqlite3.connect(RUNS_DB_PATH) as conn:
+        init_tables(conn)
+        if args.cmd == "prometheus":
+            print(prometheus_text(conn), end="")
+        else:
+            print(json.dumps(series(conn, args.runs), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark pipeline_audit.compare_snapshots() on synthetic before/after snapshots, to check it
+stays linear in the number of file records. The former quadratic hole detection is timed too
+(up to --legacy-max records).
+
+Each synthetic album has 10 tracks; in "after", 1 album in 5 loses a track (hole), 1 in 10 is
+re-tagged under another artist (tag split) and 1 in 7 is renamed.
+
+Usage:
+  python3 bench_compare_snapshots.py
+  python3 bench_compare_snapshots.py --sizes 10000 100000 1000000 --legacy-max 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Set
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline_audit import _album_key, _track_num, compare_snapshots  # noqa: E402
+
+ROOT = "/music/Music_matched"
+TRACKS = 10
+
+
+def build_snapshots(size: int) -> tuple:
+    before: List[Dict[str, Any]] = []
+    after: List[Dict[str, Any]] = []
+    for i in range(size):
+        a, t = divmod(i, TRACKS)
+        artist, album, track = f"Artist {a // 3}", f"Album {a % 5000}", t + 1
+        path = f"{artist}/{album} [{a}]/{track:02d}.flac"
+        tags = {"artist": artist, "album": album, "title": f"T{track}", "track": str(track)}
+        before.append({"root": ROOT, "path": path, "size": 1000 + i, "tags": tags})
+        if a % 5 == 0 and track == 3:
+            continue
+        new_tags = dict(tags, artist=f"Other {a}") if a % 10 == 1 else tags
+        new_path = f"{artist}/{album} [{a}]/{track:02d} - T{track}.flac" if a % 7 == 2 else path
+        after.append({"root": ROOT, "path": new_path, "size": 1000 + i, "tags": new_tags})
+    return {"files": before}, {"files": after}
+
+
+def _legacy_holes(before: Dict[str, Any], after: Dict[str, Any]) -> int:
+    """Hole detection as done before the indexes: rescans every after-album per suspicious album."""
+    before_by_album: Dict[Any, List[Dict]] = defaultdict(list)
+    after_by_album: Dict[Any, List[Dict]] = defaultdict(list)
+    for f in before["files"]:
+        before_by_album[_album_key(f)].append(f)
+    for f in after["files"]:
+        after_by_album[_album_key(f)].append(f)
+    holes = 0
+    for (artist, album) in set(before_by_album) | set(after_by_album):
+        blist = before_by_album.get((artist, album), [])
+        alist = after_by_album.get((artist, album), [])
+        b_tracks = {_track_num(f["tags"]) for f in blist} - {None}
+        a_tracks = {_track_num(f["tags"]) for f in alist} - {None}
+        if not b_tracks:
+            continue
+        if len(alist) < len(blist) or a_tracks < b_tracks:
+            missing = b_tracks - a_tracks
+            other: Set[int] = set()
+            for (oa, oal) in after_by_album:
+                if oal == album and oa != artist:
+                    other |= {_track_num(f["tags"]) for f in after_by_album[(oa, oal)]} - {None}
+            if missing and missing <= other:
+                continue
+            holes += 1
+    return holes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark compare_snapshots on synthetic file records.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--legacy-max", type=int, default=100000, help="Skip the legacy hole scan above this size")
+    args = parser.parse_args()
+
+    print(f"{'records':>10} {'compare s':>10} {'us/record':>10} {'holes':>7} {'legacy holes s':>15}")
+    for size in args.sizes:
+        before, after = build_snapshots(size)
+        t0 = time.perf_counter()
+        report = compare_snapshots(before, after)
+        elapsed = time.perf_counter() - t0
+        legacy = "skipped"
+        if size <= args.legacy_max:
+            t0 = time.perf_counter()
+            legacy_holes = _legacy_holes(before, after)
+            legacy = f"{time.perf_counter() - t0:.2f}"
+            if legacy_holes != report["summary"]["albums_with_holes_count"]:
+                legacy += " (differs!)"
+        print(f"{size:>10} {elapsed:>10.2f} {elapsed / size * 1e6:>10.2f} "
+              f"{report['summary']['albums_with_holes_count']:>7} {legacy:>15}")
+
+
+if __name__ == "__main__":
+    main()
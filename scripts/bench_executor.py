@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare per-folder wall time of the SongKong executor modes ("run" vs "exec") using a stub
+image that stands in for SongKong: it prints SongKong-like progress lines and exits.
+Requires a Docker daemon; the stub image is built locally (busybox based).
+
+Usage:
+  python3 bench_executor.py
+  python3 bench_executor.py --folders 5 --startup 0.5
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from songkong_executor import SongKongExecutor  # noqa: E402
+
+STUB_IMAGE = "autokong/songkong-stub:bench"
+
+STUB_SCRIPT = """#!/bin/sh
+# Stand-in for SongKong: simulated start-up cost, then progress lines on stdout.
+sleep "${STUB_STARTUP:-0.5}"
+echo "Songs loaded:120"
+for i in 1 2 3 4 5; do echo "Fingerprinted:$((i * 24))"; done
+echo "Saved:118"
+echo "Completed:120"
+echo "Errors and Warnings:2"
+"""
+
+# The four passes of one folder, as in process_folder()
+PASSES = [
+    ("musicbrainz", ["-m", "/music/folder", "-p", "songkong_fixsongs4.properties"]),
+    ("bandcamp", ["-e", "/music/folder", "-p", "songkong_bandcamp.properties"]),
+    ("delete", ["-d", "/music/folder", "-p", "songkong_deleteduplicates.properties"]),
+    ("rename", ["-f", "/music/folder", "-p", "songkong_renamefiles.properties"]),
+]
+
+
+def build_stub_image(startup: float) -> None:
+    with tempfile.TemporaryDirectory() as ctx:
+        with open(os.path.join(ctx, "songkong.sh"), "w", encoding="utf-8", newline="\n") as f:
+            f.write(STUB_SCRIPT)
+        with open(os.path.join(ctx, "Dockerfile"), "w", encoding="utf-8") as f:
+            f.write(
+                "FROM busybox\n"
+                "COPY songkong.sh /songkong.sh\n"
+                "RUN chmod +x /songkong.sh\n"
+                f"ENV STUB_STARTUP={startup}\n"
+                'ENTRYPOINT ["/songkong.sh"]\n'
+            )
+        subprocess.run(["docker", "build", "-q", "-t", STUB_IMAGE, ctx], check=True, capture_output=True)
+
+
+def run_folder(executor: SongKongExecutor, folder_idx: int) -> float:
+    start = time.perf_counter()
+    for name, args in PASSES:
+        cmd = executor.command(f"songkong_bench_{name}_{folder_idx}", args)
+        subprocess.run(cmd, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def bench(mode: str, folders: int, workdir: str) -> list:
+    executor = SongKongExecutor(
+        STUB_IMAGE, [(workdir, "/songkong")], mode=mode,
+        container_name="songkong_bench_worker", log=lambda m: None,
+    )
+    try:
+        return [run_folder(executor, i) for i in range(folders)]
+    finally:
+        executor.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark docker run vs docker exec SongKong executors.")
+    parser.add_argument("--folders", type=int, default=3, help="Folders (x4 passes) per mode")
+    parser.add_argument("--startup", type=float, default=0.5, help="Simulated SongKong start-up seconds per pass")
+    args = parser.parse_args()
+
+    build_stub_image(args.startup)
+    with tempfile.TemporaryDirectory() as workdir:
+        results = {mode: bench(mode, args.folders, workdir) for mode in ("run", "exec")}
+    for mode, times in results.items():
+        avg = sum(times) / len(times)
+        print(f"{mode:>5}: {avg:.2f}s per folder (min {min(times):.2f}s, max {max(times):.2f}s, {len(times)} folders)")
+    saved = sum(results["run"]) / len(results["run"]) - sum(results["exec"]) / len(results["exec"])
+    print(f"exec saves {saved:.2f}s per folder ({saved / len(PASSES):.2f}s per pass)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark Autokong's own overhead (discovery, state checks, step graph, audit, log plumbing,
+Plex calls) by running run_pipeline() end to end with SongKong and Plex stubbed out:
+  - a synthetic Music root in a temporary directory: Music_dump/<MM-YYYY>/<DD-batch>/<artist>/<album>
+    daily folders (plus a few album dirs without audio for autoclean) and an older Music_matched
+    library (<initial>/<artist>/<album>),
+  - a stub `docker` executable first on PATH: each `docker run` SongKong pass prints SongKong-like
+    output (a line per track, then the counters) over --pass-seconds, and the rename pass moves
+    the folder's albums into Music_matched like SongKong's rename profile does; the other docker
+    commands answer like an idle daemon,
+  - plex_stub_server.StubPlexServer as the Plex server.
+Prints a JSON report: time and peak RSS of each phase (tree generation, import, folder discovery,
+pipeline), the per-step breakdown of the run (run_metrics records), the SongKong pass overhead
+(pass wall time minus the stub's own --pass-seconds) and the Plex requests.
+
+Usage:
+  python3 bench_pipeline.py
+  python3 bench_pipeline.py --days 5 --albums 20 --tracks 12 --workers 2 --output bench.json
+  python3 bench_pipeline.py --audit --plex-latency 0.02    # audit needs tinytag
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from plex_stub_server import STUB_TOKEN, StubPlexServer  # noqa: E402
+
+STEPS = ["musicbrainz", "delete_duplicates", "rename", "autoclean_empty", "plex_scans", "plex_trash"]
+
+# Stand-in for the docker CLI. `docker run ... <image> <flag> <folder> -p <profile>` is one SongKong
+# pass: the folder is mapped back to the host through the -v mounts.
+STUB_DOCKER = r'''#!{python}
+import os, shutil, sys, time
+
+PASS_SECONDS = float(os.environ.get("AUTOKONG_BENCH_PASS_SECONDS", "0.2"))
+MATCHED = os.environ.get("AUTOKONG_BENCH_MATCHED", "")
+AUDIO = (".flac", ".mp3", ".m4a", ".ogg", ".wav")
+
+
+def host_path(path, mounts):
+    for host, container in mounts:
+        if path == container or path.startswith(container.rstrip("/") + "/"):
+            return host.rstrip("/") + path[len(container.rstrip("/")):]
+    return path
+
+
+def tracks(folder):
+    return sorted(os.path.join(d, f) for d, _, files in os.walk(folder) for f in files
+                  if f.lower().endswith(AUDIO))
+
+
+def rename(folder):
+    """Move <folder>/<artist>/<album> to <matched>/<initial>/<artist>/<album>, touched like a rewrite."""
+    moved = 0
+    for artist in sorted(os.listdir(folder)):
+        adir = os.path.join(folder, artist)
+        if not os.path.isdir(adir):
+            continue
+        for album in sorted(os.listdir(adir)):
+            src = os.path.join(adir, album)
+            if not os.path.isdir(src) or not tracks(src):
+                continue
+            dst = os.path.join(MATCHED, artist[:1].upper() or "_", artist, album)
+            while os.path.exists(dst):
+                dst += " (1)"
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.move(src, dst)
+            for t in tracks(dst):
+                os.utime(t)
+            os.utime(dst)
+            moved += 1
+    return moved
+
+
+def run(argv):
+    mounts, i = [], 0
+    while i < len(argv) and argv[i].startswith("-"):
+        if argv[i] in ("--name", "-v", "--entrypoint"):
+            if argv[i] == "-v":
+                host, _, container = argv[i + 1].partition(":")
+                mounts.append((host, container))
+            i += 2
+        elif argv[i] == "-d":
+            print("stub")
+            return 0
+        else:
+            i += 1
+    args = argv[i + 1:]
+    if len(args) < 2:
+        return 0
+    flag, folder = args[0], host_path(args[1], mounts)
+    files = tracks(folder)
+    n = len(files)
+    step = PASS_SECONDS / max(1, n)
+    print("Songs loaded:%d" % n, flush=True)
+    for k, path in enumerate(files, 1):
+        time.sleep(step)
+        print("Checking %s" % path, flush=True)
+        if flag in ("-m", "-e") and k % 10 == 0:
+            print("Fingerprinted:%d" % k, flush=True)
+    if flag in ("-m", "-e"):
+        print("Fingerprinted:%d" % n)
+        print("MusicBrainz:%d" % n)
+        print("Saved:%d" % n)
+        print("Completed:%d" % n)
+    elif flag == "-d":
+        print("Processing:%d" % n)
+        print("Duplicate groups found:0")
+        print("Duplicate songs deleted:0")
+    elif flag == "-f":
+        rename(folder)
+        print("Songs renamed:%d" % n)
+        print("Completed:%d" % n)
+        print("Report Created: /songkong/Reports/rename/index.html")
+    print("Errors and Warnings:0")
+    return 0
+
+
+def main(argv):
+    if not argv:
+        return 0
+    if argv[0] == "run":
+        return run(argv[1:])
+    if argv[0] in ("inspect", "image"):
+        print("Error: No such object", file=sys.stderr)
+        return 1
+    # ps, stats, rm, restart, build...: an idle daemon
+    return 0
+
+
+sys.exit(main(sys.argv[1:]))
+'''
+
+
+def _audio_bytes(tagged: bool, artist: str, album: str, n: int, size: int) -> bytes:
+    if tagged:
+        from bench_tag_scan import _flac_bytes
+        return _flac_bytes({"ARTIST": artist, "ALBUM": album, "TITLE": f"Track {n}", "TRACKNUMBER": str(n)}, size)
+    return b"fLaC" + b"\0" * max(0, size - 4)
+
+
+def build_tree(root: str, days: int, albums: int, tracks: int, matched_albums: int,
+               track_bytes: int, tagged: bool) -> Dict[str, Any]:
+    """Synthetic dump (recent) and matched library (30 days old); returns its paths and sizes."""
+    host_root = os.path.join(root, "Music")
+    dump_base = os.path.join(host_root, "Music_dump", (datetime.now() - timedelta(days=1)).strftime("%m-%Y"))
+    matched = os.path.join(host_root, "Music_matched")
+    total_tracks = total_bytes = 0
+    for d in range(days):
+        daily = os.path.join(dump_base, f"{d + 1:02d}-batch")
+        for a in range(albums):
+            artist, album = f"Artist {d}-{a // 3}", f"Album {d}-{a}"
+            adir = os.path.join(daily, artist, album)
+            os.makedirs(adir)
+            for t in range(1, tracks + 1):
+                data = _audio_bytes(tagged, artist, album, t, track_bytes)
+                with open(os.path.join(adir, f"{t:02d} - Track {t}.flac"), "wb") as f:
+                    f.write(data)
+                total_tracks += 1
+                total_bytes += len(data)
+        # An album dir left without audio (cover only), for the autoclean step
+        empty = os.path.join(daily, f"Artist {d}-empty", "Leftovers")
+        os.makedirs(empty)
+        with open(os.path.join(empty, "cover.jpg"), "wb") as f:
+            f.write(b"\xff\xd8\xff")
+    old = time.time() - 30 * 86400
+    for m in range(matched_albums):
+        artist = f"{chr(65 + m % 26)}rtist {m // 4}"
+        adir = os.path.join(matched, artist[0], artist, f"Album {m}")
+        os.makedirs(adir)
+        for t in range(1, tracks + 1):
+            path = os.path.join(adir, f"{t:02d} - Track {t}.flac")
+            with open(path, "wb") as f:
+                f.write(_audio_bytes(tagged, artist, f"Album {m}", t, track_bytes))
+            os.utime(path, (old, old))
+        os.utime(adir, (old, old))
+    return {"host_root": host_root, "dump_base": dump_base + os.sep, "matched": matched,
+            "folders": days, "albums": days * albums, "tracks": total_tracks, "bytes": total_bytes,
+            "matched_albums": matched_albums}
+
+
+def install_stub_docker(bin_dir: str) -> str:
+    os.makedirs(bin_dir, exist_ok=True)
+    path = os.path.join(bin_dir, "docker")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(STUB_DOCKER.replace("{python}", sys.executable, 1))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+def _peak_rss() -> Optional[int]:
+    """VmHWM of this process in bytes (the high-water mark since the last _reset_peak_rss)."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _reset_peak_rss() -> None:
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+class Phases:
+    """Wall time and peak memory (RSS, and Python heap with tracemalloc) of named phases."""
+
+    def __init__(self, trace_python: bool = False):
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.trace_python = trace_python
+        if trace_python:
+            import tracemalloc
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        _reset_peak_rss()
+        if self.trace_python:
+            import tracemalloc
+            tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            result: Dict[str, Any] = {"seconds": round(time.perf_counter() - t0, 4), "peak_rss_bytes": _peak_rss()}
+            if self.trace_python:
+                import tracemalloc
+                result["peak_python_bytes"] = tracemalloc.get_traced_memory()[1]
+            self.results[name] = result
+
+
+def _step_breakdown(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    steps: Dict[str, Dict[str, Any]] = {}
+    for r in records:
+        s = steps.setdefault(r["step"], {"nodes": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "tracks": 0})
+        s["nodes"] += 1
+        s["wall_seconds"] = round(s["wall_seconds"] + (r["wall_seconds"] or 0.0), 4)
+        s["cpu_seconds"] = round(s["cpu_seconds"] + (r["cpu_seconds"] or 0.0), 4)
+        s["tracks"] += r["tracks"] or 0
+    return steps
+
+
+def bench(args: argparse.Namespace, workdir: str) -> Dict[str, Any]:
+    phases = Phases(args.tracemalloc)
+    with phases.phase("generate"):
+        tree = build_tree(workdir, args.days, args.albums, args.tracks, args.matched_albums,
+                          args.track_bytes, args.audit)
+        songkong_dir = os.path.join(workdir, "songkong")
+        os.makedirs(os.path.join(songkong_dir, "Prefs"))
+        install_stub_docker(os.path.join(workdir, "bin"))
+
+    # Autokong keeps its state, logs and models in the working and data directories: isolate them
+    os.environ["PATH"] = os.path.join(workdir, "bin") + os.pathsep + os.environ.get("PATH", "")
+    os.environ["AUTOKONG_DATA_DIR"] = os.path.join(workdir, "data")
+    os.environ["AUTOKONG_BENCH_PASS_SECONDS"] = str(args.pass_seconds)
+    os.environ["AUTOKONG_BENCH_MATCHED"] = tree["matched"]
+    os.chdir(workdir)
+
+    stub = StubPlexServer(latency=args.plex_latency, scan_seconds=args.plex_scan_seconds).start()
+    # Pipeline log lines go to stderr, stdout is left to the report
+    with contextlib.redirect_stdout(sys.stderr):
+        with phases.phase("import"):
+            pipeline = importlib.import_module("Autokong")
+        pipeline.HOST_ROOT = tree["host_root"]
+        pipeline.MATCHED_HOST_DIR = tree["matched"]
+        pipeline.AUTOCHECK_ROOT_DIR = tree["matched"]
+        pipeline.SONGKONG_CONFIG_DIR = songkong_dir
+        pipeline.SONGKONG_WORKERS_DIR = os.path.join(workdir, "songkong_workers")
+        pipeline.SONGKONG_QUIET_SECONDS = args.quiet_seconds
+        pipeline.SONGKONG_READY_POLL = min(1.0, max(0.05, args.quiet_seconds / 2))
+
+        with phases.phase("discovery"):
+            folders = pipeline.get_folders_to_process("all_days", tree["dump_base"], pipeline.DirIndex())
+
+        config = {
+            "dump_host_dir": tree["dump_base"],
+            "host_root": tree["host_root"],
+            "autoclean_root_dir": os.path.join(tree["host_root"], "Music_dump"),
+            "autocheck_root_dir": tree["matched"],
+            "songkong_executor": "run",
+            "songkong_workers": args.workers,
+            "songkong_worker_cpus": 1,
+            "songkong_worker_memory_mb": 1,
+            "plex_host": stub.url,
+            "plex_token": STUB_TOKEN,
+            "plex_library_section": stub.section,
+            "plex_dump_path": "/music/Music_dump",
+            "plex_matched_path": "/music/Music_matched",
+            "plex_scan_timeout": max(5, int(args.plex_scan_seconds * 4)),
+            "run_id": "bench",
+        }
+        try:
+            with phases.phase("pipeline"):
+                summary = pipeline.run_pipeline(STEPS, "all_days", enable_audit=args.audit, config_overrides=config)
+        finally:
+            stub.stop()
+
+    records = (summary.get("metrics") or {}).get("steps") or []
+    steps = _step_breakdown(records)
+    passes = sum(s["nodes"] for name, s in steps.items() if name in pipeline.STEPS_PER_FOLDER)
+    pass_wall = sum(s["wall_seconds"] for name, s in steps.items() if name in pipeline.STEPS_PER_FOLDER)
+    graph_seconds = (summary.get("critical_path") or {}).get("wall_seconds")
+    pipeline_seconds = phases.results["pipeline"]["seconds"]
+    return {
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "keep")},
+        "tree": {k: tree[k] for k in ("folders", "albums", "tracks", "bytes", "matched_albums")},
+        "phases": phases.results,
+        "pipeline": {
+            "status": summary.get("status"),
+            "error": summary.get("error"),
+            "folders_found": len(folders),
+            "folders_processed": len(summary.get("folders") or []),
+            "graph_seconds": graph_seconds,
+            # discovery, state checks, audit snapshots, Plex client close... around the step graph
+            "outside_graph_seconds": round(pipeline_seconds - graph_seconds, 4) if graph_seconds is not None else None,
+            "songkong_passes": passes,
+            # what each pass costs beyond the stub's own run time: dir cleaning, readiness gate,
+            # process start, output parsing and log plumbing
+            "songkong_overhead_seconds_per_pass": round((pass_wall - passes * args.pass_seconds) / passes, 4)
+            if passes else None,
+            "steps": steps,
+            "autoclean_removed": len(summary.get("autoclean_removed") or []),
+            "plex_requests": summary.get("plex_requests"),
+            "plex_stub_requests": len(stub.requests()),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark run_pipeline() with stub SongKong and Plex.")
+    parser.add_argument("--days", type=int, default=3, help="Daily folders in the dump")
+    parser.add_argument("--albums", type=int, default=10, help="Albums per daily folder")
+    parser.add_argument("--tracks", type=int, default=10, help="Tracks per album")
+    parser.add_argument("--matched-albums", type=int, default=200, help="Albums already in Music_matched")
+    parser.add_argument("--track-bytes", type=int, default=4096, help="Size of each generated track")
+    parser.add_argument("--workers", type=int, default=1, help="Parallel SongKong workers")
+    parser.add_argument("--pass-seconds", type=float, default=0.2, help="Run time of each stub SongKong pass")
+    parser.add_argument("--quiet-seconds", type=float, default=0.2,
+                        help="Readiness gate quiet time before delete/rename (Autokong default 3)")
+    parser.add_argument("--plex-latency", type=float, default=0.0, help="Seconds added to every stub Plex answer")
+    parser.add_argument("--plex-scan-seconds", type=float, default=0.2, help="Duration of each stub Plex scan")
+    parser.add_argument("--audit", action="store_true", help="Run with the audit (tagged FLACs, needs tinytag)")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report the Python heap peak (slower)")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary tree and print its path")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="autokong-bench-")
+    cwd = os.getcwd()
+    try:
+        report = bench(args, workdir)
+    finally:
+        os.chdir(cwd)
+        if args.keep:
+            print(f"Benchmark tree kept in {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark processed-folder lookups: legacy log scan vs ProcessedStore, as history grows.
+
+Usage:
+  python3 bench_state_store.py
+  python3 bench_state_store.py --sizes 1000 10000 200000 --lookups 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from state_store import ProcessedStore  # noqa: E402
+
+
+def _legacy_was_processed(state_file: str, folder: str) -> bool:
+    """Lookup as done by Autokong.was_processed() before the state store."""
+    with open(state_file, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.rstrip("\n") == folder:
+                return True
+    return False
+
+
+def _folder(i: int) -> str:
+    return f"/mnt/downloads_cache/MURRAY/Music/Music_matched/{i % 36}/Artist {i // 7}/Album {i}"
+
+
+def bench(size: int, lookups: int, legacy_max: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "autokong.db")
+        log = os.path.join(tmp, "processed_folders.log")
+        with open(log, "w", encoding="utf-8") as f:
+            for i in range(size):
+                f.write(_folder(i) + "\n")
+
+        t0 = time.perf_counter()
+        store = ProcessedStore(db, legacy_log=log)
+        import_s = time.perf_counter() - t0
+
+        # Half hits, half misses
+        probes = [_folder(random.randrange(size)) if i % 2 else _folder(size + i) for i in range(lookups)]
+        t0 = time.perf_counter()
+        for p in probes:
+            store.contains(p)
+        store_us = (time.perf_counter() - t0) / lookups * 1e6
+
+        t0 = time.perf_counter()
+        for i in range(lookups):
+            store.mark(_folder(size + i))
+        store.flush()
+        mark_us = (time.perf_counter() - t0) / lookups * 1e6
+        store.close()
+
+        legacy_us = None
+        if size <= legacy_max:
+            n = min(lookups, 200)
+            t0 = time.perf_counter()
+            for p in probes[:n]:
+                _legacy_was_processed(log, p)
+            legacy_us = (time.perf_counter() - t0) / n * 1e6
+    return {
+        "size": size,
+        "import_s": import_s,
+        "store_lookup_us": store_us,
+        "store_mark_us": mark_us,
+        "legacy_lookup_us": legacy_us,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark processed-folder lookups.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 200000])
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--legacy-max", type=int, default=100000, help="Skip the legacy scan above this size")
+    args = parser.parse_args()
+
+    print(f"{'entries':>10} {'import s':>10} {'lookup us':>10} {'mark us':>10} {'legacy us':>12}")
+    for size in args.sizes:
+        r = bench(size, args.lookups, args.legacy_max)
+        legacy = f"{r['legacy_lookup_us']:.1f}" if r["legacy_lookup_us"] is not None else "skipped"
+        print(f"{r['size']:>10} {r['import_s']:>10.3f} {r['store_lookup_us']:>10.2f} {r['store_mark_us']:>10.2f} {legacy:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark tag extraction of the audit / verify_album_holes scanner (tag_scan.py): serial vs
+process pool, on a generated tree of tagged FLAC files (artist/album/track layout).
+
+Usage:
+  python3 bench_tag_scan.py
+  python3 bench_tag_scan.py --albums 400 --tracks 12 --jobs 1 2 4 8
+
+Requires: tinytag (pip install tinytag)
+"""
+
+import argparse
+import os
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tag_scan import iter_audio_files, read_tags_many  # noqa: E402
+
+
+def _flac_bytes(tags: dict, payload: int) -> bytes:
+    """Minimal FLAC: STREAMINFO + VORBIS_COMMENT blocks followed by `payload` bytes of fake audio."""
+    # 44.1 kHz, stereo, 16 bits, 3 min of samples
+    sample_rate, channels, bps, samples = 44100, 2, 16, 44100 * 180
+    packed = (sample_rate << 44) | ((channels - 1) << 41) | ((bps - 1) << 36) | samples
+    streaminfo = struct.pack(">HH", 4096, 4096) + b"\0" * 6 + packed.to_bytes(8, "big") + b"\0" * 16
+    vendor = b"autokong-bench"
+    comments = [f"{k}={v}".encode("utf-8") for k, v in tags.items()]
+    vorbis = struct.pack("<I", len(vendor)) + vendor + struct.pack("<I", len(comments))
+    for c in comments:
+        vorbis += struct.pack("<I", len(c)) + c
+    out = b"fLaC"
+    out += bytes([0]) + len(streaminfo).to_bytes(3, "big") + streaminfo
+    out += bytes([0x80 | 4]) + len(vorbis).to_bytes(3, "big") + vorbis
+    return out + os.urandom(payload)
+
+
+def build_tree(root: str, albums: int, tracks: int, payload: int) -> int:
+    count = 0
+    for a in range(albums):
+        artist = f"Artist {a // 4}"
+        album = f"Album {a}"
+        folder = os.path.join(root, artist, album)
+        os.makedirs(folder, exist_ok=True)
+        for t in range(1, tracks + 1):
+            tags = {
+                "ARTIST": artist, "ALBUMARTIST": artist, "ALBUM": album,
+                "TITLE": f"Track {t}", "TRACKNUMBER": str(t), "TRACKTOTAL": str(tracks),
+            }
+            with open(os.path.join(folder, f"{t:02d} - Track {t}.flac"), "wb") as f:
+                f.write(_flac_bytes(tags, payload))
+            count += 1
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark serial vs multi-process tag extraction.")
+    parser.add_argument("--albums", type=int, default=250)
+    parser.add_argument("--tracks", type=int, default=12)
+    parser.add_argument("--payload-kb", type=int, default=64, help="Fake audio bytes per file")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4, 0], help="Process counts (0 = one per CPU)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        n = build_tree(root, args.albums, args.tracks, args.payload_kb * 1024)
+        print(f"Generated {n} tagged files under {args.albums} albums ({os.cpu_count()} CPUs)")
+
+        t0 = time.perf_counter()
+        paths = [e[0] for e in iter_audio_files(root)]
+        print(f"scandir walk: {time.perf_counter() - t0:.3f}s")
+
+        baseline = None
+        reference = None
+        for jobs in args.jobs:
+            t0 = time.perf_counter()
+            tags = read_tags_many(paths, jobs=jobs)
+            elapsed = time.perf_counter() - t0
+            if reference is None:
+                reference = tags
+            elif tags != reference:
+                print(f"jobs={jobs}: results differ from the first run", file=sys.stderr)
+            baseline = baseline or elapsed
+            print(f"jobs={jobs:>3}: {elapsed:.3f}s ({n / elapsed:.0f} files/s, x{baseline / elapsed:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the Plex endpoints Autokong uses, to exercise plex_client.py without a real
+server:
+  GET /library/sections/<id>/refresh?path=...   partial scan (200), marks the section refreshing
+  GET /library/sections/<id>                    MediaContainer XML with refreshing="0|1"
+  PUT /library/sections/<id>/emptyTrash         200
+  GET /:/websockets/notifications               WebSocket of activity notifications: every refresh
+                                                starts a library.update.section activity (subtitle =
+                                                folder name) that ends after --scan-seconds
+  GET /stub/requests                            JSON list of the requests received so far
+Requests without the expected X-Plex-Token get 401. Latency and a share of 503 answers can be
+simulated to exercise retries.
+
+Usage:
+  python3 plex_stub_server.py --port 32400 --latency 0.05 --fail-rate 0.1
+  python3 plex_stub_server.py --bench 500     # serial legacy loop vs PlexClient.refresh_many
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import queue
+import random
+import struct
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+STUB_TOKEN = "stub-token"
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def _ws_frame(text: str) -> bytes:
+    """Unmasked server text frame."""
+    payload = text.encode("utf-8")
+    n = len(payload)
+    if n < 126:
+        head = struct.pack(">BB", 0x81, n)
+    elif n < 65536:
+        head = struct.pack(">BBH", 0x81, 126, n)
+    else:
+        head = struct.pack(">BBQ", 0x81, 127, n)
+    return head + payload
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StubPlexServer"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+    def _reply(self, status: int, body: bytes = b"", content_type: str = "text/xml") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _notifications(self) -> None:
+        """WebSocket upgrade, then push every activity notification until the server stops."""
+        accept = base64.b64encode(
+            hashlib.sha1((self.headers.get("Sec-WebSocket-Key", "") + _WS_GUID).encode()).digest()
+        ).decode()
+        self.send_response(101, "Switching Protocols")
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept)
+        self.end_headers()
+        self.close_connection = True
+        events = self.server.subscribe()
+        try:
+            while not self.server.closing:
+                try:
+                    message = events.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                self.wfile.write(_ws_frame(message))
+                self.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            self.server.unsubscribe(events)
+
+    def _handle(self, method: str) -> None:
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        stub = self.server
+        if url.path == "/stub/requests":
+            self._reply(200, json.dumps(stub.requests()).encode("utf-8"), "application/json")
+            return
+        query = parse_qs(url.query)
+        token = self.headers.get("X-Plex-Token") or (query.get("X-Plex-Token") or [None])[0]
+        stub.record(method, url.path, query, token)
+        if token != stub.token:
+            self._reply(401)
+            return
+        if url.path == "/:/websockets/notifications" and self.headers.get("Upgrade", "").lower() == "websocket":
+            self._notifications()
+            return
+        if stub.latency:
+            time.sleep(stub.latency)
+        if stub.fail_rate and random.random() < stub.fail_rate:
+            self._reply(503)
+            return
+        if len(parts) < 3 or parts[:2] != ["library", "sections"]:
+            self._reply(404)
+            return
+        action = parts[3] if len(parts) > 3 else None
+        if method == "GET" and action == "refresh":
+            stub.start_scan((query.get("path") or [""])[0])
+            self._reply(200)
+        elif method == "GET" and action is None:
+            refreshing = "1" if stub.scanning() else "0"
+            body = f'<MediaContainer size="0" librarySectionID="{parts[2]}" refreshing="{refreshing}"/>'
+            self._reply(200, body.encode("utf-8"))
+        elif method == "PUT" and action == "emptyTrash":
+            self._reply(200)
+        else:
+            self._reply(404)
+
+    def do_GET(self) -> None:  # noqa: N802
+        self._handle("GET")
+
+    def do_PUT(self) -> None:  # noqa: N802
+        self._handle("PUT")
+
+
+class StubPlexServer(ThreadingHTTPServer):
+    """Stub Plex on 127.0.0.1; use as a context manager or start()/stop()."""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, token: str = STUB_TOKEN, latency: float = 0.0,
+                 fail_rate: float = 0.0, scan_seconds: float = 0.0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.token = token
+        self.latency = latency
+        self.fail_rate = fail_rate
+        # How long the activity of each refresh lasts (section reports refreshing="1" meanwhile)
+        self.scan_seconds = scan_seconds
+        self.section = "1"
+        self.closing = False
+        self._activities: Dict[str, str] = {}
+        self._subscribers: List["queue.Queue[str]"] = []
+        self._requests: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def record(self, method: str, path: str, query: Dict[str, List[str]], token: Optional[str]) -> None:
+        with self._lock:
+            self._requests.append({"method": method, "path": path, "query": query,
+                                   "token_ok": token == self.token, "at": time.time()})
+
+    def requests(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._requests)
+
+    def refreshed_paths(self) -> List[str]:
+        return [p for r in self.requests() if r["path"].endswith("/refresh") for p in r["query"].get("path", [])]
+
+    def subscribe(self) -> "queue.Queue[str]":
+        q: "queue.Queue[str]" = queue.Queue()
+        with self._lock:
+            self._subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q: "queue.Queue[str]") -> None:
+        with self._lock:
+            if q in self._subscribers:
+                self._subscribers.remove(q)
+
+    def _notify(self, event: str, activity_id: str, path: str) -> None:
+        message = json.dumps({"NotificationContainer": {"type": "activity", "size": 1, "ActivityNotification": [{
+            "event": event,
+            "uuid": activity_id,
+            "Activity": {
+                "uuid": activity_id,
+                "type": "library.update.section",
+                "title": "Scanning Music",
+                "subtitle": path.rstrip("/").rsplit("/", 1)[-1],
+                "progress": 100 if event == "ended" else 0,
+                "Context": {"librarySectionID": self.section},
+            },
+        }]}})
+        with self._lock:
+            for q in self._subscribers:
+                q.put(message)
+
+    def start_scan(self, path: str = "") -> None:
+        """Simulated partial scan: activity started now, ended after scan_seconds."""
+        activity_id = str(uuid.uuid4())
+        with self._lock:
+            self._activities[activity_id] = path
+        self._notify("started", activity_id, path)
+
+        def end() -> None:
+            with self._lock:
+                self._activities.pop(activity_id, None)
+            self._notify("ended", activity_id, path)
+
+        timer = threading.Timer(self.scan_seconds, end)
+        timer.daemon = True
+        timer.start()
+
+    def scanning(self) -> bool:
+        with self._lock:
+            return bool(self._activities)
+
+    def start(self) -> "StubPlexServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="plex-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.closing = True
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "StubPlexServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def _bench(count: int, latency: float, concurrency: int) -> None:
+    import requests
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from plex_client import PlexClient  # noqa: E402
+
+    paths = [f"/music/matched/{chr(65 + i % 26)}/Artist {i // 3}/Album {i}" for i in range(count)]
+    with StubPlexServer(latency=latency) as stub:
+        # Former behaviour: one requests.get per path, new connection each time
+        t0 = time.perf_counter()
+        for p in paths:
+            requests.get(f"{stub.url}/library/sections/1/refresh", params={"path": p},
+                         headers={"X-Plex-Token": STUB_TOKEN}, timeout=30)
+        serial = time.perf_counter() - t0
+
+        client = PlexClient(stub.url, STUB_TOKEN, "1", concurrency=concurrency, log=lambda _m: None)
+        t0 = time.perf_counter()
+        client.refresh_many(paths)
+        pooled = time.perf_counter() - t0
+        report = client.report()
+        client.close()
+    print(f"{count} refreshes, {latency * 1000:.0f} ms server latency")
+    print(f"serial requests.get : {serial:.2f}s")
+    print(f"PlexClient (x{concurrency})   : {pooled:.2f}s (x{serial / pooled:.1f})")
+    print(json.dumps(report, indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stub Plex HTTP server for plex_client.py.")
+    parser.add_argument("--port", type=int, default=32400)
+    parser.add_argument("--token", default=STUB_TOKEN)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every answer")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered 503")
+    parser.add_argument("--scan-seconds", type=float, default=0.0, help="Section stays refreshing this long")
+    parser.add_argument("--bench", type=int, metavar="N", help="Time N refreshes serial vs pooled, then exit")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.bench:
+        _bench(args.bench, args.latency or 0.02, args.concurrency)
+        return
+    stub = StubPlexServer(args.port, args.token, args.latency, args.fail_rate, args.scan_seconds)
+    print(f"Stub Plex listening on {stub.url} (token {args.token})")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        stub.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,9 @@ Usage:
   python3 verify_album_holes.py /mnt/downloads_cache/MURRAY/Music/Music_dump/02-2025/03-02
   python3 verify_album_holes.py /path/to/03-02 --limit 5
   python3 verify_album_holes.py /path/to/03-02 --artist "Four Tet"
+  python3 verify_album_holes.py /path/to/03-02 --jobs 8
 
-Requires: tinytag (pip install tinytag)
+Requires: tinytag (pip install tinytag). Tag reading is shared with the pipeline audit (tag_scan.py).
 """
 
 import argparse
@@ -18,27 +19,9 @@ import sys
 from collections import defaultdict
 from typing import Any, Dict, List, Optional, Set, Tuple
 
-# Reuse same extensions as pipeline_audit
-AUDIO_EXTENSIONS = (".mp3", ".flac", ".wav", ".aac", ".m4a", ".ogg", ".wma", ".alac", ".aiff")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-
-def _read_file_tags(filepath: str) -> Dict[str, Any]:
-    try:
-        from tinytag import TinyTag
-    except ImportError:
-        return {}
-    try:
-        tag = TinyTag.get(filepath)
-        return {
-            "artist": (tag.artist or "").strip() or None,
-            "album": (tag.album or "").strip() or None,
-            "albumartist": (getattr(tag, "albumartist", None) or "").strip() or None,
-            "title": (tag.title or "").strip() or None,
-            "track": str(tag.track).split("/")[0].strip() if tag.track else None,
-            "track_total": str(tag.track_total).strip() if tag.track_total else None,
-        }
-    except Exception:
-        return {}
+from tag_scan import iter_audio_files, read_tags_many  # noqa: E402
 
 
 def _album_key(tags: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
@@ -58,20 +41,16 @@ def _track_num(tags: Dict[str, Any]) -> Optional[int]:
         return None
 
 
-def scan_folder(root_path: str) -> List[Dict[str, Any]]:
-    """Return list of {path, name, tags} for all audio files under root_path."""
-    files = []
+def scan_folder(root_path: str, jobs: int = 1) -> List[Dict[str, Any]]:
+    """Return list of {path, name, tags} for all audio files under root_path, in sorted walk order."""
     if not os.path.isdir(root_path):
-        return files
-    for dirpath, _dirnames, filenames in os.walk(root_path):
-        for name in filenames:
-            if not name.lower().endswith(AUDIO_EXTENSIONS):
-                continue
-            full = os.path.join(dirpath, name)
-            rel = os.path.relpath(full, root_path)
-            tags = _read_file_tags(full)
-            files.append({"path": rel, "name": name, "tags": tags})
-    return files
+        return []
+    entries = list(iter_audio_files(root_path))
+    tags = read_tags_many([e[0] for e in entries], jobs=jobs)
+    return [
+        {"path": os.path.relpath(full, root_path), "name": name, "tags": t}
+        for (full, name, _size, _mtime_ns, _inode), t in zip(entries, tags)
+    ]
 
 
 def main() -> None:
@@ -81,6 +60,7 @@ def main() -> None:
     parser.add_argument("--artist", type=str, default="", help="Filter by artist name (substring)")
     parser.add_argument("--album", type=str, default="", help="Filter by album name (substring)")
     parser.add_argument("--verbose", "-v", action="store_true", help="Print each file with its track tag")
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="Tag reader processes (0 = one per CPU)")
     args = parser.parse_args()
 
     all_files: List[Dict[str, Any]] = []
@@ -88,7 +68,7 @@ def main() -> None:
         if not os.path.isdir(folder):
             print(f"Not a directory: {folder}", file=sys.stderr)
             continue
-        all_files.extend(scan_folder(folder))
+        all_files.extend(scan_folder(folder, jobs=args.jobs))
 
     if not all_files:
         print("No audio files found.")
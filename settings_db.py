@@ -3,11 +3,15 @@
 """
 Autokong settings stored in SQLite (settings.db). Replaces config.json for all user config.
 Keys: steps_enabled, scope, audit_enabled, schedule, paths, songkong_prefs_dir, songkong_files,
-      plex_host, plex_token, plex_library_section, plex_dump_path, plex_matched_path, plex_retry_interval.
+      plex_host, plex_token, plex_library_section, plex_dump_path, plex_matched_path, plex_retry_interval, plex_concurrency,
+      plex_refresh_fan_out, plex_refresh_max_cost, plex_scan_timeout,
+      songkong_workers, songkong_worker_cpus, songkong_worker_memory_mb, songkong_executor, audit_jobs, audit_fingerprint,
+      log_retention_days, change_watcher.
 """
 
 import json
 import os
+import re
 import sqlite3
 from pathlib import Path
 from typing import Any, Dict
@@ -42,6 +46,7 @@ DEFAULTS = {
         "preset": "nightly",
         "steps": None,
         "scope": None,
+        "deadline": None,
     }),
     "paths": json.dumps({}),
     "songkong_prefs_dir": _default_songkong_prefs_dir(),
@@ -52,6 +57,47 @@ DEFAULTS = {
     "plex_dump_path": "/music/unmatched",
     "plex_matched_path": "/music/matched",
     "plex_retry_interval": "5",
+    # Parallel Plex refresh requests (pooled keep-alive connections)
+    "plex_concurrency": "4",
+    # Refresh planner: scan a parent instead of >= fan_out changed albums if it has <= max_cost x entries
+    "plex_refresh_fan_out": "8",
+    "plex_refresh_max_cost": "4",
+    # Seconds plex_trash waits for the scans plex_scans triggered (0 = do not wait)
+    "plex_scan_timeout": "600",
+    # Parallel SongKong workers (folders processed concurrently) and per-worker resource budget
+    "songkong_workers": "1",
+    "songkong_worker_cpus": "2",
+    "songkong_worker_memory_mb": "4096",
+    # "run": docker run --rm per pass; "exec": one long-lived SongKong container per worker
+    "songkong_executor": "run",
+    # Audit tag reader processes (0 = one per CPU)
+    "audit_jobs": "0",
+    # Audit: pair renamed/moved files by a sampled hash of the audio payload (tags skipped)
+    "audit_fingerprint": "false",
+    # Archived logs/audits of runs finished more than this many days ago are deleted (0 = keep)
+    "log_retention_days": "90",
+    # Background change journal of the dump/matched trees: "off", "auto", "inotify" or "poll"
+    "change_watcher": "off",
+}
+
+VALID_EXECUTORS = ("run", "exec")
+VALID_CHANGE_WATCHERS = ("off", "auto", "inotify", "poll")
+
+# Integer settings validated against an inclusive (min, max) range
+INT_SETTING_RANGES = {
+    "songkong_workers": (1, 16),
+    "songkong_worker_cpus": (1, 64),
+    "songkong_worker_memory_mb": (512, 262144),
+    "audit_jobs": (0, 64),
+    "plex_concurrency": (1, 16),
+    "plex_refresh_fan_out": (2, 10000),
+    "plex_scan_timeout": (0, 86400),
+    "log_retention_days": (0, 3650),
+}
+
+# Decimal settings validated against an inclusive (min, max) range
+FLOAT_SETTING_RANGES = {
+    "plex_refresh_max_cost": (1.0, 1000.0),
 }
 
 VALID_SCOPES = ("daily", "monthly", "all_days")
@@ -114,6 +160,11 @@ def get_all_settings() -> Dict[str, Any]:
         "plex_dump_path": raw.get("plex_dump_path", DEFAULTS["plex_dump_path"]),
         "plex_matched_path": raw.get("plex_matched_path", DEFAULTS["plex_matched_path"]),
         "plex_retry_interval": raw.get("plex_retry_interval", DEFAULTS["plex_retry_interval"]),
+        **{key: raw.get(key, DEFAULTS[key]) for key in INT_SETTING_RANGES},
+        **{key: raw.get(key, DEFAULTS[key]) for key in FLOAT_SETTING_RANGES},
+        "songkong_executor": raw.get("songkong_executor", DEFAULTS["songkong_executor"]),
+        "audit_fingerprint": raw.get("audit_fingerprint", DEFAULTS["audit_fingerprint"]).lower() == "true",
+        "change_watcher": raw.get("change_watcher", DEFAULTS["change_watcher"]),
     }
 
 
@@ -128,12 +179,15 @@ def _validate(key: str, value: Any) -> None:
         for s in value:
             if s not in VALID_STEPS:
                 raise ValueError(f"invalid step: {s}")
-    elif key == "audit_enabled":
+    elif key in ("audit_enabled", "audit_fingerprint"):
         if not isinstance(value, bool):
-            raise ValueError("audit_enabled must be boolean")
+            raise ValueError(f"{key} must be boolean")
     elif key == "schedule":
         if not isinstance(value, dict):
             raise ValueError("schedule must be an object")
+        deadline = value.get("deadline")
+        if deadline is not None and not re.fullmatch(r"([01]?\d|2[0-3]):[0-5]\d", str(deadline)):
+            raise ValueError("schedule deadline must be HH:MM")
     elif key == "paths":
         if not isinstance(value, dict):
             raise ValueError("paths must be an object")
@@ -164,6 +218,28 @@ def _validate(key: str, value: Any) -> None:
             if "invalid literal" in str(e):
                 raise ValueError("plex_retry_interval must be numeric")
             raise
+    elif key == "songkong_executor":
+        if value not in VALID_EXECUTORS:
+            raise ValueError(f"songkong_executor must be one of {VALID_EXECUTORS}")
+    elif key == "change_watcher":
+        if value not in VALID_CHANGE_WATCHERS:
+            raise ValueError(f"change_watcher must be one of {VALID_CHANGE_WATCHERS}")
+    elif key in INT_SETTING_RANGES:
+        lo, hi = INT_SETTING_RANGES[key]
+        try:
+            n = int(str(value).strip())
+        except ValueError:
+            raise ValueError(f"{key} must be numeric")
+        if n < lo or n > hi:
+            raise ValueError(f"{key} must be between {lo} and {hi}")
+    elif key in FLOAT_SETTING_RANGES:
+        lo, hi = FLOAT_SETTING_RANGES[key]
+        try:
+            x = float(str(value).strip())
+        except ValueError:
+            raise ValueError(f"{key} must be numeric")
+        if not lo <= x <= hi:
+            raise ValueError(f"{key} must be between {lo:g} and {hi:g}")
 
 
 def set_setting(key: str, value: Any) -> None:
@@ -180,7 +256,7 @@ def set_setting(key: str, value: Any) -> None:
         value_str = str(value) if value is not None else ""
         if key == "scope":
             _validate(key, value_str)
-        elif key == "audit_enabled":
+        elif key in ("audit_enabled", "audit_fingerprint"):
             _validate(key, value_str.lower() == "true")
         elif key in ("plex_host", "plex_token", "plex_dump_path", "plex_matched_path", "songkong_prefs_dir"):
             _validate(key, value_str)
@@ -188,6 +264,8 @@ def set_setting(key: str, value: Any) -> None:
             _validate(key, value_str)
         elif key == "plex_retry_interval":
             _validate(key, value_str)
+        elif key in INT_SETTING_RANGES or key in FLOAT_SETTING_RANGES or key in ("songkong_executor", "change_watcher"):
+            _validate(key, value_str)
 
     with _get_conn() as conn:
         conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value_str))
@@ -206,12 +284,14 @@ def set_settings(updates: Dict[str, Any]) -> None:
                 value_str = str(value) if value is not None else ""
             if key in ("steps_enabled", "schedule", "paths", "songkong_files"):
                 _validate(key, json.loads(value_str))
-            elif key == "audit_enabled":
+            elif key in ("audit_enabled", "audit_fingerprint"):
                 _validate(key, value_str.lower() == "true")
             elif key == "scope":
                 _validate(key, value_str)
             elif key in ("plex_host", "plex_token", "plex_library_section", "plex_dump_path", "plex_matched_path", "plex_retry_interval", "songkong_prefs_dir"):
                 _validate(key, value_str)
+            elif key in INT_SETTING_RANGES or key in FLOAT_SETTING_RANGES or key in ("songkong_executor", "change_watcher"):
+                _validate(key, value_str)
 
     with _get_conn() as conn:
         for key, value in updates.items():
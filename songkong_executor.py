@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SongKong pass executor: builds the command used to run one SongKong pass.
+
+- mode "run":  one `docker run --rm` per pass (historical behaviour).
+- mode "exec": one long-lived container per worker (entrypoint replaced by an idle process),
+               each pass is sent with `docker exec` using the image's own entrypoint.
+               Any failure to start or reach that container falls back to "run".
+"""
+
+import json
+import subprocess
+from typing import Callable, List, Optional, Sequence, Tuple
+
+EXECUTOR_MODES = ("run", "exec")
+
+# Exit codes of `docker exec` meaning the pass never started (daemon error, not executable, not found)
+_EXEC_START_FAILURES = (125, 126, 127)
+
+
+class SongKongExecutor:
+    """Command builder for SongKong passes of one worker (one /songkong directory)."""
+
+    def __init__(
+        self,
+        image: str,
+        mounts: Sequence[Tuple[str, str]],
+        mode: str = "run",
+        container_name: str = "songkong_worker",
+        log: Callable[[str], None] = print,
+    ):
+        self.image = image
+        self.mounts = list(mounts)
+        self.mode = mode if mode in EXECUTOR_MODES else "run"
+        self.container_name = container_name
+        self.log = log
+        self._entrypoint: Optional[List[str]] = None
+        self._started = False
+
+    def _volume_args(self) -> List[str]:
+        args: List[str] = []
+        for host, container in self.mounts:
+            args += ["-v", f"{host}:{container}"]
+        return args
+
+    def run_command(self, pass_name: str, args: Sequence[str]) -> List[str]:
+        """`docker run --rm` command for one pass (also the fallback of exec mode)."""
+        return ["docker", "run", "--rm", "--name", pass_name, *self._volume_args(), self.image, *args]
+
+    def command(self, pass_name: str, args: Sequence[str]) -> List[str]:
+        """Command to run one pass; pass_name is the container name used in run mode."""
+        if self.mode == "exec" and self._ensure_started():
+            return ["docker", "exec", self.container_name, *self._entrypoint, *args]
+        return self.run_command(pass_name, args)
+
+    def is_exec_start_failure(self, cmd: Sequence[str], returncode: int) -> bool:
+        """True when an exec command failed before SongKong ran; the caller should retry in run mode."""
+        if len(cmd) < 2 or cmd[1] != "exec" or returncode not in _EXEC_START_FAILURES:
+            return False
+        self._fallback(f"docker exec exited with {returncode}")
+        return True
+
+    def _image_entrypoint(self) -> Optional[List[str]]:
+        out = subprocess.run(
+            ["docker", "image", "inspect", self.image, "--format", "{{json .Config.Entrypoint}}|{{json .Config.Cmd}}"],
+            capture_output=True, text=True, timeout=30,
+        )
+        if out.returncode != 0 or "|" not in out.stdout:
+            return None
+        entry_raw, cmd_raw = out.stdout.strip().split("|", 1)
+        entry = json.loads(entry_raw) or []
+        if not entry:
+            # Image without ENTRYPOINT: its CMD is the launcher; pass arguments follow it
+            entry = json.loads(cmd_raw) or []
+        return list(entry) or None
+
+    def _is_running(self) -> bool:
+        out = subprocess.run(
+            ["docker", "inspect", "-f", "{{.State.Running}}", self.container_name],
+            capture_output=True, text=True, timeout=10,
+        )
+        return out.returncode == 0 and out.stdout.strip() == "true"
+
+    def _ensure_started(self) -> bool:
+        try:
+            if self._started and self._is_running():
+                return True
+            if self._entrypoint is None:
+                self._entrypoint = self._image_entrypoint()
+                if not self._entrypoint:
+                    self._fallback(f"cannot read entrypoint of {self.image}")
+                    return False
+            subprocess.run(["docker", "rm", "-f", self.container_name], capture_output=True, timeout=30)
+            out = subprocess.run(
+                ["docker", "run", "-d", "--rm", "--name", self.container_name, *self._volume_args(),
+                 "--entrypoint", "tail", self.image, "-f", "/dev/null"],
+                capture_output=True, text=True, timeout=120,
+            )
+            if out.returncode != 0:
+                self._fallback(f"cannot start {self.container_name}: {out.stderr.strip()}")
+                return False
+            self._started = True
+            self.log(f"SongKong executor: started long-lived container {self.container_name}")
+            return True
+        except (OSError, subprocess.SubprocessError, ValueError) as e:
+            self._fallback(str(e))
+            return False
+
+    def _fallback(self, reason: str) -> None:
+        if self.mode == "exec":
+            self.log(f"SongKong executor: {reason} → falling back to docker run per pass")
+        self.mode = "run"
+
+    def abort(self) -> None:
+        """Kill a pass in progress: in exec mode the SongKong process lives in the worker container."""
+        if self._started:
+            subprocess.run(["docker", "restart", "-t", "5", self.container_name], capture_output=True, timeout=60)
+
+    def stop(self) -> None:
+        if not self._started:
+            return
+        subprocess.run(["docker", "rm", "-f", self.container_name], capture_output=True, timeout=60)
+        self._started = False
+        self.log(f"SongKong executor: stopped {self.container_name}")
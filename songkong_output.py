@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Single-pass streaming parser for SongKong stdout.
+Counters are updated as each line arrives, so runners never keep the full output in memory.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+
+# One compiled alternation for every counter SongKong prints ("Key:123" or "Key 123")
+_COUNTER_RE = re.compile(
+    r"(Songs loaded|Fingerprinted|MusicBrainz|Discogs|Saved|Completed|Errors and Warnings"
+    r"|Processing|Duplicate groups found|Duplicate songs deleted|Songs renamed)[: ](\d+)"
+)
+_REPORT_RE = re.compile(r"Report Created:.*")
+
+# Keys summarised after a fix-songs / bandcamp pass (run_songkong_task)
+TASK_SUMMARY_KEYS = ("Fingerprinted", "MusicBrainz", "Discogs", "Saved", "Completed", "Errors and Warnings")
+DELETE_SUMMARY_KEYS = ("Processing", "Songs loaded", "Duplicate groups found", "Duplicate songs deleted",
+                       "Errors and Warnings")
+RENAME_SUMMARY_KEYS = ("Songs loaded", "Songs renamed", "Completed", "Errors and Warnings")
+
+
+class SongKongStats:
+    """Counters of one SongKong pass: first, last and summed value of every key."""
+
+    def __init__(self) -> None:
+        self.lines = 0
+        self.first: Dict[str, int] = {}
+        self.last: Dict[str, int] = {}
+        self.sums: Dict[str, int] = {}
+        self.report: Optional[str] = None
+
+    def feed(self, line: str) -> bool:
+        """Parse one output line; returns True when a counter changed."""
+        self.lines += 1
+        changed = False
+        seen = set()
+        for m in _COUNTER_RE.finditer(line):
+            key = m.group(1)
+            # Like a per-key re.search: only the first occurrence of a key in a line counts
+            if key in seen:
+                continue
+            seen.add(key)
+            n = int(m.group(2))
+            self.first.setdefault(key, n)
+            self.last[key] = n
+            self.sums[key] = self.sums.get(key, 0) + n
+            changed = True
+        if "Report Created" in line:
+            m = _REPORT_RE.search(line)
+            if m:
+                self.report = m.group(0)
+        return changed
+
+    def feed_all(self, lines: Iterable[str]) -> "SongKongStats":
+        for line in lines:
+            self.feed(line)
+        return self
+
+    def live(self) -> Dict[str, int]:
+        """Snapshot for progress reporting."""
+        return {
+            "songs_loaded": self.first.get("Songs loaded", 0),
+            "fingerprinted": self.last.get("Fingerprinted", 0),
+            "saved": self.last.get("Saved", 0),
+            "completed": self.last.get("Completed", 0),
+            "errors": self.last.get("Errors and Warnings", 0),
+            "lines": self.lines,
+        }
+
+    def task_summary(self) -> List[str]:
+        """Summary of a fix-songs pass: summed counters, with % of "Completed" or "Songs loaded"."""
+        # SongKong may output cumulative totals for some keys (e.g. Fingerprinted) so n can
+        # exceed the denominator -> show % only when n <= denominator
+        total_loaded = self.first.get("Songs loaded", 0)
+        completed = self.first.get("Completed", total_loaded)
+        denominator = completed or total_loaded or 1
+        summary_lines = []
+        for key in TASK_SUMMARY_KEYS:
+            n = self.sums.get(key, 0)
+            if n <= denominator and denominator > 0:
+                summary_lines.append(f"{key}: {n} ({(n / denominator) * 100:.2f}%)")
+            else:
+                summary_lines.append(f"{key}: {n}")
+        return summary_lines
+
+    def key_summary(self, keys: Iterable[str], with_report: bool = False) -> str:
+        """Last value of each key seen, one "Key:value" per line (delete / rename summaries)."""
+        lines = [f"{key}:{self.last[key]}" for key in keys if key in self.last]
+        if with_report and self.report:
+            lines.insert(0, self.report)
+        return "\n".join(lines)
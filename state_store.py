@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Processed-folder state for the Autokong pipeline (autokong.db, table `processed`).
+Replaces the linear scan of the legacy processed_folders.log: the log is imported once,
+membership is answered from an in-memory set, and writes are batched upserts on a single
+long-lived WAL connection.
+
+Table `step_checkpoints` is the step-level journal of runs: every (folder, step) a run plans is
+recorded as pending, then done or error as soon as the pass ends (committed at once, passes take
+hours). A folder's rows are dropped when all its steps are done, so the table only holds the
+work a crashed or failed run left behind; a resume run continues from it. Global steps are
+recorded under the folder "".
+
+Usage:
+  python3 state_store.py stats
+  python3 state_store.py export processed_folders.txt [--with-status]
+  python3 state_store.py checkpoints
+  python3 state_store.py compact
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+DEFAULT_BATCH_SIZE = 200
+
+
+class ProcessedStore:
+    """Indexed processed-folder state. Thread-safe; call flush() before reading the DB elsewhere."""
+
+    def __init__(self, db_path: str, legacy_log: Optional[str] = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.db_path = db_path
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+        if legacy_log:
+            self._import_legacy_log(legacy_log)
+        # Any recorded folder counts as processed: the legacy log recorded errors too.
+        self._known: Set[str] = {row[0] for row in self._conn.execute("SELECT folder FROM processed")}
+        self._pending: Dict[str, Tuple[str, str]] = {}
+
+    def _init_schema(self) -> None:
+        # Same table as the historical init_db(); UNIQUE(folder) is the lookup index.
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS processed (
+                folder TEXT UNIQUE,
+                last_scanned TIMESTAMP,
+                status TEXT
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS state_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS step_checkpoints (
+                folder TEXT NOT NULL,
+                step TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                run_id TEXT,
+                updated_at TIMESTAMP,
+                PRIMARY KEY (folder, step)
+            ) WITHOUT ROWID
+        """)
+        self._conn.commit()
+
+    def _import_legacy_log(self, path: str) -> None:
+        """Import processed_folders.log once; later runs never read it again."""
+        row = self._conn.execute(
+            "SELECT value FROM state_meta WHERE key = 'legacy_log_imported'"
+        ).fetchone()
+        if row is not None or not os.path.isfile(path):
+            return
+        now = datetime.now().isoformat()
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            folders = {line.rstrip("\n") for line in f if line.strip()}
+        self._conn.executemany(
+            "INSERT INTO processed(folder, last_scanned, status) VALUES(?, ?, 'ok') "
+            "ON CONFLICT(folder) DO NOTHING",
+            ((folder, now) for folder in folders),
+        )
+        self._conn.execute(
+            "INSERT OR REPLACE INTO state_meta(key, value) VALUES('legacy_log_imported', ?)",
+            (f"{path} ({len(folders)} entries, {now})",),
+        )
+        self._conn.commit()
+
+    def contains(self, folder: str) -> bool:
+        with self._lock:
+            return folder in self._known
+
+    def mark(self, folder: str, status: str = "ok") -> None:
+        """Record folder; the row is written with the next batch (or flush())."""
+        with self._lock:
+            self._known.add(folder)
+            self._pending[folder] = (datetime.now().isoformat(), status)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        rows = [(folder, ts, status) for folder, (ts, status) in self._pending.items()]
+        self._conn.executemany("""
+            INSERT INTO processed(folder, last_scanned, status)
+            VALUES(?, ?, ?)
+            ON CONFLICT(folder) DO UPDATE SET
+                last_scanned=excluded.last_scanned,
+                status=excluded.status
+        """, rows)
+        self._conn.commit()
+        self._pending.clear()
+
+    # -- step checkpoints ----------------------------------------------------------------
+
+    def plan_steps(self, run_id: Optional[str], plan: Dict[str, List[str]]) -> None:
+        """Record folder -> steps (in run order) as pending, replacing earlier rows of these folders."""
+        now = datetime.now().isoformat()
+        with self._lock:
+            for folder, steps in plan.items():
+                self._conn.execute("DELETE FROM step_checkpoints WHERE folder = ?", (folder,))
+                self._conn.executemany(
+                    "INSERT INTO step_checkpoints(folder, step, seq, status, run_id, updated_at) "
+                    "VALUES(?, ?, ?, 'pending', ?, ?)",
+                    [(folder, step, seq, run_id, now) for seq, step in enumerate(steps)],
+                )
+            self._conn.commit()
+
+    def mark_step(self, folder: str, step: str, status: str = "done", run_id: Optional[str] = None) -> None:
+        """Record the outcome of one planned step; the folder's rows go once all its steps are done."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE step_checkpoints SET status = ?, run_id = COALESCE(?, run_id), updated_at = ? "
+                "WHERE folder = ? AND step = ?",
+                (status, run_id, datetime.now().isoformat(), folder, step),
+            )
+            self._conn.execute(
+                "DELETE FROM step_checkpoints WHERE folder = ? AND NOT EXISTS ("
+                "SELECT 1 FROM step_checkpoints WHERE folder = ? AND status != 'done')",
+                (folder, folder),
+            )
+            self._conn.commit()
+
+    def outstanding_steps(self) -> Dict[str, List[Dict[str, Any]]]:
+        """folder -> its checkpoint rows in run order ({step, status, run_id, updated_at}), folders sorted."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT folder, step, status, run_id, updated_at FROM step_checkpoints ORDER BY folder, seq"
+            ).fetchall()
+        plan: Dict[str, List[Dict[str, Any]]] = {}
+        for folder, step, status, run_id, updated_at in rows:
+            plan.setdefault(folder, []).append(
+                {"step": step, "status": status, "run_id": run_id, "updated_at": updated_at}
+            )
+        return plan
+
+    def discard_steps(self, folder: Optional[str] = None) -> int:
+        """Forget the outstanding steps of folder (default: of every folder)."""
+        with self._lock:
+            if folder is None:
+                cur = self._conn.execute("DELETE FROM step_checkpoints")
+            else:
+                cur = self._conn.execute("DELETE FROM step_checkpoints WHERE folder = ?", (folder,))
+            self._conn.commit()
+            return cur.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._known)
+
+    def iter_rows(self) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        """Yield (folder, last_scanned, status) sorted by folder."""
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(
+                "SELECT folder, last_scanned, status FROM processed ORDER BY folder"
+            ).fetchall()
+        yield from rows
+
+    def export(self, path: str, with_status: bool = False) -> int:
+        """Write one folder per line (legacy log format), or folder<TAB>status<TAB>last_scanned."""
+        count = 0
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            for folder, last_scanned, status in self.iter_rows():
+                if with_status:
+                    f.write(f"{folder}\t{status or ''}\t{last_scanned or ''}\n")
+                else:
+                    f.write(folder + "\n")
+                count += 1
+        return count
+
+    def compact(self) -> None:
+        """Flush pending rows, fold the WAL back into the main file and VACUUM."""
+        with self._lock:
+            self._flush_locked()
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            self._flush_locked()
+            by_status = dict(self._conn.execute(
+                "SELECT COALESCE(status, ''), COUNT(*) FROM processed GROUP BY status"
+            ).fetchall())
+            legacy = self._conn.execute(
+                "SELECT value FROM state_meta WHERE key = 'legacy_log_imported'"
+            ).fetchone()
+            outstanding = self._conn.execute(
+                "SELECT COUNT(DISTINCT folder), COUNT(*) FROM step_checkpoints WHERE status != 'done'"
+            ).fetchone()
+        return {
+            "db_path": self.db_path,
+            "folders": len(self._known),
+            "by_status": by_status,
+            "outstanding_steps": f"{outstanding[1]} in {outstanding[0]} folder(s)",
+            "legacy_log_imported": legacy[0] if legacy else None,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect, export or compact the Autokong processed-folder state.")
+    parser.add_argument("--db", default="autokong.db", help="Path to autokong.db (default: ./autokong.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Show folder counts per status")
+    p_export = sub.add_parser("export", help="Export processed folders to a text file")
+    p_export.add_argument("output", help="Output file")
+    p_export.add_argument("--with-status", action="store_true", help="Also write status and last_scanned (TSV)")
+    sub.add_parser("checkpoints", help="List the steps left behind by interrupted or failed runs")
+    sub.add_parser("compact", help="Checkpoint the WAL and VACUUM the database")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.db):
+        print(f"Database not found: {args.db}", file=sys.stderr)
+        sys.exit(1)
+    store = ProcessedStore(args.db)
+    try:
+        if args.command == "stats":
+            for key, value in store.stats().items():
+                print(f"{key}: {value}")
+        elif args.command == "export":
+            n = store.export(args.output, with_status=args.with_status)
+            print(f"Exported {n} folder(s) to {args.output}")
+        elif args.command == "checkpoints":
+            for folder, rows in store.outstanding_steps().items():
+                steps = ", ".join(f"{r['step']}={r['status']}" for r in rows)
+                print(f"{folder or '(global steps)'}: {steps}")
+        elif args.command == "compact":
+            before = os.path.getsize(args.db)
+            store.compact()
+            print(f"Compacted {args.db}: {before} -> {os.path.getsize(args.db)} bytes")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
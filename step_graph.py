@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Small dependency-graph scheduler for the pipeline steps of one run.
+
+Each node is a callable with
+  - deps: nodes that must have succeeded first (the node is skipped when one failed or was skipped),
+  - after: nodes that must have finished first, whatever their outcome,
+  - a pool (bounded number of nodes of that pool running at once, e.g. SongKong workers),
+  - locks: named resources held exclusively while the node runs (e.g. the matched library).
+Ready nodes start in the order they were added, so a folder's next pass is preferred over the
+first pass of a later folder. Nodes can only depend on nodes added before them: the graph is
+acyclic by construction.
+
+An optional listener(node) is called from the scheduling thread each time a node starts, ends or
+is skipped (node.status, node.seconds), e.g. to follow the remaining time of the run.
+
+After run(), critical_path() follows, from the node that finished last, the dependency that
+finished last before each node started: that chain is where the wall time went. Gaps between a
+node's inputs being ready and its start are waits for a pool slot or a lock.
+"""
+
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Node states
+WAITING, RUNNING, DONE, FAILED, SKIPPED = "waiting", "running", "done", "failed", "skipped"
+
+
+class Node:
+    """One unit of work of the graph and its timings (seconds since the run started)."""
+
+    def __init__(self, key: str, fn: Callable[[], Any], deps: List[str], after: List[str],
+                 pool: str, locks: List[str], label: str):
+        self.key = key
+        self.fn = fn
+        self.deps = deps
+        self.after = after
+        self.pool = pool
+        self.locks = locks
+        self.label = label
+        self.status = WAITING
+        self.error: Optional[BaseException] = None
+        self.started: Optional[float] = None
+        self.ended: Optional[float] = None
+
+    @property
+    def inputs(self) -> List[str]:
+        return self.deps + self.after
+
+    @property
+    def seconds(self) -> float:
+        return (self.ended or 0.0) - (self.started or 0.0) if self.started is not None else 0.0
+
+
+class StepGraph:
+    """Nodes added with add(), executed by run() on one thread pool per pool name."""
+
+    def __init__(self, pools: Optional[Dict[str, int]] = None,
+                 listener: Optional[Callable[[Node], None]] = None):
+        self.pools = dict(pools or {})
+        self.listener = listener
+        self.nodes: Dict[str, Node] = {}
+        self.wall_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.nodes
+
+    def add(self, key: str, fn: Callable[[], Any], deps: Iterable[str] = (), after: Iterable[str] = (),
+            pool: str = "default", locks: Iterable[str] = (), label: Optional[str] = None) -> str:
+        if key in self.nodes:
+            raise ValueError(f"Duplicate graph node: {key}")
+        deps, after = list(deps), list(after)
+        for k in deps + after:
+            if k not in self.nodes:
+                raise ValueError(f"Graph node {key} depends on unknown node {k}")
+        self.nodes[key] = Node(key, fn, deps, after, pool, list(locks), label or key)
+        return key
+
+    def run(self) -> Dict[str, BaseException]:
+        """Run every node (blocking); returns {key: exception} of the nodes that failed."""
+        t0 = time.monotonic()
+        order = list(self.nodes.values())
+        executors = {name: ThreadPoolExecutor(max_workers=max(1, self.pools.get(name, 1)),
+                                              thread_name_prefix=f"graph-{name}")
+                     for name in {n.pool for n in order}}
+        running = {name: 0 for name in executors}
+        held: set = set()
+        finished: "queue.SimpleQueue[Node]" = queue.SimpleQueue()
+        in_flight = 0
+
+        def notify(node: Node) -> None:
+            if self.listener is not None:
+                try:
+                    self.listener(node)
+                except Exception:
+                    pass
+
+        def call(node: Node) -> None:
+            try:
+                node.fn()
+            except BaseException as e:
+                node.error = e
+            node.ended = time.monotonic() - t0
+            finished.put(node)
+
+        try:
+            while True:
+                changed = True
+                while changed:
+                    changed = False
+                    for node in order:
+                        if node.status != WAITING:
+                            continue
+                        inputs = [self.nodes[k] for k in node.inputs]
+                        if any(n.status in (WAITING, RUNNING) for n in inputs):
+                            continue
+                        if any(self.nodes[k].status != DONE for k in node.deps):
+                            node.status = SKIPPED
+                            notify(node)
+                            changed = True
+                            continue
+                        if running[node.pool] >= max(1, self.pools.get(node.pool, 1)) or held.intersection(node.locks):
+                            continue
+                        node.status = RUNNING
+                        node.started = time.monotonic() - t0
+                        running[node.pool] += 1
+                        held.update(node.locks)
+                        in_flight += 1
+                        notify(node)
+                        executors[node.pool].submit(call, node)
+                        changed = True
+                if not in_flight:
+                    break
+                node = finished.get()
+                in_flight -= 1
+                running[node.pool] -= 1
+                held.difference_update(node.locks)
+                node.status = FAILED if node.error is not None else DONE
+                notify(node)
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+            self.wall_seconds = time.monotonic() - t0
+        return {n.key: n.error for n in order if n.status == FAILED}
+
+    def critical_path(self) -> Dict[str, Any]:
+        """
+        {wall_seconds, path: [{node, label, seconds, wait_seconds}]} from the first to the last
+        finished node; wait_seconds is the time the node was ready but waited for a slot or lock.
+        """
+        ran = [n for n in self.nodes.values() if n.started is not None and n.ended is not None]
+        path: List[Dict[str, Any]] = []
+        node = max(ran, key=lambda n: n.ended, default=None)
+        while node is not None:
+            preds = [self.nodes[k] for k in node.inputs if self.nodes[k].ended is not None]
+            pred = max(preds, key=lambda n: n.ended, default=None)
+            ready = pred.ended if pred is not None else 0.0
+            path.append({
+                "node": node.key,
+                "label": node.label,
+                "seconds": round(node.seconds, 3),
+                "wait_seconds": round(max(0.0, node.started - ready), 3),
+            })
+            node = pred
+        path.reverse()
+        return {"wall_seconds": round(self.wall_seconds, 3), "path": path}
+
+    def timings(self) -> List[Dict[str, Any]]:
+        """Every node: key, label, status, start/end offsets and duration in seconds."""
+        return [{
+            "node": n.key,
+            "label": n.label,
+            "status": n.status,
+            "start": round(n.started, 3) if n.started is not None else None,
+            "end": round(n.ended, 3) if n.ended is not None else None,
+            "seconds": round(n.seconds, 3),
+        } for n in self.nodes.values()]
+
+
+def format_critical_path(report: Dict[str, Any]) -> str:
+    """One-line summary of critical_path(): total, then each node with its duration (and wait)."""
+    steps = []
+    for p in report["path"]:
+        wait = f", waited {p['wait_seconds']:.0f}s" if p["wait_seconds"] >= 1 else ""
+        steps.append(f"{p['label']} {p['seconds']:.0f}s{wait}")
+    return f"{report['wall_seconds']:.0f}s wall: " + " → ".join(steps)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent audio tag cache for audit snapshots (data/tag_cache.db).
+Entries are keyed by path and only valid while size, mtime and inode are unchanged, so
+unchanged files are never parsed (or fingerprinted) twice.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+_APP_DIR = Path(__file__).resolve().parent
+DATA_DIR = os.environ.get("AUTOKONG_DATA_DIR", str(_APP_DIR / "data"))
+TAG_CACHE_DB_PATH = os.path.join(DATA_DIR, "tag_cache.db")
+
+# Entries not re-written for this long are dropped by prune()
+DEFAULT_MAX_AGE_DAYS = 90
+
+
+class TagCache:
+    """(path, size, mtime_ns, inode) -> (tags dict, audio fingerprint). Thread-safe; writes are batched until flush()."""
+
+    def __init__(self, db_path: str = TAG_CACHE_DB_PATH, batch_size: int = 500):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS tag_cache (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                tags TEXT NOT NULL,
+                written_at REAL NOT NULL,
+                fingerprint TEXT
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tag_cache)")}
+        if "fingerprint" not in columns:
+            self._conn.execute("ALTER TABLE tag_cache ADD COLUMN fingerprint TEXT")
+        self._conn.commit()
+        self._pending: List[Tuple[str, int, int, int, str, float, Optional[str]]] = []
+
+    def get(
+        self, path: str, size: int, mtime_ns: int, inode: int, need_fingerprint: bool = False
+    ) -> Optional[Tuple[Dict[str, Any], Optional[str]]]:
+        """
+        Cached (tags, fingerprint) if the file is unchanged, else None (counted as a miss).
+        With need_fingerprint, an entry stored without fingerprint is a miss too.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, tags, fingerprint FROM tag_cache WHERE path = ?", (path,)
+            ).fetchone()
+            if (row is not None and (row[0], row[1], row[2]) == (size, mtime_ns, inode)
+                    and (row[4] or not need_fingerprint)):
+                self.hits += 1
+                return json.loads(row[3]), row[4]
+            self.misses += 1
+            return None
+
+    def put(
+        self, path: str, size: int, mtime_ns: int, inode: int, tags: Dict[str, Any], fingerprint: Optional[str] = None
+    ) -> None:
+        with self._lock:
+            self._pending.append((path, size, mtime_ns, inode, json.dumps(tags), time.time(), fingerprint))
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO tag_cache (path, size, mtime_ns, inode, tags, written_at, fingerprint)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._pending,
+        )
+        self._conn.commit()
+        self._pending.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def prune(self, max_age_days: int = DEFAULT_MAX_AGE_DAYS) -> int:
+        """Drop entries written more than max_age_days ago (files renamed or deleted since)."""
+        with self._lock:
+            self._flush_locked()
+            cur = self._conn.execute(
+                "DELETE FROM tag_cache WHERE written_at < ?", (time.time() - max_age_days * 86400,)
+            )
+            self._conn.commit()
+            return cur.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared audio file scanner used by the pipeline audit and scripts/verify_album_holes.py.
+Directories are listed with os.scandir (the stat comes with the directory entry) and tags are
+read by a process pool in chunked batches. Results always follow the sorted walk order.
+
+Optionally each file also gets an audio fingerprint: a sampled hash of the audio payload with
+tag blocks skipped (ID3v2 / ID3v1 / APEv2 for MP3, metadata blocks for FLAC, mdat atom for
+MP4/M4A), so it survives SongKong rewriting tags. Other formats hash the whole file.
+"""
+
+import functools
+import hashlib
+import multiprocessing
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+AUDIO_EXTENSIONS = (".mp3", ".flac", ".wav", ".aac", ".m4a", ".ogg", ".wma", ".alac", ".aiff")
+
+# Files sent to a worker process per batch
+DEFAULT_CHUNK_SIZE = 64
+
+# Fingerprint: FINGERPRINT_SAMPLES blocks of FINGERPRINT_BLOCK bytes spread over the audio payload
+FINGERPRINT_BLOCK = 64 * 1024
+FINGERPRINT_SAMPLES = 8
+
+
+def read_file_tags(filepath: str) -> Dict[str, Any]:
+    """Read audio tags; return dict with artist, album, title, track, etc. or empty on error."""
+    try:
+        from tinytag import TinyTag
+    except ImportError:
+        return {}
+    try:
+        tag = TinyTag.get(filepath)
+        return {
+            "artist": (tag.artist or "").strip() or None,
+            "album": (tag.album or "").strip() or None,
+            "title": (tag.title or "").strip() or None,
+            "track": str(tag.track).split("/")[0].strip() if tag.track else None,
+            "track_total": str(tag.track_total).strip() if tag.track_total else None,
+            "albumartist": (getattr(tag, "albumartist", None) or "").strip() or None,
+        }
+    except Exception:
+        return {}
+
+
+def _skip_id3v2(f: BinaryIO, start: int) -> int:
+    """Offset after the ID3v2 tag(s) found at start."""
+    while True:
+        f.seek(start)
+        header = f.read(10)
+        if len(header) < 10 or header[:3] != b"ID3":
+            return start
+        size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        start += 10 + size + (10 if header[5] & 0x10 else 0)
+
+
+def _trailing_tags_start(f: BinaryIO, end: int) -> int:
+    """Offset where trailing ID3v1 / APEv2 tags begin (end if none)."""
+    if end >= 128:
+        f.seek(end - 128)
+        if f.read(3) == b"TAG":
+            end -= 128
+    if end >= 32:
+        f.seek(end - 32)
+        footer = f.read(32)
+        if footer[:8] == b"APETAGEX":
+            size, _count, flags = struct.unpack("<III", footer[12:24])
+            end -= size + (32 if flags & 0x80000000 else 0)
+    return max(end, 0)
+
+
+def _flac_audio_start(f: BinaryIO, start: int) -> int:
+    """Offset of the first FLAC frame: after "fLaC" and every metadata block."""
+    pos = start + 4
+    while True:
+        f.seek(pos)
+        header = f.read(4)
+        if len(header) < 4:
+            return pos
+        pos += 4 + int.from_bytes(header[1:4], "big")
+        if header[0] & 0x80:
+            return pos
+
+
+def _mp4_mdat_range(f: BinaryIO, end: int) -> Optional[Tuple[int, int]]:
+    """(start, end) of the top-level mdat atom, tags live in moov/udta."""
+    pos = 0
+    while pos + 8 <= end:
+        f.seek(pos)
+        size, kind = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return None
+        if kind == b"mdat":
+            return pos + header, min(pos + size, end)
+        pos += size
+    return None
+
+
+def _audio_payload_range(f: BinaryIO, size: int) -> Tuple[int, int]:
+    """(start, end) of the audio data, tag blocks excluded."""
+    f.seek(4)
+    if f.read(4) == b"ftyp":
+        return _mp4_mdat_range(f, size) or (0, size)
+    start = _skip_id3v2(f, 0)
+    f.seek(start)
+    if f.read(4) == b"fLaC":
+        return _flac_audio_start(f, start), size
+    return start, _trailing_tags_start(f, size)
+
+
+def audio_fingerprint(filepath: str) -> Optional[str]:
+    """Sampled hash of the audio payload (tags excluded); None if the file cannot be read."""
+    try:
+        with open(filepath, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            start, end = _audio_payload_range(f, size)
+            length = max(end - start, 0)
+            h = hashlib.blake2b(digest_size=16)
+            h.update(length.to_bytes(8, "big"))
+            if length <= FINGERPRINT_BLOCK * FINGERPRINT_SAMPLES:
+                f.seek(start)
+                h.update(f.read(length))
+            else:
+                step = (length - FINGERPRINT_BLOCK) // (FINGERPRINT_SAMPLES - 1)
+                for i in range(FINGERPRINT_SAMPLES):
+                    f.seek(start + i * step)
+                    h.update(f.read(FINGERPRINT_BLOCK))
+            return h.hexdigest()
+    except (OSError, struct.error):
+        return None
+
+
+def read_file_info(filepath: str, fingerprint: bool = False) -> Tuple[Dict[str, Any], Optional[str]]:
+    """(tags, fingerprint or None) of one file."""
+    return read_file_tags(filepath), audio_fingerprint(filepath) if fingerprint else None
+
+
+def iter_audio_files(root: str) -> Iterator[Tuple[str, str, int, int, int]]:
+    """
+    Yield (full_path, name, size, mtime_ns, inode) for every audio file under root, top-down,
+    files of a directory first, then its subdirectories, each sorted by name.
+    Symlinked directories are not followed (like os.walk).
+    """
+    try:
+        with os.scandir(root) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError:
+        return
+    subdirs = []
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+                continue
+            if not entry.name.lower().endswith(AUDIO_EXTENSIONS):
+                continue
+            st = entry.stat()
+            yield entry.path, entry.name, st.st_size, st.st_mtime_ns, st.st_ino
+        except OSError:
+            yield entry.path, entry.name, 0, 0, 0
+    for sub in subdirs:
+        yield from iter_audio_files(sub)
+
+
+def resolve_jobs(jobs: int) -> int:
+    """Worker processes to use: 0 means one per CPU; never more than the CPUs available."""
+    cpus = os.cpu_count() or 1
+    if jobs <= 0:
+        return cpus
+    return max(1, min(jobs, cpus))
+
+
+def read_files_many(
+    paths: Sequence[str],
+    jobs: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    fingerprint: bool = False,
+) -> List[Tuple[Dict[str, Any], Optional[str]]]:
+    """(tags, fingerprint) of each path, in the same order as paths. Serial if the pool cannot run."""
+    read = functools.partial(read_file_info, fingerprint=fingerprint)
+    jobs = resolve_jobs(jobs)
+    if jobs <= 1 or len(paths) <= chunk_size:
+        return [read(p) for p in paths]
+    # forkserver: the web app is multi-threaded, forking it directly could copy a held lock into the children
+    ctx = multiprocessing.get_context("forkserver")
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=ctx) as pool:
+            return list(pool.map(read, paths, chunksize=chunk_size))
+    except (OSError, BrokenProcessPool):
+        return [read(p) for p in paths]
+
+
+def read_tags_many(paths: Sequence[str], jobs: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Dict[str, Any]]:
+    """Tags of each path, in the same order as paths."""
+    return [tags for tags, _fp in read_files_many(paths, jobs=jobs, chunk_size=chunk_size)]
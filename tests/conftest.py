@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [_ROOT, os.path.join(_ROOT, "scripts")]
+
+from plex_stub_server import StubPlexServer  # noqa: E402
+
+
+@pytest.fixture
+def stub():
+    """Stub Plex on a free local port, stopped after the test."""
+    with StubPlexServer() as server:
+        yield server
@@ -0,0 +1,133 @@
+import time
+
+import pytest
+
+import plex_activity
+from plex_activity import PlexActivityWatcher
+from plex_client import PlexClient
+from plex_stub_server import STUB_TOKEN, StubPlexServer
+
+ALBUM = "/music/matched/A/Artist/Album"
+
+
+@pytest.fixture
+def fast_poll(monkeypatch):
+    monkeypatch.setattr(plex_activity, "POLL_MIN_SECONDS", 0.1)
+    monkeypatch.setattr(plex_activity, "POLL_MAX_SECONDS", 0.2)
+
+
+def _client(stub):
+    return PlexClient(stub.url, STUB_TOKEN, stub.section, retry_interval=0.01, log=lambda _m: None)
+
+
+def _watcher(stub, token=STUB_TOKEN, poll=None, start_grace=5.0):
+    return PlexActivityWatcher(stub.url, token, stub.section, poll=poll, log=lambda _m: None,
+                               start_grace=start_grace)
+
+
+def test_wait_returns_when_the_scan_activity_ends(stub):
+    stub.scan_seconds = 1.5
+    client = _client(stub)
+    watcher = _watcher(stub)
+    try:
+        assert watcher.start()
+        watcher.track([ALBUM])
+        assert client.refresh(ALBUM)
+        t0 = time.monotonic()
+        assert watcher.wait(timeout=10)
+        elapsed = time.monotonic() - t0
+    finally:
+        watcher.close()
+        client.close()
+    assert 1.2 <= elapsed < 3.0
+    # only the refresh itself: no section polling while notifications flow
+    assert [r["path"] for r in stub.requests() if r["path"] != "/:/websockets/notifications"] == [
+        f"/library/sections/{stub.section}/refresh"]
+
+
+def test_activity_of_another_section_is_ignored(stub):
+    stub.scan_seconds = 0.2
+    watcher = _watcher(stub, start_grace=60)
+    try:
+        assert watcher.start()
+        watcher.track([ALBUM])
+        stub.section = "2"
+        stub.start_scan(ALBUM)
+        assert not watcher.wait(timeout=1)
+        assert watcher.status()[ALBUM]["seen"] is False
+    finally:
+        watcher.close()
+
+
+def test_wait_times_out_while_plex_is_scanning(stub):
+    stub.scan_seconds = 5
+    watcher = _watcher(stub)
+    try:
+        assert watcher.start()
+        watcher.track([ALBUM])
+        stub.start_scan(ALBUM)
+        t0 = time.monotonic()
+        assert not watcher.wait(timeout=0.5)
+        assert time.monotonic() - t0 < 2
+        assert watcher.status()[ALBUM] == {"seen": True, "ended": False, "settled": False}
+    finally:
+        watcher.close()
+
+
+def test_polls_when_notifications_are_refused(stub, fast_poll):
+    stub.scan_seconds = 1.0
+    client = _client(stub)
+    # a wrong token gets 401 on the websocket upgrade; the poll callable still works
+    watcher = _watcher(stub, token="wrong-token", poll=client.is_refreshing)
+    try:
+        assert not watcher.start()
+        watcher.track([ALBUM])
+        assert client.refresh(ALBUM)
+        t0 = time.monotonic()
+        assert watcher.wait(timeout=10)
+        elapsed = time.monotonic() - t0
+    finally:
+        watcher.close()
+        client.close()
+    assert 0.8 <= elapsed < 3.0
+    assert any(r["path"] == f"/library/sections/{stub.section}" for r in stub.requests())
+
+
+def test_polls_when_the_server_is_unreachable(fast_poll):
+    with StubPlexServer() as stub:
+        url = stub.url
+    watcher = PlexActivityWatcher(url, STUB_TOKEN, "1", poll=lambda: False, log=lambda _m: None)
+    assert not watcher.start()
+    watcher.track([ALBUM])
+    assert watcher.wait(timeout=5)
+
+
+def test_falls_back_to_polling_when_the_socket_drops(stub, fast_poll):
+    stub.scan_seconds = 1.0
+    client = _client(stub)
+    watcher = _watcher(stub, poll=client.is_refreshing)
+    try:
+        assert watcher.start()
+        # the stub ends its notification streams; HTTP requests are still served
+        stub.closing = True
+        deadline = time.monotonic() + 5
+        while watcher.connected and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert not watcher.connected
+        watcher.track([ALBUM])
+        assert client.refresh(ALBUM)
+        t0 = time.monotonic()
+        assert watcher.wait(timeout=10)
+        elapsed = time.monotonic() - t0
+    finally:
+        watcher.close()
+        client.close()
+    assert 0.8 <= elapsed < 3.0
+
+
+def test_polling_times_out_while_busy(fast_poll):
+    watcher = PlexActivityWatcher("http://127.0.0.1:9", STUB_TOKEN, "1", poll=lambda: True,
+                                  log=lambda _m: None)
+    t0 = time.monotonic()
+    assert not watcher.wait(timeout=0.5)
+    assert 0.4 <= time.monotonic() - t0 < 2
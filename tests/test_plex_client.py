@@ -0,0 +1,85 @@
+from plex_client import PlexClient, coalesce_paths
+from plex_stub_server import STUB_TOKEN
+
+
+def _client(stub, **kwargs):
+    kwargs.setdefault("retry_interval", 0.01)
+    return PlexClient(stub.url, STUB_TOKEN, stub.section, log=lambda _m: None, **kwargs)
+
+
+def test_coalesce_paths_folds_duplicates_and_subpaths():
+    roots = coalesce_paths(["/m/A/x", "/m/A/x/", "/m/A/x/CD1", "/m/B/y"])
+    assert roots == {"/m/A/x": ["/m/A/x", "/m/A/x/CD1"], "/m/B/y": ["/m/B/y"]}
+
+
+def test_coalesce_paths_min_siblings_folds_into_parent():
+    roots = coalesce_paths(["/m/A/a", "/m/A/b", "/m/B/c"], min_siblings=2)
+    assert roots == {"/m/A": ["/m/A/a", "/m/A/b"], "/m/B/c": ["/m/B/c"]}
+
+
+def test_refresh_many_sends_one_request_per_root(stub):
+    client = _client(stub, concurrency=3)
+    try:
+        result = client.refresh_many(["/m/A/x", "/m/A/x", "/m/A/x/CD1", "/m/B/y"])
+    finally:
+        client.close()
+    assert result == {"/m/A/x": True, "/m/A/x/CD1": True, "/m/B/y": True}
+    assert sorted(stub.refreshed_paths()) == ["/m/A/x", "/m/B/y"]
+
+
+def test_refresh_retries_until_plex_recovers(stub):
+    stub.fail_rate = 1.0
+
+    def log(message):
+        # the first 503 is logged before the backoff: let the retry succeed
+        if "returned 503" in message:
+            stub.fail_rate = 0.0
+
+    client = PlexClient(stub.url, STUB_TOKEN, stub.section, retry_interval=0.01, log=log)
+    try:
+        assert client.refresh("/m/A/x")
+    finally:
+        client.close()
+    (rec,) = client.records()
+    assert rec["status"] == 200 and rec["attempts"] == 2
+    assert client.report()["ops"]["refresh"]["retries"] == 1
+    assert stub.refreshed_paths() == ["/m/A/x", "/m/A/x"]
+
+
+def test_refresh_gives_up_after_the_last_attempt(stub):
+    stub.fail_rate = 1.0
+    client = _client(stub, attempts=3)
+    try:
+        assert not client.refresh("/m/A/x")
+    finally:
+        client.close()
+    ops = client.report()["ops"]["refresh"]
+    assert ops["requests"] == 1 and ops["failed"] == 1 and ops["retries"] == 2
+    assert len(stub.refreshed_paths()) == 3
+
+
+def test_unauthorized_is_not_retried(stub):
+    client = PlexClient(stub.url, "wrong-token", stub.section, retry_interval=0.01, log=lambda _m: None)
+    try:
+        assert not client.refresh("/m/A/x")
+    finally:
+        client.close()
+    (rec,) = client.records()
+    assert rec["status"] == 401 and rec["attempts"] == 1
+
+
+def test_report_latency_percentiles(stub):
+    stub.latency = 0.05
+    client = _client(stub, concurrency=3)
+    try:
+        client.refresh_many([f"/m/A/album {i}" for i in range(6)])
+        client.empty_trash()
+    finally:
+        client.close()
+    report = client.report()
+    assert report["requests"] == 7
+    refresh = report["ops"]["refresh"]
+    assert refresh["requests"] == 6 and refresh["failed"] == 0 and refresh["retries"] == 0
+    assert 0.05 <= refresh["p50_seconds"] <= refresh["p95_seconds"] <= refresh["max_seconds"]
+    assert refresh["total_seconds"] >= 6 * 0.05
+    assert report["ops"]["empty_trash"]["requests"] == 1